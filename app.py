@@ -5,20 +5,53 @@ Flaskを使用したTodoリスト管理アプリケーション
 データはGoogleスプレッドシートに保存されます。
 """
 
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify, session, stream_with_context
 from google_sheets_handler import GoogleSheetsHandler
-from line_notifier import send_todo_notifications
+from sqlite_storage import SQLiteTodoStorage, SheetsReplicator
+from sheets_client import QuotaAwareClient, background_priority
+from storage import ARCHIVE_BATCH_SIZE, BULK_ACTIONS, DEFAULT_PER_PAGE, LIST_COLUMNS, MAX_PER_PAGE, due_range_filter, filter_and_sort_records
+from todo import parse_due_ordinal
+from line_notifier import DEFAULT_MAX_WORKERS, send_todo_notifications
+from leader import FileLockLeaderElector, LeaderScheduler
+from startup import Warmup, timed_phase
+from render_cache import RenderCache
+from import_export import FORMATS, export_chunks, guess_format, import_todos, text_stream
+from metrics import SCHEDULER_JOB_SECONDS, finish_request, render_latest, start_request, timed
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 import os
 import json
 import base64
 import tempfile
+import time
 from datetime import datetime
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)  # セッション管理用
 
+# 環境変数から読み込む任意の設定
+OPTIONAL_CONFIG_KEYS = (
+    'CACHE_TTL',  # スプレッドシートのキャッシュ有効期間（秒）
+    'ID_BLOCK_SIZE',  # ID採番時に1回で予約するIDの数
+    'WRITE_BEHIND_DIR',  # ライトビハインドモードのジャーナル保存先（指定すると有効）
+    'FLUSH_INTERVAL',  # ライトビハインドモードでの反映間隔（秒）
+    'STORAGE_BACKEND',  # ストレージ（sheets / sqlite）
+    'SQLITE_PATH',  # SQLiteデータベースファイルのパス
+    'REPLICATION_INTERVAL',  # SQLiteからスプレッドシートへの複製間隔（秒）
+    'SHEETS_REQUESTS_PER_MINUTE',  # プロセスあたりのSheets API呼び出し上限（1分あたり）
+    'SHEETS_MAX_RETRIES',  # クォータ超過時の最大再試行回数
+    'SHEETS_RESYNC_INTERVAL',  # 更新日時に変化がなくてもスプレッドシート全体を読み直す間隔（秒）
+    'NOTIFY_DAYS_BEFORE',  # LINE通知する日数（カンマ区切り）
+    'NOTIFY_HOURS_BEFORE',  # LINE通知する時間数（カンマ区切り）
+    'LINE_MAX_WORKERS',  # LINE通知を並行して送信するスレッド数
+    'SCHEDULER_LOCK_PATH',  # スケジューラーのリーダー選出に使うロックファイルのパス
+    'SCHEDULER_ELECTION_INTERVAL',  # リーダーでないワーカーがロック取得を再試行する間隔（秒）
+    'WARMUP_TIMEOUT',  # リクエストがストレージの初期化完了を待つ最大時間（秒）
+    'RENDER_CACHE_SIZE',  # 描画済みの一覧ページを保持する数（0でキャッシュ無効）
+    'ARCHIVE_AFTER_DAYS',  # 完了からこの日数が過ぎたTodoをアーカイブへ移動（0で無効）
+    'ARCHIVE_BATCH_SIZE',  # アーカイブへの移動で1回のAPI呼び出しで追記・削除する行数
+)
+
 
 def load_config():
     """設定を環境変数またはconfig.jsonから読み込む"""
@@ -50,6 +83,10 @@ def load_config():
                 config['LINE_CHANNEL_ACCESS_TOKEN'] = channel_access_token
             if user_id:
                 config['LINE_USER_ID'] = user_id
+            # 任意の性能関連設定（README参照）
+            for key in OPTIONAL_CONFIG_KEYS:
+                if os.getenv(key):
+                    config[key] = os.getenv(key)
             return config
     
     # config.jsonから読み込み（ローカル開発用）
@@ -68,35 +105,147 @@ def load_config():
         return json.load(f)
 
 
-# Googleスプレッドシートハンドラー初期化
+# 設定読み込み（軽い処理のためインポート時に実行）
 sheets_handler = None
+storage = None
 config = None
 try:
-    config = load_config()
+    with timed_phase("設定読み込み"):
+        config = load_config()
     print(f"設定読み込み成功: SPREADSHEET_ID={config.get('SPREADSHEET_ID', 'N/A')[:20]}...")
-    sheets_handler = GoogleSheetsHandler(
-        credentials_path=config['GOOGLE_CREDENTIALS_PATH'],
-        spreadsheet_id=config['SPREADSHEET_ID']
-    )
-    print("✓ Googleスプレッドシートへの接続に成功しました")
 except FileNotFoundError as e:
     import traceback
     print(f"設定ファイルエラー: {str(e)}")
     print("環境変数 SPREADSHEET_ID と GOOGLE_CREDENTIALS_JSON が設定されているか確認してください。")
     traceback.print_exc()
-    sheets_handler = None
 except Exception as e:
     import traceback
     print(f"初期化エラー: {str(e)}")
     print("詳細:")
     traceback.print_exc()
-    sheets_handler = None
+
+
+# ストレージ初期化
+# STORAGE_BACKEND=sqlite の場合はSQLiteで読み書きし、スプレッドシートには非同期に複製する
+def init_storage():
+    """
+    スプレッドシートに接続してストレージを初期化（起動を待たせないようバックグラウンドで実行）
+    """
+    global sheets_handler, storage
+    if config is None:
+        raise RuntimeError("設定が読み込まれていないため、ストレージを初期化できません")
+    
+    try:
+        with timed_phase("スプレッドシート接続"):
+            handler = GoogleSheetsHandler(
+                credentials_path=config['GOOGLE_CREDENTIALS_PATH'],
+                spreadsheet_id=config['SPREADSHEET_ID'],
+                cache_ttl=float(config.get('CACHE_TTL', 30)),
+                id_block_size=int(config.get('ID_BLOCK_SIZE', 20)),
+                write_behind_dir=config.get('WRITE_BEHIND_DIR') or None,
+                flush_interval=float(config.get('FLUSH_INTERVAL', 2)),
+                quota_client=QuotaAwareClient(
+                    requests_per_minute=float(config.get('SHEETS_REQUESTS_PER_MINUTE', 60)),
+                    max_retries=int(config.get('SHEETS_MAX_RETRIES', 5))
+                ),
+                resync_interval=float(config.get('SHEETS_RESYNC_INTERVAL', 300))
+            )
+        print("✓ Googleスプレッドシートへの接続に成功しました")
+        
+        if config.get('STORAGE_BACKEND', 'sheets') == 'sqlite':
+            with timed_phase("SQLiteストレージ準備"):
+                sqlite_storage = SQLiteTodoStorage(config.get('SQLITE_PATH', 'todos.db'))
+                if sqlite_storage.is_empty():
+                    # 初回起動時はスプレッドシートの内容を取り込む
+                    sqlite_storage.import_records(handler.get_all_records())
+                SheetsReplicator(
+                    sqlite_storage,
+                    handler,
+                    interval=float(config.get('REPLICATION_INTERVAL', 5))
+                ).start()
+            print("✓ SQLiteストレージを使用します（スプレッドシートへ非同期に複製）")
+            storage = sqlite_storage
+        else:
+            storage = handler
+        sheets_handler = handler
+    except Exception as e:
+        import traceback
+        print(f"初期化エラー: {str(e)}")
+        print("詳細:")
+        traceback.print_exc()
+        raise
+
+
+# リクエストが初期化の完了を待つ最大時間（秒）
+WARMUP_TIMEOUT = float((config or {}).get('WARMUP_TIMEOUT', 60))
+
+# インポート時に初期化を開始し、最初のデータ取得リクエストはその完了だけを待つ
+warmup = Warmup(init_storage, name="ストレージ初期化")
+
+# 描画済みの一覧ページ（データのバージョンが変わるまで再描画しない）
+render_cache = RenderCache(max_entries=int((config or {}).get('RENDER_CACHE_SIZE', 256)))
+
+
+@app.before_request
+def start_metrics():
+    """リクエストの処理時間とSheets API呼び出しの集計を開始"""
+    request.environ['todolist.started_at'] = time.perf_counter()
+    start_request()
+
+
+@app.after_request
+def record_metrics(response):
+    """リクエストの処理時間とSheets API呼び出しの集計をメトリクスに記録"""
+    started_at = request.environ.get('todolist.started_at')
+    if started_at is not None:
+        # IDごとにラベルが増えないよう、URLではなくルールのパスで集計する
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        finish_request(route, request.method, response.status_code, time.perf_counter() - started_at)
+    return response
+
+
+@app.before_request
+def wait_for_warmup():
+    """データを扱うリクエストはストレージの初期化完了を待つ（ヘルスチェック・静的ファイルは待たない）"""
+    if request.endpoint in ('healthz', 'metrics', 'static'):
+        return
+    warmup.wait(timeout=WARMUP_TIMEOUT)
+
+
+@app.route('/healthz')
+def healthz():
+    """ヘルスチェック（初期化中でもすぐに応答する）"""
+    status = warmup.status
+    return jsonify({'status': status}), 503 if status == 'error' else 200
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus形式のメトリクス（PROMETHEUS_MULTIPROC_DIRを指定した場合は全ワーカーの合計）"""
+    body, content_type = render_latest()
+    return body, 200, {'Content-Type': content_type}
 
 
 # LINE通知スケジューラー初期化
+def parse_int_list(value, default):
+    """カンマ区切りの数値の設定をリストに変換（config.jsonではリストでも可）"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, list):
+        return [int(v) for v in value]
+    return [int(v) for v in str(value).split(',') if v.strip()]
+
+
 def check_and_send_notifications():
+    """期日が近づいたTodoをチェックしてLINE通知を送信（実行時間をメトリクスに記録）"""
+    with timed(SCHEDULER_JOB_SECONDS, job='daily_todo_notification'):
+        _check_and_send_notifications()
+
+
+def _check_and_send_notifications():
     """期日が近づいたTodoをチェックしてLINE通知を送信"""
-    if not sheets_handler or not config:
+    warmup.wait(timeout=WARMUP_TIMEOUT)
+    if not storage or not config:
         return
     
     channel_access_token = config.get('LINE_CHANNEL_ACCESS_TOKEN', '')
@@ -106,16 +255,18 @@ def check_and_send_notifications():
         return
     
     try:
-        # Todoを取得
-        expected_headers = ["ID", "タイトル", "内容", "期日", "重要度", "ステータス", "作成日時", "更新日時", "完了日時"]
-        todos = sheets_handler.worksheet.get_all_records(expected_headers=expected_headers)
+        # Todoを取得（画面表示のAPI呼び出しを優先させるためバックグラウンド扱い）
+        with background_priority():
+            todos = storage.get_projected_records(LIST_COLUMNS)
         
-        # 通知を送信（3日前、1日前、当日）
+        # 通知を送信（デフォルトは3日前、1日前、当日）
         results = send_todo_notifications(
             todos=todos,
             channel_access_token=channel_access_token,
             user_id=user_id,
-            days_before_list=[3, 1, 0]
+            days_before_list=parse_int_list(config.get('NOTIFY_DAYS_BEFORE'), [3, 1, 0]),
+            hours_before_list=parse_int_list(config.get('NOTIFY_HOURS_BEFORE'), []),
+            max_workers=int(config.get('LINE_MAX_WORKERS', DEFAULT_MAX_WORKERS))
         )
         
         # 結果をログに出力
@@ -126,9 +277,40 @@ def check_and_send_notifications():
                 print(f"✗ {timing}の通知送信に失敗しました")
     except Exception as e:
         print(f"通知チェックエラー: {str(e)}")
+        # ジョブの失敗としてメトリクスに記録する
+        raise
+
 
+def archive_completed_todos():
+    """完了から一定日数が過ぎたTodoをアーカイブへ移動（実行時間をメトリクスに記録）"""
+    with timed(SCHEDULER_JOB_SECONDS, job='archive_completed'):
+        _archive_completed_todos()
 
-# スケジューラーを設定（毎日午前9時に実行）
+
+def _archive_completed_todos():
+    """完了から一定日数が過ぎたTodoをアーカイブへ移動（一覧のシートをアクティブなTodoの件数に保つ）"""
+    warmup.wait(timeout=WARMUP_TIMEOUT)
+    if not storage or not config:
+        return
+    
+    older_than_days = int(config.get('ARCHIVE_AFTER_DAYS', 30))
+    if older_than_days <= 0:
+        return
+    
+    try:
+        count = storage.archive_completed(
+            older_than_days,
+            batch_size=int(config.get('ARCHIVE_BATCH_SIZE', ARCHIVE_BATCH_SIZE))
+        )
+        if count:
+            print(f"✓ 完了から{older_than_days}日が過ぎたTodoを{count}件アーカイブしました")
+    except Exception as e:
+        print(f"✗ アーカイブへの移動に失敗しました: {str(e)}")
+        # ジョブの失敗としてメトリクスに記録する（次回の実行で続きから移動する）
+        raise
+
+
+# スケジューラーを設定（LINE通知は毎日午前9時、アーカイブは毎日午前3時に実行）
 scheduler = BackgroundScheduler()
 scheduler.add_job(
     func=check_and_send_notifications,
@@ -137,69 +319,300 @@ scheduler.add_job(
     name='Daily Todo Notification',
     replace_existing=True
 )
+scheduler.add_job(
+    func=archive_completed_todos,
+    trigger=CronTrigger(hour=3, minute=0),  # 毎日午前3時（利用の少ない時間帯）
+    id='archive_completed',
+    name='Archive Completed Todos',
+    replace_existing=True
+)
 
 # gunicornで起動する場合もスケジューラーを開始
 # Renderではgunicorn経由で起動するため、ここでスケジューラーを開始
-if not scheduler.running:
-    try:
-        scheduler.start()
-        print("✓ LINE通知スケジューラーを開始しました（毎日午前9時に実行）")
-    except Exception as e:
-        print(f"⚠ スケジューラーの開始に失敗しました: {str(e)}")
-        print("   LINE通知機能は無効になります")
+# ワーカーごとに通知が重複しないよう、ロックを取得したリーダーのプロセスだけで動かす
+leader_scheduler = LeaderScheduler(
+    scheduler,
+    FileLockLeaderElector(
+        (config or {}).get('SCHEDULER_LOCK_PATH')
+        or os.path.join(tempfile.gettempdir(), 'todolist-scheduler.lock')
+    ),
+    retry_interval=float((config or {}).get('SCHEDULER_ELECTION_INTERVAL', 30))
+)
+try:
+    if leader_scheduler.start():
+        print("✓ スケジューラーを開始しました（LINE通知: 毎日午前9時、アーカイブ: 毎日午前3時に実行）")
+    else:
+        print("✓ 別のプロセスがスケジューラーを実行中のため待機します")
+except Exception as e:
+    print(f"⚠ スケジューラーの開始に失敗しました: {str(e)}")
+    print("   LINE通知・アーカイブへの移動は無効になります")
+
+
+def parse_list_args():
+    """
+    一覧の並び替え・絞り込み・ページ送りのパラメータを取得（HTML・JSON APIで共通）
+    
+    Returns:
+        load_list_pageに渡すキーワード引数の辞書（期日が不正な場合はValueError）
+    """
+    args = {
+        'sort_by': request.args.get('sort', 'default'),
+        'filter_status': request.args.get('status', 'all'),
+        'page': max(request.args.get('page', 1, type=int), 1),
+        'per_page': min(max(request.args.get('per_page', DEFAULT_PER_PAGE, type=int), 1), MAX_PER_PAGE),
+        # 期日の範囲（YYYY-MM-DD形式、両端を含む）
+        'due_from': request.args.get('due_from', '').strip(),
+        'due_to': request.args.get('due_to', '').strip(),
+        # タイトル・内容の検索語
+        'q': request.args.get('q', '').strip(),
+    }
+    for key in ('due_from', 'due_to'):
+        if args[key] and not parse_due_ordinal(args[key]):
+            raise ValueError(f'期日の指定が不正です（YYYY-MM-DD形式）: {args[key]}')
+    return args
+
+
+def load_list_page(sort_by, filter_status, page, per_page, due_from='', due_to='', q='', columns=None):
+    """
+    一覧の1ページ分のTodoを取得
+    
+    検索語が指定された場合は全文検索インデックスで検索し、期日の範囲が指定された場合は
+    期日のインデックスで絞り込んでから並び替える（デフォルトの並び順は検索時は関連度順、
+    それ以外は期日順になる）。
+    
+    Returns:
+        (Todoのリスト, 次のページがあるか, 該当件数（不明な場合はNone）) のタプル
+    """
+    if q:
+        todos = storage.search(q, filter_status)
+        if due_from or due_to:
+            todos = list(filter(due_range_filter(due_from, due_to), todos))
+        todos = filter_and_sort_records(todos, sort_by, 'all')
+    elif due_from or due_to:
+        todos = filter_and_sort_records(
+            storage.get_due_range(due_from, due_to, filter_status), sort_by, 'all'
+        )
+    else:
+        return storage.get_page(sort_by, filter_status, page, per_page, columns=columns)
+    offset = (page - 1) * per_page
+    return todos[offset:offset + per_page], offset + per_page < len(todos), len(todos)
 
 
 @app.route('/')
 def index():
     """Todo一覧表示"""
-    # sheets_handlerがNoneの場合でもテンプレートを返す（エラーメッセージを表示）
-    if not sheets_handler:
+    # storageがNoneの場合でもテンプレートを返す（エラーメッセージを表示）
+    if not storage:
         flash('Googleスプレッドシートの接続に失敗しました。設定を確認してください。', 'error')
-        return render_template('index.html', todos=[], sort_by='default', filter_status='all'), 200
+        return render_template('index.html', todos=[], sort_by='default', filter_status='all', page=1,
+                               per_page=DEFAULT_PER_PAGE, has_next=False, total=0, due_from='', due_to='', q=''), 200
     
     try:
-        # 並び替えパラメータを取得
-        sort_by = request.args.get('sort', 'default')
-        filter_status = request.args.get('status', 'all')
+        # 並び替え・絞り込み・ページ送りパラメータを取得
+        try:
+            args = parse_list_args()
+        except ValueError as e:
+            flash(str(e), 'error')
+            return redirect(url_for('index'))
         
-        # get_all_records()でTodo取得（expected_headersでヘッダーを明示的に指定）
-        expected_headers = ["ID", "タイトル", "内容", "期日", "重要度", "ステータス", "作成日時", "更新日時", "完了日時"]
-        todos = sheets_handler.worksheet.get_all_records(expected_headers=expected_headers)
+        # データが変わっていなければ描画済みのページを返す
+        # フラッシュメッセージが残っている場合は表示する必要があるため、キャッシュを使わずに描画する
+        version = storage.data_version(LIST_COLUMNS)
+        cache_key = tuple(sorted(args.items()))
+        use_cache = '_flashes' not in session
+        if use_cache:
+            html = render_cache.get(version, cache_key)
+            if html is not None:
+                return html
         
-        # デフォルト値の設定（既存データの互換性のため）
-        for todo in todos:
-            if '重要度' not in todo or not todo['重要度']:
-                todo['重要度'] = '中'
-            if 'ステータス' not in todo or not todo['ステータス']:
-                todo['ステータス'] = '未完了'
+        # ストレージから該当ページのTodoを一覧表示に使うカラムだけ取得（絞り込み・並び替え・デフォルト値の補完済み）
+        todos, has_next, total = load_list_page(**args, columns=LIST_COLUMNS)
         
-        # ステータスフィルター
-        if filter_status != 'all':
-            todos = [t for t in todos if t.get('ステータス', '未完了') == filter_status]
+        html = render_template('index.html', todos=todos, has_next=has_next, total=total, **args)
+        if use_cache:
+            render_cache.put(version, cache_key, html)
+        return html
+    except Exception as e:
+        flash(f'データの取得に失敗しました: {str(e)}', 'error')
+        return render_template('index.html', todos=[], page=1, per_page=DEFAULT_PER_PAGE, has_next=False, total=0,
+                               due_from='', due_to='', q='')
+
+
+def not_modified(version):
+    """
+    If-None-MatchのETagがデータのバージョンと一致する場合は304のレスポンスを返す
+    
+    Returns:
+        304のレスポンス（一致しない場合・バージョンがない場合はNone）
+    """
+    if version is None or not request.if_none_match.contains(version):
+        return None
+    return with_etag(app.response_class(status=304), version)
+
+
+def with_etag(response, version):
+    """レスポンスにデータのバージョンから求めた強いETagを付ける（クライアントには毎回再検証させる）"""
+    if version is not None:
+        response.set_etag(version)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/api/todos')
+def api_list_todos():
+    """
+    Todo一覧（JSON API）
+    
+    クエリパラメータは一覧画面と同じ（sort, status, page, per_page, due_from, due_to）。
+    データが変わっていなければ、If-None-Matchに対してシートの読み込みやJSONの組み立てをせずに304を返す。
+    """
+    if not storage:
+        return jsonify({'error': 'ストレージに接続できません'}), 503
+    
+    try:
+        args = parse_list_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        version = storage.data_version()
+        response = not_modified(version)
+        if response is not None:
+            return response
         
-        # 並び替え
-        if sort_by == 'priority':
-            # 重要度順（高→中→低）
-            priority_order = {'高': 1, '中': 2, '低': 3}
-            todos.sort(key=lambda x: priority_order.get(x.get('重要度', '中'), 2))
-        elif sort_by == 'due_date':
-            # 期日順（近い順）
-            todos.sort(key=lambda x: x.get('期日', '9999-12-31'))
-        elif sort_by == 'priority_due':
-            # 重要度→期日（重要度優先、同重要度は期日順）
-            priority_order = {'高': 1, '中': 2, '低': 3}
-            todos.sort(key=lambda x: (priority_order.get(x.get('重要度', '中'), 2), x.get('期日', '9999-12-31')))
+        todos, has_next, total = load_list_page(**args)
+        return with_etag(jsonify({
+            'todos': [todo.to_dict() for todo in todos],
+            'page': args['page'],
+            'per_page': args['per_page'],
+            'has_next': has_next,
+            'total': total,
+        }), version)
+    except Exception as e:
+        return jsonify({'error': f'データの取得に失敗しました: {str(e)}'}), 500
+
+
+@app.route('/api/todos/<int:todo_id>')
+def api_get_todo(todo_id):
+    """Todo詳細（JSON API、一覧と同じくETagによる条件付き応答に対応）"""
+    if not storage:
+        return jsonify({'error': 'ストレージに接続できません'}), 503
+    
+    try:
+        version = storage.data_version()
+        response = not_modified(version)
+        if response is not None:
+            return response
         
-        return render_template('index.html', todos=todos, sort_by=sort_by, filter_status=filter_status)
+        todo = storage.get_record(todo_id)
+        if not todo:
+            return jsonify({'error': 'Todoが見つかりません'}), 404
+        return with_etag(jsonify(todo.to_dict()), version)
     except Exception as e:
-        flash(f'データの取得に失敗しました: {str(e)}', 'error')
-        return render_template('index.html', todos=[])
+        return jsonify({'error': f'データの取得に失敗しました: {str(e)}'}), 500
+
+
+@app.route('/archived')
+def archived_todos():
+    """アーカイブ済みTodoの一覧表示（完了日時の新しい順）"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', DEFAULT_PER_PAGE, type=int), 1), MAX_PER_PAGE)
+    if not storage:
+        flash('Googleスプレッドシートの接続に失敗しました。設定を確認してください。', 'error')
+        return render_template('archived.html', todos=[], page=1, per_page=per_page, has_next=False, total=0)
+    
+    try:
+        todos, has_next, total = storage.get_archived_page(page, per_page)
+    except Exception as e:
+        flash(f'アーカイブの取得に失敗しました: {str(e)}', 'error')
+        todos, has_next, total = [], False, 0
+    return render_template('archived.html', todos=todos, page=page, per_page=per_page, has_next=has_next, total=total)
+
+
+@app.route('/export')
+def export_todos():
+    """
+    すべてのTodoをCSV・JSON Lines形式でダウンロード（アーカイブ済みのTodoは含まない）
+    
+    ストレージから少しずつ読み込みながら書き出すため、件数が多くてもメモリ上に全件を持たない。
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return jsonify({'error': f'形式が不正です（csv/jsonl）: {fmt}'}), 400
+    if not storage:
+        return jsonify({'error': 'Googleスプレッドシートの接続に失敗しました'}), 503
+    
+    filename = f"todos-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    return Response(
+        stream_with_context(export_chunks(storage.iter_records(), fmt)),
+        content_type=FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
+@app.route('/import', methods=['GET', 'POST'])
+def import_upload():
+    """CSV・JSON LinesファイルからTodoを一括登録"""
+    if not storage:
+        flash('Googleスプレッドシートの接続に失敗しました。設定を確認してください。', 'error')
+        return redirect(url_for('index'))
+    
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('ファイルを選択してください', 'error')
+            return render_template('import.html')
+        fmt = request.form.get('format') or guess_format(upload.filename)
+        if fmt not in FORMATS:
+            flash(f'形式が不正です（csv/jsonl）: {fmt}', 'error')
+            return render_template('import.html')
+        
+        try:
+            result = import_todos(storage, text_stream(upload.stream), fmt)
+        except UnicodeDecodeError:
+            flash('ファイルを読み込めません。UTF-8で保存してください', 'error')
+            return render_template('import.html')
+        except Exception as e:
+            flash(f'一括登録に失敗しました: {str(e)}', 'error')
+            return render_template('import.html')
+        
+        flash(f"{result['imported']}件のTodoを登録しました", 'success')
+        if result['skipped']:
+            first = result['errors'][0]
+            flash(f"{result['skipped']}件は登録できませんでした（{first['line']}行目: {first['error']} など）", 'error')
+        return redirect(url_for('index'))
+    
+    return render_template('import.html')
+
+
+@app.route('/api/todos/import', methods=['POST'])
+def api_import_todos():
+    """
+    リクエスト本文のCSV・JSON LinesからTodoを一括登録（JSON API）
+    
+    形式はクエリパラメータformat（csv/jsonl、デフォルト: Content-Typeがx-ndjsonならjsonl、それ以外はcsv）で指定する。
+    本文は1行ずつ読み込み、まとめて登録する。
+    """
+    default_format = 'jsonl' if 'ndjson' in (request.content_type or '') else 'csv'
+    fmt = request.args.get('format', default_format)
+    if fmt not in FORMATS:
+        return jsonify({'error': f'形式が不正です（csv/jsonl）: {fmt}'}), 400
+    if not storage:
+        return jsonify({'error': 'Googleスプレッドシートの接続に失敗しました'}), 503
+    
+    try:
+        result = import_todos(storage, text_stream(request.stream), fmt)
+    except UnicodeDecodeError:
+        return jsonify({'error': '本文を読み込めません。UTF-8で送信してください'}), 400
+    except Exception as e:
+        return jsonify({'error': f'一括登録に失敗しました: {str(e)}'}), 500
+    return jsonify(result)
 
 
 @app.route('/add', methods=['GET', 'POST'])
 def add_todo():
     """Todo登録"""
-    if not sheets_handler:
+    if not storage:
         flash('Googleスプレッドシートの接続に失敗しました。設定を確認してください。', 'error')
         return redirect(url_for('index'))
     
@@ -218,7 +631,7 @@ def add_todo():
             priority = '中'
         
         try:
-            todo_id = sheets_handler.create_todo(title, content, due_date, priority)
+            todo_id = storage.create_todo(title, content, due_date, priority)
             flash('Todoを登録しました', 'success')
             return redirect(url_for('index'))
         except Exception as e:
@@ -231,19 +644,10 @@ def add_todo():
 @app.route('/edit/<int:todo_id>', methods=['GET', 'POST'])
 def edit_todo(todo_id):
     """Todo編集"""
-    if not sheets_handler:
+    if not storage:
         flash('Googleスプレッドシートの接続に失敗しました。設定を確認してください。', 'error')
         return redirect(url_for('index'))
     
-    # idを使って行番号を特定
-    def find_row_by_id(todo_id):
-        """IDから行番号を取得"""
-        all_values = sheets_handler.worksheet.get_all_values()
-        for idx, row in enumerate(all_values[1:], start=2):  # ヘッダーを除く、行番号は2から
-            if row and row[0] and str(row[0]) == str(todo_id):
-                return idx
-        return None
-    
     if request.method == 'POST':
         title = request.form.get('title', '').strip()
         content = request.form.get('content', '').strip()
@@ -252,9 +656,7 @@ def edit_todo(todo_id):
         if not title or not content or not due_date:
             flash('すべての項目を入力してください', 'error')
             # 既存Todoを取得してフォームに表示
-            expected_headers = ["ID", "タイトル", "内容", "期日", "重要度", "ステータス", "作成日時", "更新日時", "完了日時"]
-            todos = sheets_handler.worksheet.get_all_records(expected_headers=expected_headers)
-            todo = next((t for t in todos if str(t.get('ID', '')) == str(todo_id)), None)
+            todo = storage.get_record(todo_id)
             if not todo:
                 return redirect(url_for('index'))
             return render_template('edit.html', todo=todo)
@@ -269,7 +671,7 @@ def edit_todo(todo_id):
         
         try:
             # update_todo()で編集内容を反映
-            success = sheets_handler.update_todo(
+            success = storage.update_todo(
                 todo_id=todo_id,
                 title=title,
                 content=content,
@@ -286,28 +688,18 @@ def edit_todo(todo_id):
         except Exception as e:
             flash(f'更新に失敗しました: {str(e)}', 'error')
             # 既存Todoを取得してフォームに表示
-            expected_headers = ["ID", "タイトル", "内容", "期日", "重要度", "ステータス", "作成日時", "更新日時", "完了日時"]
-            todos = sheets_handler.worksheet.get_all_records(expected_headers=expected_headers)
-            todo = next((t for t in todos if str(t.get('ID', '')) == str(todo_id)), None)
+            todo = storage.get_record(todo_id)
             if not todo:
                 return redirect(url_for('index'))
             return render_template('edit.html', todo=todo)
     
     # GET：既存Todoをフォームに表示
     try:
-        expected_headers = ["ID", "タイトル", "内容", "期日", "重要度", "ステータス", "作成日時", "更新日時", "完了日時"]
-        todos = sheets_handler.worksheet.get_all_records(expected_headers=expected_headers)
-        todo = next((t for t in todos if str(t.get('ID', '')) == str(todo_id)), None)
+        todo = storage.get_record(todo_id)
         if not todo:
             flash('Todoが見つかりません', 'error')
             return redirect(url_for('index'))
         
-        # デフォルト値の設定
-        if '重要度' not in todo or not todo['重要度']:
-            todo['重要度'] = '中'
-        if 'ステータス' not in todo or not todo['ステータス']:
-            todo['ステータス'] = '未完了'
-        
         return render_template('edit.html', todo=todo)
     except Exception as e:
         flash(f'データの取得に失敗しました: {str(e)}', 'error')
@@ -317,12 +709,12 @@ def edit_todo(todo_id):
 @app.route('/delete/<int:todo_id>', methods=['POST'])
 def delete_todo(todo_id):
     """Todo削除"""
-    if not sheets_handler:
+    if not storage:
         flash('Googleスプレッドシートの接続に失敗しました。設定を確認してください。', 'error')
         return redirect(url_for('index'))
     
     try:
-        success = sheets_handler.delete_todo(todo_id)
+        success = storage.delete_todo(todo_id)
         if success:
             flash('Todoを削除しました', 'success')
         else:
@@ -336,25 +728,22 @@ def delete_todo(todo_id):
 @app.route('/complete/<int:todo_id>', methods=['POST'])
 def complete_todo(todo_id):
     """Todo完了/未完了切り替え"""
-    if not sheets_handler:
+    if not storage:
         flash('Googleスプレッドシートの接続に失敗しました。設定を確認してください。', 'error')
         return redirect(url_for('index'))
     
     try:
         # 現在のステータスを取得
-        expected_headers = ["ID", "タイトル", "内容", "期日", "重要度", "ステータス", "作成日時", "更新日時", "完了日時"]
-        todos = sheets_handler.worksheet.get_all_records(expected_headers=expected_headers)
-        todo = next((t for t in todos if str(t.get('ID', '')) == str(todo_id)), None)
+        todo = storage.get_record(todo_id)
         
         if not todo:
             flash('Todoが見つかりません', 'error')
             return redirect(url_for('index'))
         
         # 現在のステータスを反転
-        current_status = todo.get('ステータス', '未完了')
-        completed = (current_status != '完了')
+        completed = not todo.is_completed
         
-        success = sheets_handler.complete_todo(todo_id, completed)
+        success = storage.complete_todo(todo_id, completed)
         if success:
             if completed:
                 flash('Todoを完了しました', 'success')
@@ -368,15 +757,79 @@ def complete_todo(todo_id):
     return redirect(url_for('index'))
 
 
-if __name__ == '__main__':
-    # スケジューラーを開始
+# 一括操作の完了メッセージ
+BULK_MESSAGES = {
+    'complete': '{count}件のTodoを完了しました',
+    'reopen': '{count}件のTodoを未完了に戻しました',
+    'priority': '{count}件のTodoの重要度を変更しました',
+    'delete': '{count}件のTodoを削除しました',
+}
+
+
+@app.route('/bulk', methods=['POST'])
+def bulk_todos():
+    """選択したTodoの一括操作（完了/未完了に戻す/重要度変更/削除）"""
+    # 操作後は元の並び替え・絞り込み・ページの一覧に戻る
+    back = url_for('index', sort=request.form.get('sort', 'default'), status=request.form.get('status', 'all'),
+                   page=max(request.form.get('page', 1, type=int), 1),
+                   per_page=request.form.get('per_page', DEFAULT_PER_PAGE, type=int),
+                   due_from=request.form.get('due_from') or None, due_to=request.form.get('due_to') or None,
+                   q=request.form.get('q') or None)
+    if not storage:
+        flash('Googleスプレッドシートの接続に失敗しました。設定を確認してください。', 'error')
+        return redirect(back)
+    
+    todo_ids = request.form.getlist('ids', type=int)
+    action = request.form.get('action', '')
+    priority = request.form.get('priority') or None
+    if not todo_ids:
+        flash('Todoを選択してください', 'error')
+        return redirect(back)
+    if action not in BULK_ACTIONS:
+        flash('操作を選択してください', 'error')
+        return redirect(back)
+    
     try:
-        scheduler.start()
-        print("✓ LINE通知スケジューラーを開始しました（毎日午前9時に実行）")
+        result = storage.bulk_update(todo_ids, action, priority)
+        if result['updated']:
+            flash(BULK_MESSAGES[action].format(count=len(result['updated'])), 'success')
+        if result['not_found']:
+            flash(f"{len(result['not_found'])}件のTodoが見つかりませんでした", 'error')
+    except ValueError as e:
+        flash(str(e), 'error')
     except Exception as e:
-        print(f"⚠ スケジューラーの開始に失敗しました: {str(e)}")
-        print("   LINE通知機能は無効になります")
+        flash(f'一括操作に失敗しました: {str(e)}', 'error')
+    
+    return redirect(back)
+
+
+@app.route('/api/todos/bulk', methods=['POST'])
+def api_bulk_todos():
+    """
+    Todoの一括操作（JSON API）
+    
+    リクエスト: {"ids": [1, 2, 3], "action": "complete|reopen|priority|delete", "priority": "高"}
+    レスポンス: {"updated": [...], "not_found": [...]}
+    """
+    if not storage:
+        return jsonify({'error': 'ストレージに接続できません'}), 503
     
+    payload = request.get_json(silent=True) or {}
+    todo_ids = payload.get('ids')
+    if not isinstance(todo_ids, list) or not all(isinstance(todo_id, int) for todo_id in todo_ids):
+        return jsonify({'error': 'idsには整数のリストを指定してください'}), 400
+    
+    try:
+        result = storage.bulk_update(todo_ids, payload.get('action', ''), payload.get('priority'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'一括操作に失敗しました: {str(e)}'}), 500
+    return jsonify(result)
+
+
+if __name__ == '__main__':
+    # スケジューラーはインポート時にリーダー選出とあわせて開始済み
     port = int(os.environ.get('PORT', 5001))
     app.run(debug=True, host='0.0.0.0', port=port)
 
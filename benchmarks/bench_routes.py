@@ -0,0 +1,191 @@
+"""
+画面・通知ジョブのベンチマーク
+
+メモリ上のフェイクのスプレッドシート（benchmarks/fakes.py）に100/1,000/10,000行のTodoを用意し、
+一覧・登録・編集・完了・削除・一括操作・LINE通知チェック・エクスポート・一括登録・
+アーカイブへの移動を実行して、
+操作ごとのAPI呼び出し回数と所要時間を出力します。Googleへの接続は行いません。
+
+実行方法（リポジトリのルートで）:
+    python benchmarks/bench_routes.py
+    python benchmarks/bench_routes.py --rows 100,1000 --latency 0.1 --json results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import google_sheets_handler  # noqa: E402
+import line_notifier  # noqa: E402
+from benchmarks.fakes import CallRecorder, FakeLineBotApi, FakeSpreadsheet, make_rows  # noqa: E402
+
+
+def load_app(token: str, user_id: str):
+    """
+    Googleに接続しない設定でアプリを読み込む
+
+    起動時の接続先は空のフェイクに差し替え、スケジューラーのロックは一時ディレクトリに作る
+    （同じサーバーで動いているアプリのリーダー選出に影響しないようにする）。
+    """
+    os.environ.update({
+        'SPREADSHEET_ID': 'benchmark',
+        'GOOGLE_CREDENTIALS_JSON': '{}',
+        'LINE_CHANNEL_ACCESS_TOKEN': token,
+        'LINE_USER_ID': user_id,
+        'SCHEDULER_LOCK_PATH': os.path.join(tempfile.mkdtemp(), 'scheduler.lock'),
+    })
+    google_sheets_handler.connect_sheet = lambda *args, **kwargs: (None, FakeSpreadsheet(make_rows(0)).sheet1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+        app.warmup.wait()
+    return app
+
+
+def install_handler(app, spreadsheet: FakeSpreadsheet, cache_ttl: float):
+    """フェイクのワークシートを渡したハンドラーをアプリのストレージにする"""
+    handler = google_sheets_handler.GoogleSheetsHandler(
+        credentials_path='',
+        spreadsheet_id='',
+        cache_ttl=cache_ttl,
+        # クォータ制御による待ちは計測に含めない
+        quota_client=google_sheets_handler.QuotaAwareClient(requests_per_minute=1e9, burst=1e9, background_reserve=0),
+        worksheet=spreadsheet.sheet1
+    )
+    app.sheets_handler = app.storage = handler
+    app.render_cache.clear()
+    return handler
+
+
+# 一括登録で読み込むCSVの件数
+IMPORT_ROWS = 1000
+
+
+def import_csv(count: int) -> bytes:
+    """一括登録用のCSV（ヘッダー付き）"""
+    lines = ["タイトル,内容,期日,重要度"]
+    lines += [f"インポート {i},一括登録のTodo {i},2026-12-31,{'高中低'[i % 3]}" for i in range(1, count + 1)]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def download(client, path: str):
+    """ストリーミングのレスポンスを最後まで受け取る"""
+    response = client.get(path)
+    response.get_data()
+    return response
+
+
+def scenario(app, client, row_count: int) -> List[tuple]:
+    """計測する操作（名前, 実行する関数）のリスト"""
+    todo_id = max(row_count // 2, 1)
+    csv_body = import_csv(IMPORT_ROWS)
+    bulk_ids = list(range(1, min(row_count, 50) + 1))
+    form = {'title': '更新後のタイトル', 'content': '更新後の内容', 'due_date': '2026-12-31',
+            'priority': '高', 'status': '未完了'}
+    return [
+        ('index（初回）', lambda: client.get('/')),
+        # 初回の表示後にバックグラウンドで始まるスナップショットの読み込み
+        ('スナップショット読み込み', lambda: app.sheets_handler.wait_for_background_load()),
+        ('index（再表示）', lambda: client.get('/')),
+        ('index（重要度順）', lambda: client.get('/?sort=priority&status=未完了')),
+        ('index（2ページ目）', lambda: client.get('/?page=2')),
+        ('api_list_todos', lambda: client.get('/api/todos?sort=due_date')),
+        ('add_todo', lambda: client.post('/add', data={'title': '新規', 'content': '内容', 'due_date': '2026-12-31'})),
+        ('edit_todo（表示）', lambda: client.get(f'/edit/{todo_id}')),
+        ('edit_todo（更新）', lambda: client.post(f'/edit/{todo_id}', data=form)),
+        ('complete_todo', lambda: client.post(f'/complete/{todo_id}')),
+        ('delete_todo', lambda: client.post(f'/delete/{todo_id}')),
+        ('bulk（50件完了）', lambda: client.post('/api/todos/bulk', json={'ids': bulk_ids, 'action': 'complete'})),
+        ('check_and_send_notifications', app.check_and_send_notifications),
+        ('export（CSV）', lambda: download(client, '/export?format=csv')),
+        ('export（JSON Lines）', lambda: download(client, '/export?format=jsonl')),
+        (f'import（{IMPORT_ROWS:,}件CSV）', lambda: client.post('/api/todos/import?format=csv', data=csv_body,
+                                                        content_type='text/csv')),
+        ('archive_completed_todos', app.archive_completed_todos),
+        ('index（アーカイブ後）', lambda: client.get('/')),
+        ('archived', lambda: client.get('/archived')),
+    ]
+
+
+def run(row_counts: List[int], latency: float, row_latency: float, cache_ttl: float, verbose: bool) -> List[Dict]:
+    """
+    ベンチマークを実行
+
+    Returns:
+        操作ごとの結果（行数, 操作, API呼び出し回数の内訳, 所要時間）のリスト
+    """
+    token, user_id = 'benchmark-token', 'Ubenchmark'
+    app = load_app(token, user_id)
+    client = app.app.test_client()
+    results = []
+    for row_count in row_counts:
+        recorder = CallRecorder(latency=latency, row_latency=row_latency)
+        spreadsheet = FakeSpreadsheet(make_rows(row_count), recorder)
+        # LINE通知は送信せずに回数だけ数える
+        line_notifier._line_bot_apis[token] = FakeLineBotApi(recorder)
+        install_handler(app, spreadsheet, cache_ttl)
+        recorder.reset()
+
+        for name, operation in scenario(app, client, row_count):
+            output = io.StringIO()
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(output):
+                response = operation()
+            elapsed = time.perf_counter() - started
+            calls = recorder.reset()
+            if verbose and output.getvalue():
+                print(output.getvalue(), end='')
+            if response is not None and response.status_code >= 400:
+                print(f"⚠ {name}: HTTP {response.status_code}")
+            results.append({
+                'rows': row_count,
+                'operation': name,
+                'api_calls': sum(calls.values()),
+                'calls': dict(sorted(calls.items())),
+                'seconds': round(elapsed, 4),
+            })
+    return results
+
+
+def print_results(results: List[Dict]):
+    """結果を表形式で出力"""
+    print(f"{'行数':>6}  {'操作':<28}{'API呼び出し':>10}{'時間(ms)':>10}  内訳")
+    for result in results:
+        breakdown = ', '.join(f"{name}={count}" for name, count in result['calls'].items())
+        print(f"{result['rows']:>8}  {result['operation']:<30}{result['api_calls']:>8}"
+              f"{result['seconds'] * 1000:>12.1f}  {breakdown}")
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='ルートごとのSheets API呼び出し回数と所要時間を計測')
+    parser.add_argument('--rows', default='100,1000,10000', help='シートの行数（カンマ区切り）')
+    parser.add_argument('--latency', type=float, default=0.05, help='API呼び出し1回あたりの遅延（秒）')
+    parser.add_argument('--row-latency', type=float, default=0.00001, help='読み書きした1行あたりの追加の遅延（秒）')
+    parser.add_argument('--cache-ttl', type=float, default=30.0, help='行スナップショットの有効期間（秒）')
+    parser.add_argument('--json', help='結果をJSONで保存するファイルのパス')
+    parser.add_argument('--verbose', action='store_true', help='アプリのログも出力する')
+    args = parser.parse_args(argv)
+
+    results = run(
+        [int(count) for count in args.rows.split(',') if count.strip()],
+        latency=args.latency,
+        row_latency=args.row_latency,
+        cache_ttl=args.cache_ttl,
+        verbose=args.verbose
+    )
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
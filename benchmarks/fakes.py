@@ -0,0 +1,268 @@
+"""
+ベンチマーク用のフェイク（gspread・LINE Messaging API）
+
+Googleスプレッドシートをメモリ上で再現し、API呼び出しごとに遅延を入れて回数を数えます。
+実装しているのはアプリが使うメソッドだけです。
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+import gspread
+
+from storage import HEADERS
+
+
+def _column_number(letters: str) -> int:
+    """列記号（A, B, ...）を列番号（1から）に変換"""
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - 64
+    return number
+
+
+def parse_a1_range(a1: str):
+    """
+    A1形式の範囲を (開始列, 開始行, 終了列, 終了行) に変換（省略された終了行はNone）
+
+    「A2:I51」「A2:A」「A1:C1」「'Sheet1'!A2:I」の形式に対応する。
+    """
+    match = re.match(r"([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?$", a1.split("!")[-1])
+    if not match:
+        raise ValueError(f"範囲を解析できません: {a1}")
+    first_col, first_row, last_col, last_row = match.groups()
+    first_row = int(first_row) if first_row else 1
+    if last_col is None:
+        return _column_number(first_col), first_row, _column_number(first_col), first_row
+    return _column_number(first_col), first_row, _column_number(last_col), int(last_row) if last_row else None
+
+
+class CallRecorder:
+    """API呼び出しの回数を数え、遅延を入れる（スプレッドシート内のワークシートで共有）"""
+
+    def __init__(self, latency: float = 0.0, row_latency: float = 0.0):
+        """
+        初期化
+
+        Args:
+            latency: 1回の呼び出しごとの遅延（秒）
+            row_latency: 読み書きした1行あたりの追加の遅延（秒）。シートが大きいほど遅くなる様子を再現する
+        """
+        self.latency = latency
+        self.row_latency = row_latency
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, name: str, rows: int = 0):
+        """呼び出しを記録し、遅延を入れる"""
+        with self._lock:
+            self.calls[name] += 1
+        delay = self.latency + self.row_latency * rows
+        if delay > 0:
+            time.sleep(delay)
+
+    def reset(self) -> Counter:
+        """回数を0に戻し、それまでの回数を返す"""
+        with self._lock:
+            calls, self.calls = self.calls, Counter()
+        return calls
+
+
+class FakeWorksheet:
+    """メモリ上のワークシート"""
+
+    def __init__(self, spreadsheet: "FakeSpreadsheet", title: str, sheet_id: int, rows: List[List[str]]):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+        self.rows = [[str(value) for value in row] for row in rows]
+
+    def _record(self, name: str, rows: int = 0):
+        self.spreadsheet.recorder.record(name, rows)
+
+    def _touch(self):
+        self.spreadsheet.touch()
+
+    def _read(self, a1: str) -> List[List[str]]:
+        first_col, first_row, last_col, last_row = parse_a1_range(a1)
+        values = [row[first_col - 1:last_col] for row in self.rows[first_row - 1:last_row]]
+        # Sheets APIと同じく、末尾の空の行・セルは返さない
+        values = [list(row) for row in values]
+        for row in values:
+            while row and row[-1] == "":
+                row.pop()
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def _write(self, a1: str, values: List[List]):
+        first_col, first_row, _, _ = parse_a1_range(a1)
+        for offset, cells in enumerate(values):
+            index = first_row - 1 + offset
+            while len(self.rows) <= index:
+                self.rows.append([])
+            row = self.rows[index]
+            end = first_col - 1 + len(cells)
+            row.extend([""] * (end - len(row)))
+            row[first_col - 1:end] = [str(value) for value in cells]
+
+    def _appended(self, first: int, last: int):
+        return {"updates": {"updatedRange": f"'{self.title}'!A{first}:I{last}"}}
+
+    def get_all_values(self, *args, **kwargs) -> List[List[str]]:
+        self._record("get_all_values", len(self.rows))
+        # gspreadと同じく、すべての行を最も長い行の長さまで空文字で埋める
+        width = max((len(row) for row in self.rows), default=0)
+        return [list(row) + [""] * (width - len(row)) for row in self.rows]
+
+    def get_all_records(self, *args, **kwargs) -> List[dict]:
+        self._record("get_all_records", len(self.rows))
+        header = self.rows[0] if self.rows else []
+        return [dict(zip(header, row)) for row in self.rows[1:]]
+
+    def get(self, a1: str, *args, **kwargs) -> List[List[str]]:
+        values = self._read(a1)
+        self._record("get", len(values))
+        return values
+
+    def batch_get(self, ranges: List[str], *args, **kwargs) -> List[List[List[str]]]:
+        results = [self._read(a1) for a1 in ranges]
+        self._record("batch_get", max((len(values) for values in results), default=0))
+        return results
+
+    def col_values(self, col: int, *args, **kwargs) -> List[str]:
+        self._record("col_values", len(self.rows))
+        return [row[col - 1] if len(row) >= col else "" for row in self.rows]
+
+    def update(self, a1, values=None, *args, **kwargs):
+        # gspread 6 は update(values, range_name)、旧形式は update(range_name, values)
+        if not isinstance(a1, str):
+            a1, values = values, a1
+        self._record("update", len(values))
+        self._write(a1, values)
+        self._touch()
+        return {}
+
+    def batch_update(self, data: List[dict], *args, **kwargs):
+        self._record("batch_update", sum(len(item["values"]) for item in data))
+        for item in data:
+            self._write(item["range"], item["values"])
+        self._touch()
+        return {}
+
+    def append_row(self, row: List, *args, **kwargs):
+        self._record("append_row", 1)
+        self.rows.append([str(value) for value in row])
+        self._touch()
+        return self._appended(len(self.rows), len(self.rows))
+
+    def append_rows(self, rows: List[List], *args, **kwargs):
+        self._record("append_rows", len(rows))
+        first = len(self.rows) + 1
+        self.rows.extend([str(value) for value in row] for row in rows)
+        self._touch()
+        return self._appended(first, len(self.rows))
+
+    def delete_rows(self, start_index: int, end_index: Optional[int] = None):
+        self._record("delete_rows", 1)
+        del self.rows[start_index - 1:end_index or start_index]
+        self._touch()
+        return {}
+
+
+class FakeSpreadsheet:
+    """メモリ上のスプレッドシート（1枚目はTodoのシート）"""
+
+    def __init__(self, rows: List[List[str]], recorder: Optional[CallRecorder] = None):
+        """
+        初期化
+
+        Args:
+            rows: 1枚目のワークシートの行（1行目はヘッダー）
+            recorder: API呼び出しの記録先（省略時は遅延なし）
+        """
+        self.recorder = recorder or CallRecorder()
+        self._worksheets = {}
+        self.sheet1 = self._add("Todos", rows)
+        self.touch()
+
+    def _add(self, title: str, rows: List[List[str]]) -> FakeWorksheet:
+        worksheet = FakeWorksheet(self, title, len(self._worksheets), rows)
+        self._worksheets[title] = worksheet
+        return worksheet
+
+    def touch(self):
+        """更新日時を現在時刻にする"""
+        self._modified = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self.recorder.record("worksheet")
+        if title not in self._worksheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self._worksheets[title]
+
+    def add_worksheet(self, title: str, rows: int = 0, cols: int = 0, index: Optional[int] = None) -> FakeWorksheet:
+        self.recorder.record("add_worksheet")
+        return self._add(title, [])
+
+    def worksheets(self) -> List[FakeWorksheet]:
+        self.recorder.record("worksheets")
+        return list(self._worksheets.values())
+
+    def batch_update(self, body: dict):
+        self.recorder.record("spreadsheet.batch_update", len(body.get("requests", [])))
+        by_id = {worksheet.id: worksheet for worksheet in self._worksheets.values()}
+        for request in body.get("requests", []):
+            delete = request.get("deleteDimension")
+            if delete and delete["range"]["dimension"] == "ROWS":
+                target = delete["range"]
+                del by_id[target["sheetId"]].rows[target["startIndex"]:target["endIndex"]]
+        self.touch()
+        return {}
+
+    def get_lastUpdateTime(self) -> str:
+        # Drive APIの呼び出し（Sheets APIのクォータとは別）
+        self.recorder.record("drive.get_lastUpdateTime")
+        return self._modified
+
+
+def make_rows(count: int, today: Optional[date] = None) -> List[List[str]]:
+    """
+    ヘッダーとcount件のTodoの行を作成
+
+    期日は今日の5日前から24日後までに分散させ、3件に1件を完了にする。
+    """
+    today = today or date.today()
+    rows = [list(HEADERS)]
+    for i in range(1, count + 1):
+        due = today + timedelta(days=i % 30 - 5)
+        completed = i % 3 == 0
+        rows.append([
+            str(i),
+            f"Todo {i}",
+            f"ベンチマーク用のTodo {i}",
+            due.isoformat(),
+            "高中低"[i % 3],
+            "完了" if completed else "未完了",
+            "2026-01-01 09:00:00",
+            "2026-01-01 09:00:00",
+            "2026-01-02 09:00:00" if completed else ""
+        ])
+    return rows
+
+
+class FakeLineBotApi:
+    """送信せずに呼び出し回数だけを数えるLineBotApi"""
+
+    def __init__(self, recorder: CallRecorder):
+        self.recorder = recorder
+
+    def push_message(self, to, messages, *args, **kwargs):
+        self.recorder.record("line.push_message")
+
+    def multicast(self, to, messages, *args, **kwargs):
+        self.recorder.record("line.multicast")
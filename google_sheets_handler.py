@@ -5,19 +5,57 @@ TodoリストのデータをGoogleスプレッドシートで管理します。
 """
 
 import gspread
+from id_allocator import SheetIdAllocator
+from metrics import SNAPSHOT_LOAD_SECONDS, instrument_session
+from migrations import migrate_sheet
+from sheets_client import QuotaAwareClient, background_priority
+from startup import timed_phase
+from storage import (
+    ARCHIVE_BATCH_SIZE,
+    DEFAULT_PER_PAGE,
+    EXPORT_CHUNK_SIZE,
+    HEADERS,
+    TodoStorage,
+    build_bulk_row,
+    build_completed_row,
+    build_imported_row,
+    build_new_row,
+    build_updated_row,
+    select_archivable,
+    validate_bulk_action,
+)
+from todo import Todo, parse_due_ordinal
+from search_index import BigramSearchIndex
+from todo_index import TodoSortIndex
+from write_behind import WriteBehindQueue, coalesce_ops
 from oauth2client.service_account import ServiceAccountCredentials
-from typing import List, Optional, Dict
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Dict, Set, Tuple
 import os
-from datetime import datetime
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
 
 
-def connect_sheet(credentials_path: str, spreadsheet_id: str):
+# 自分の書き込みとみなす、書き込み完了時刻とスプレッドシートの更新日時のずれの許容範囲（秒）
+OWN_WRITE_TOLERANCE = 1.0
+
+# 完了から一定日数が過ぎたTodoの移動先のワークシート名
+ARCHIVE_SHEET_TITLE = "アーカイブ"
+
+# 全文検索インデックスに必要なカラム名
+SEARCH_COLUMNS = ["タイトル", "内容", "ステータス"]
+
+
+def connect_sheet(credentials_path: str, spreadsheet_id: str, quota_client: Optional[QuotaAwareClient] = None):
     """
     Googleスプレッドシートに接続する
     
     Args:
         credentials_path: サービスアカウントの認証情報JSONファイルのパス
         spreadsheet_id: スプレッドシートID
+        quota_client: API呼び出しのクォータ制御に使うクライアント（省略時は制御なし）
     
     Returns:
         gspread.Clientオブジェクトとワークシート（シート1枚目）のタプル
@@ -48,25 +86,31 @@ def connect_sheet(credentials_path: str, spreadsheet_id: str):
         )
     
     # クライアントを作成
-    client = gspread.authorize(credentials)
+    with timed_phase("認証"):
+        client = gspread.authorize(credentials)
+    # 転送量をメトリクスに記録する（gspread 6はhttp_client.session、5はsession）
+    instrument_session(getattr(getattr(client, "http_client", client), "session", None))
+    if quota_client:
+        client = quota_client.wrap(client)
     
     # スプレッドシートを開く
-    try:
-        spreadsheet = client.open_by_key(spreadsheet_id)
-    except gspread.exceptions.SpreadsheetNotFound:
-        raise Exception(
-            f"スプレッドシートが見つかりません: {spreadsheet_id}\n"
-            "スプレッドシートIDが正しいか、サービスアカウントにアクセス権限があるか確認してください。"
-        )
-    
-    # シート1枚目（最初のワークシート）を取得
-    worksheet = spreadsheet.sheet1
+    with timed_phase("スプレッドシートを開く"):
+        try:
+            spreadsheet = client.open_by_key(spreadsheet_id)
+        except gspread.exceptions.SpreadsheetNotFound:
+            raise Exception(
+                f"スプレッドシートが見つかりません: {spreadsheet_id}\n"
+                "スプレッドシートIDが正しいか、サービスアカウントにアクセス権限があるか確認してください。"
+            )
+        
+        # シート1枚目（最初のワークシート）を取得
+        worksheet = spreadsheet.get_worksheet(0)
     
-    # ヘッダー定義（拡張版）
-    new_headers = ["ID", "タイトル", "内容", "期日", "重要度", "ステータス", "作成日時", "更新日時", "完了日時"]
+    new_headers = HEADERS
     
     # ヘッダーが存在しない場合は設定
-    all_values = worksheet.get_all_values()
+    with timed_phase("ヘッダー確認"):
+        all_values = worksheet.get_all_values()
     if not all_values or len(all_values) == 0 or (len(all_values) > 0 and len(all_values[0]) > 0 and all_values[0][0] != "ID"):
         worksheet.clear()
         worksheet.append_row(new_headers)
@@ -83,37 +127,8 @@ def connect_sheet(credentials_path: str, spreadsheet_id: str):
         # 既存ヘッダーを確認して、新カラムを追加する必要があるかチェック
         existing_headers = all_values[0] if all_values else []
         
-        # 旧形式（6カラム）から新形式（9カラム）への移行
-        if len(existing_headers) == 6 and existing_headers == ["ID", "タイトル", "内容", "期日", "作成日時", "更新日時"]:
-            # ヘッダー行を更新
-            worksheet.update("A1:I1", [new_headers])
-            
-            # 既存データにデフォルト値を追加
-            if len(all_values) > 1:  # データ行がある場合
-                for row_idx in range(2, len(all_values) + 1):  # 2行目から
-                    row = all_values[row_idx - 1]
-                    if len(row) >= 4 and row[0]:  # IDが存在する行のみ
-                        # 既存の値を保持
-                        existing_id = row[0]
-                        existing_title = row[1] if len(row) > 1 else ""
-                        existing_content = row[2] if len(row) > 2 else ""
-                        existing_due_date = row[3] if len(row) > 3 else ""
-                        existing_created_at = row[4] if len(row) > 4 else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        existing_updated_at = row[5] if len(row) > 5 else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        
-                        # 新形式で行全体を更新
-                        worksheet.update(f"A{row_idx}:I{row_idx}", [[
-                            existing_id,
-                            existing_title,
-                            existing_content,
-                            existing_due_date,
-                            "中",  # 重要度（デフォルト）
-                            "未完了",  # ステータス（デフォルト）
-                            existing_created_at,  # 作成日時
-                            existing_updated_at,  # 更新日時
-                            ""  # 完了日時（空）
-                        ]])
-            
+        # 旧形式のシートを新形式（9カラム）へ移行（行はまとめて書き込み、ヘッダーは最後に更新）
+        if migrate_sheet(worksheet, all_values):
             # ヘッダー行を太字にする
             try:
                 worksheet.format("A1:I1", {
@@ -138,73 +153,927 @@ def connect_sheet(credentials_path: str, spreadsheet_id: str):
     return client, worksheet
 
 
-class GoogleSheetsHandler:
+class GoogleSheetsHandler(TodoStorage):
     """GoogleスプレッドシートでTodoデータを管理するクラス"""
     
     def __init__(
         self,
         credentials_path: str,
-        spreadsheet_id: str
+        spreadsheet_id: str,
+        cache_ttl: float = 30.0,
+        id_block_size: int = 20,
+        write_behind_dir: Optional[str] = None,
+        flush_interval: float = 2.0,
+        quota_client: Optional[QuotaAwareClient] = None,
+        resync_interval: float = 300.0,
+        worksheet=None
     ):
         """
         初期化
         
+        キャッシュの有効期間が切れても、スプレッドシートの更新日時（Drive APIのmodifiedTime）が
+        前回の読み込み時から変わっていなければ再ダウンロードしない。自分の書き込みによる
+        更新日時の変化は、書き込み前に確認した更新日時が前回の読み込み時から変わっていない場合だけ無視する。
+        
         Args:
             credentials_path: サービスアカウントの認証情報JSONファイルのパス
             spreadsheet_id: スプレッドシートID
+            cache_ttl: 行スナップショットの有効期間（秒）。0以下でキャッシュ無効
+            id_block_size: ID採番時に1回で予約するIDの数
+            write_behind_dir: 指定するとライトビハインドモードになり、変更をこのディレクトリの
+                ジャーナルに記録してバックグラウンドでまとめて反映する
+            flush_interval: ライトビハインドモードでの反映間隔（秒）
+            quota_client: API呼び出しのクォータ制御に使うクライアント（省略時はデフォルト設定）
+            resync_interval: 更新日時に変化がなくても全体を読み直す間隔（秒）。自分の書き込みと
+                同時に行われた直接編集を見逃した場合の保険
+            worksheet: 接続済みのワークシート（テストやベンチマーク用。指定した場合は接続しない）
         """
         self.credentials_path = credentials_path
         self.spreadsheet_id = spreadsheet_id
+        self.cache_ttl = cache_ttl
+        self.resync_interval = resync_interval
+        self.quota_client = quota_client or QuotaAwareClient()
         self.client = None
-        self.worksheet = None
-        self._connect()
+        self.worksheet = worksheet
+        # ヘッダーを除いた行のスナップショット（シート上の並び順を保持、IDのない行はNone）
+        self._rows: Optional[List[Optional[Todo]]] = None
+        # ID → スナップショット上の位置（行番号 = 位置 + 2）
+        self._row_index: Dict[int, int] = {}
+        self._loaded_at = 0.0
+        # 最後にシート全体を読み込んだ時刻と、その時点のスプレッドシートの更新日時
+        self._synced_at = 0.0
+        self._seen_modified: Optional[str] = None
+        # 自分の書き込みが最後に完了した時刻（UTC）
+        self._own_write_at: Optional[datetime] = None
+        # 前回の読み込み以降に、書き込み前の確認で他からの変更を見つけたか（次回の確認で必ず読み直す）
+        self._foreign_change = False
+        # スナップショットに読み込み済みのカラム位置（一覧表示用に一部だけ読み込む場合がある）
+        self._loaded_columns: Set[int] = set()
+        # スナップショットが変わるたびに増えるバージョン
+        self._version = 0
+        self._instance_id = uuid.uuid4().hex[:12]
+        # ステータス → (バージョン, シート上の並び順の位置リスト)
+        self._orderings: Dict[str, Tuple[int, List[int]]] = {}
+        # 並び替え方法・ステータスごとのソート済みインデックス（再読み込みで破棄、変更時は差分更新）
+        self._sort_index: Optional[TodoSortIndex] = None
+        # タイトル・内容の全文検索インデックス（並び替えインデックスと同様に差分更新）
+        self._search_index: Optional[BigramSearchIndex] = None
+        # スナップショットなどメモリ上の状態を守るロック（Sheets APIの呼び出し中は保持しない）
+        self._lock = threading.RLock()
+        # スナップショットの読み込みと書き込みを順に行うためのロック（Sheets APIの呼び出し中も保持する）
+        # 両方を取得する場合は必ずこちらを先に取得する
+        self._io_lock = threading.RLock()
+        # 一覧の最初のページを表示した後に、スナップショットを読み込むスレッド（実行中のみ）
+        self._background_load: Optional[threading.Thread] = None
+        # アーカイブ用ワークシートと、読み込んだアーカイブ済みTodo（完了日時の新しい順）
+        self._archive = None
+        self._archived: Optional[List[Todo]] = None
+        self._archived_loaded_at = 0.0
+        self._archive_lock = threading.Lock()
+        if self.worksheet is None:
+            self._connect()
+        self._id_allocator = SheetIdAllocator(
+            self.worksheet.spreadsheet,
+            get_current_max_id=self._get_max_id,
+            block_size=id_block_size
+        )
+        self._write_behind = None
+        if write_behind_dir:
+            self._write_behind = WriteBehindQueue(
+                write_behind_dir,
+                flush_fn=self.apply_ops,
+                flush_interval=flush_interval
+            )
     
     def _connect(self):
         """Googleスプレッドシートに接続"""
         self.client, self.worksheet = connect_sheet(
             self.credentials_path,
-            self.spreadsheet_id
+            self.spreadsheet_id,
+            quota_client=self.quota_client
         )
     
+    @staticmethod
+    def _normalize_row(row: List[str]) -> List[str]:
+        """行を9カラムに揃える"""
+        row = [str(value) for value in row[:len(HEADERS)]]
+        return row + [""] * (len(HEADERS) - len(row))
+    
+    @staticmethod
+    def _to_todo(row: List[str]) -> Optional[Todo]:
+        """9カラムの行をTodoに変換（IDのない行はNone）"""
+        return Todo.from_row(row) if row[0].isdigit() else None
+    
+    def _is_fresh(self) -> bool:
+        """スナップショットが有効期間内か"""
+        return self._rows is not None and time.monotonic() - self._loaded_at < self.cache_ttl
+    
+    @staticmethod
+    def _column_indices(columns: Optional[Iterable[str]]) -> Set[int]:
+        """カラム名をカラム位置に変換（IDは常に含める、Noneの場合は全カラム）"""
+        if columns is None:
+            return set(range(len(HEADERS)))
+        return {0} | {HEADERS.index(column) for column in columns}
+    
+    def _read_columns(self, indices: Set[int], start_row: int = 2, end_row: Optional[int] = None) -> List[List[str]]:
+        """
+        指定したカラムだけをbatch_get 1回で読み込む
+        
+        Args:
+            indices: 読み込むカラム位置
+            start_row: 読み込み開始行（デフォルト: ヘッダーの次の行）
+            end_row: 読み込み終了行（Noneの場合は最終行まで）
+            
+        Returns:
+            9カラムに揃えた行のリスト（読み込まなかったカラムは空文字）
+        """
+        # 連続するカラムは1つの範囲にまとめる
+        runs: List[List[int]] = []
+        for i in sorted(indices):
+            if runs and runs[-1][1] == i - 1:
+                runs[-1][1] = i
+            else:
+                runs.append([i, i])
+        end = end_row or ""
+        ranges = [f"{chr(65 + first)}{start_row}:{chr(65 + last)}{end}" for first, last in runs]
+        
+        results = self.worksheet.batch_get(ranges)
+        rows = [[""] * len(HEADERS) for _ in range(max((len(values) for values in results), default=0))]
+        for (first, last), values in zip(runs, results):
+            for row, cells in zip(rows, values):
+                cells = [str(cell) for cell in cells[:last - first + 1]]
+                row[first:first + len(cells)] = cells
+        return rows
+    
+    def _probe_modified(self) -> Optional[str]:
+        """スプレッドシートの更新日時を取得（取得できない場合はNone）"""
+        get_last_update_time = getattr(self.worksheet.spreadsheet, "get_lastUpdateTime", None)
+        if get_last_update_time is None:
+            return None
+        try:
+            return get_last_update_time()
+        except Exception as e:
+            print(f"⚠ スプレッドシートの更新日時の取得に失敗しました: {str(e)}")
+            return None
+    
+    def _accounted_for(self, modified: str) -> bool:
+        """
+        更新日時の変化がスナップショットに反映済みか（前回の読み込み時のままか、自分の書き込みによるものか）
+        
+        自分の書き込みによるものとみなすのは、書き込み前の確認で他からの変更がなかった場合だけ。
+        """
+        if modified == self._seen_modified:
+            return True
+        if self._foreign_change or self._own_write_at is None:
+            return False
+        try:
+            modified_at = datetime.fromisoformat(modified.replace("Z", "+00:00"))
+        except ValueError:
+            return False
+        return modified_at <= self._own_write_at + timedelta(seconds=OWN_WRITE_TOLERANCE)
+    
+    def _begin_write(self):
+        """
+        書き込みの前に、前回の読み込み以降に他からの変更がなかったかを更新日時で確認
+        
+        変更があった場合（確認できない場合を含む）は、この後の自分の書き込みによる更新日時の変化に
+        その変更が紛れないよう、次回の確認で必ずシートを読み直させる。
+        """
+        if self._foreign_change:
+            return
+        modified = self._probe_modified()
+        with self._lock:
+            if modified is None or not self._accounted_for(modified):
+                self._foreign_change = True
+    
+    def _mark_own_write(self):
+        """自分の書き込みが完了した時刻を記録（書き込み前の確認で他からの変更がなければ、この時刻までの変化は無視する）"""
+        with self._lock:
+            self._own_write_at = datetime.now(timezone.utc)
+    
+    def _refresh(self, needed: Set[int]):
+        """
+        スナップショットを最新にする
+        
+        期限切れの場合はまずスプレッドシートの更新日時だけを確認し、変更がなければそのまま使い続ける。
+        変更があった場合・カラムが足りない場合のみシートを再読み込みする。Sheets APIの呼び出し中は
+        self._lockを保持しないため、その間も他のスレッドは現在のスナップショットを読める。
+        同時に期限切れを見つけたスレッドは読み込みを待ち、その結果を使う。
+        
+        Args:
+            needed: 必要なカラム位置
+        """
+        with self._lock:
+            if self._rows is not None and needed <= self._loaded_columns and self._is_fresh():
+                return
+        with self._io_lock:
+            with self._lock:
+                have = self._rows is not None and needed <= self._loaded_columns
+                if have and self._is_fresh():
+                    # 待っている間に他のスレッドが読み込んだ
+                    return
+                if self._rows is not None:
+                    # 差分を取れるよう、読み込み済みのカラムも読み直す
+                    needed = needed | self._loaded_columns
+                # 読み直す間隔を過ぎた場合は、更新日時に関係なく読み直す
+                check = have and self._seen_modified is not None and \
+                    time.monotonic() - self._synced_at < self.resync_interval
+            modified = self._probe_modified()
+            if check and modified is not None:
+                with self._lock:
+                    if self._accounted_for(modified):
+                        # 変化がないか、自分の書き込みによる変化（スナップショットに反映済み）
+                        self._seen_modified = modified
+                        self._loaded_at = time.monotonic()
+                        return
+            rows = self._fetch(needed)
+            with self._lock:
+                self._install(rows, needed, modified)
+    
+    def _fetch(self, needed: Set[int]) -> List[Optional[Todo]]:
+        """
+        シートを読み込み、各行を一度だけTodoに変換
+        
+        Args:
+            needed: 読み込むカラム位置
+            
+        Returns:
+            ヘッダーを除いた行のTodoのリスト（IDのない行はNone）
+        """
+        with SNAPSHOT_LOAD_SECONDS.labels("all" if len(needed) == len(HEADERS) else "partial").time():
+            if len(needed) == len(HEADERS):
+                all_values = self.worksheet.get_all_values()
+                # ヘッダーを除く
+                return [self._to_todo(self._normalize_row(row)) for row in all_values[1:]]
+            return [self._to_todo(row) for row in self._read_columns(needed)]
+    
+    def _install(self, rows: List[Optional[Todo]], needed: Set[int], modified: Optional[str]):
+        """
+        読み込んだ行をスナップショットとして差し替え、前回のスナップショットとの差分を反映
+        
+        並び替えインデックスは変更のあったTodoだけを差し替え、内容が変わっていなければバージョンも据え置く。
+        
+        Args:
+            rows: 読み込んだ行のTodoのリスト
+            needed: 読み込んだカラム位置
+            modified: 読み込む前に取得したスプレッドシートの更新日時
+        """
+        old_rows, old_indexes = self._rows, (self._sort_index, self._search_index)
+        reuse_index = needed == self._loaded_columns
+        self._rows = rows
+        self._loaded_columns = needed
+        self._sort_index = self._search_index = None
+        self._rebuild_index()
+        # まだシートに反映されていない変更を重ねる
+        if self._write_behind:
+            for op in self._write_behind.pending_ops():
+                self._apply_op(op)
+        self._loaded_at = self._synced_at = time.monotonic()
+        self._seen_modified = modified
+        self._foreign_change = False
+        
+        if reuse_index:
+            for index in old_indexes:
+                if index is not None:
+                    self._diff_index(old_rows, index)
+            self._sort_index, self._search_index = old_indexes
+        if old_rows != self._rows:
+            self._version += 1
+    
+    def _get_rows(self, columns: Optional[Iterable[str]] = None) -> List[Optional[Todo]]:
+        """
+        書き込み用にスナップショットを取得（self._io_lockを保持した状態で呼び出す）
+        
+        self._io_lockを保持している間は他のスレッドがスナップショットの行を増減させないため、
+        返したリストの位置はそのまま使える（変更する場合はself._lockも取得する）。
+        
+        Args:
+            columns: 必要なカラム名（Noneの場合はすべて）
+            
+        Returns:
+            ヘッダーを除いた行のTodoのリスト（行番号 = インデックス + 2、IDのない行はNone）
+        """
+        self._refresh(self._column_indices(columns))
+        return self._rows
+    
+    def _load_in_background(self, columns: Optional[Iterable[str]] = None):
+        """
+        スナップショットをバックグラウンドで読み込む（まだなく、読み込み中でもない場合）
+        
+        最初のページは行範囲だけを読み込んで応答し、以降の表示はメモリ上のスナップショットから返すために使う。
+        """
+        with self._lock:
+            if self._rows is not None or self._background_load is not None:
+                return
+            self._background_load = threading.Thread(
+                target=self._background_refresh,
+                args=(self._column_indices(columns),),
+                name="snapshot-loader",
+                daemon=True
+            )
+            self._background_load.start()
+    
+    def _background_refresh(self, needed: Set[int]):
+        """スナップショットを読み込む（画面表示の呼び出しを優先するため、バックグラウンド扱いでAPIを呼び出す）"""
+        try:
+            with background_priority():
+                self._refresh(needed)
+        except Exception as e:
+            print(f"⚠ スナップショットのバックグラウンドでの読み込みに失敗しました: {str(e)}")
+        finally:
+            with self._lock:
+                self._background_load = None
+    
+    def wait_for_background_load(self, timeout: Optional[float] = None):
+        """
+        バックグラウンドでのスナップショットの読み込みが終わるまで待つ（テストやベンチマーク用）
+        
+        Args:
+            timeout: 最大待ち時間（秒、Noneの場合は完了まで待つ）
+        """
+        loader = self._background_load
+        if loader is not None:
+            loader.join(timeout)
+    
+    @contextmanager
+    def _snapshot(self, columns: Optional[Iterable[str]] = None):
+        """
+        読み込み用にスナップショットを取得し、使い終わるまでself._lockを保持する
+        
+        読み込み（Sheets APIの呼び出し）はロックの外で行う。self._lockを保持した状態では呼び出さない。
+        
+        Args:
+            columns: 必要なカラム名（Noneの場合はすべて）
+        """
+        needed = self._column_indices(columns)
+        while True:
+            self._refresh(needed)
+            self._lock.acquire()
+            if self._rows is not None and needed <= self._loaded_columns:
+                break
+            # 読み込んだ直後に破棄された場合は読み直す
+            self._lock.release()
+        try:
+            yield self._rows
+        finally:
+            self._lock.release()
+    
+    def _diff_index(self, old_rows: List[Optional[Todo]], index):
+        """前回のスナップショットと現在のスナップショットの差分を並び替え・検索インデックスに反映"""
+        def by_id(rows: List[Optional[Todo]]) -> Dict[int, Todo]:
+            todos: Dict[int, Todo] = {}
+            for todo in rows:
+                if todo is not None:
+                    todos.setdefault(todo.id, todo)
+            return todos
+        
+        old, new = by_id(old_rows), by_id(self._rows)
+        for todo_id, todo in old.items():
+            if todo_id not in new:
+                index.replace(todo, None)
+            elif new[todo_id] != todo:
+                index.replace(todo, new[todo_id])
+        for todo_id, todo in new.items():
+            if todo_id not in old:
+                index.replace(None, todo)
+    
+    def _rebuild_index(self):
+        """スナップショットからID→位置のインデックスを再構築"""
+        self._row_index = {}
+        for pos, todo in enumerate(self._rows):
+            if todo is not None:
+                # IDが重複している場合は先頭の行を優先（従来の走査と同じ挙動）
+                self._row_index.setdefault(todo.id, pos)
+    
+    def _remove_from_snapshot(self, pos: int):
+        """スナップショットから行を取り除き、後続行の位置を詰める"""
+        removed = self._rows.pop(pos)
+        if removed is not None and self._row_index.get(removed.id) == pos:
+            del self._row_index[removed.id]
+        for todo_id, other_pos in self._row_index.items():
+            if other_pos > pos:
+                self._row_index[todo_id] = other_pos - 1
+    
+    def _apply_op(self, op: Dict):
+        """ジャーナルの操作をスナップショットに適用"""
+        todo_id = int(op["id"])
+        pos = self._row_index.get(todo_id)
+        if op["op"] == "put":
+            todo = Todo.from_row(op["row"])
+            self._update_indexes(None if pos is None else self._rows[pos], todo)
+            if pos is None:
+                self._rows.append(todo)
+                self._row_index[todo_id] = len(self._rows) - 1
+            else:
+                self._rows[pos] = todo
+        elif op["op"] == "delete" and pos is not None:
+            self._update_indexes(self._rows[pos], None)
+            self._remove_from_snapshot(pos)
+    
+    def _mark_stale(self):
+        """次回のアクセス時にシート全体を読み直させる（スナップショットは差分の計算に使うため残す）"""
+        with self._lock:
+            self._loaded_at = self._synced_at = float("-inf")
+    
+    def _sheet_row(self, pos: int) -> Optional[int]:
+        """
+        スナップショット上の位置のTodoが現在あるシートの行番号を取得
+        
+        書き込み前の更新日時の確認（_begin_write）で前回の読み込み以降に他からの変更がなければ、
+        行はずれていないためスナップショット上の位置から求める。変更があった場合は、他のワーカーの削除や
+        シートの直接編集（行の挿入・並び替え）で行がずれている場合があるため、A列のIDを確認する。
+        一致しない場合はID列を1回読み込んで行を探し直し、スナップショットは次回のアクセス時に読み直させる。
+        
+        Args:
+            pos: スナップショット上の位置
+            
+        Returns:
+            行番号（シートから削除されていた場合はNone）
+        """
+        todo_id = str(self._rows[pos].id)
+        idx = pos + 2  # ヘッダーを除く、行番号は2から
+        self._begin_write()
+        if not self._foreign_change:
+            return idx
+        values = self.worksheet.get(f"A{idx}")
+        if values and values[0] and str(values[0][0]) == todo_id:
+            return idx
+        
+        self._mark_stale()
+        for idx, value in enumerate(self.worksheet.col_values(1)[1:], start=2):  # ヘッダーを除く
+            if value == todo_id:
+                return idx
+        return None
+    
+    def _drop_from_snapshot(self, pos: int):
+        """シートから削除されていたTodoをスナップショットからも取り除く"""
+        with self._lock:
+            self._update_indexes(self._rows[pos], None)
+            self._remove_from_snapshot(pos)
+            self._version += 1
+    
+    def _write_row(self, pos: Optional[int], row: List[str]) -> bool:
+        """
+        行を書き込み、スナップショットにも反映（書き込みスルー、self._io_lockを保持した状態で呼び出す）
+        
+        Args:
+            pos: スナップショット上の位置（新規追加の場合はNone。呼び出し元で_begin_write・_mark_own_writeを呼び出す）
+            row: 9カラムの行
+            
+        Returns:
+            書き込んだ場合True（更新対象のTodoがシートから削除されていた場合False）
+        """
+        if self._write_behind:
+            self._write_behind.record({"op": "put", "id": int(row[0]), "row": row})
+        elif pos is None:
+            # 書き込み前後の確認・記録は、IDの予約も含めて呼び出し元で行う
+            self.worksheet.append_row(row)
+        else:
+            idx = self._sheet_row(pos)
+            if idx is None:
+                self._drop_from_snapshot(pos)
+                return False
+            self.worksheet.update(f"A{idx}:I{idx}", [row])
+            self._mark_own_write()
+        
+        todo = Todo.from_row(row)
+        with self._lock:
+            if pos is not None:
+                self._update_indexes(self._rows[pos], todo)
+                self._rows[pos] = todo
+            elif self._rows is not None:
+                self._update_indexes(None, todo)
+                self._rows.append(todo)
+                self._row_index.setdefault(todo.id, len(self._rows) - 1)
+            self._version += 1
+        return True
+    
+    def _delete_row(self, pos: int) -> bool:
+        """
+        行を削除し、スナップショットからも取り除く（self._io_lockを保持した状態で呼び出す）
+        
+        Returns:
+            削除した場合True（すでにシートから削除されていた場合False）
+        """
+        if self._write_behind:
+            self._write_behind.record({"op": "delete", "id": self._rows[pos].id})
+        else:
+            idx = self._sheet_row(pos)
+            if idx is None:
+                self._drop_from_snapshot(pos)
+                return False
+            self.worksheet.delete_rows(idx)
+            self._mark_own_write()
+        self._drop_from_snapshot(pos)
+        return True
+    
+    def _update_indexes(self, old: Optional[Todo], new: Optional[Todo]):
+        """並び替え・検索インデックスがあれば変更を差分で反映"""
+        if self._sort_index is not None:
+            self._sort_index.replace(old, new)
+        if self._search_index is not None:
+            self._search_index.replace(old, new)
+    
+    def _delete_sheet_rows(self, idxs: List[int]):
+        """
+        複数の行をbatch_update 1回で削除
+        
+        Args:
+            idxs: 削除する行番号（行番号がずれないよう降順に並べておく）
+        """
+        self.worksheet.spreadsheet.batch_update({
+            "requests": [
+                {
+                    "deleteDimension": {
+                        "range": {
+                            "sheetId": self.worksheet.id,
+                            "dimension": "ROWS",
+                            "startIndex": idx - 1,
+                            "endIndex": idx
+                        }
+                    }
+                }
+                for idx in idxs
+            ]
+        })
+    
+    def _read_sheet_rows(self) -> Dict[int, int]:
+        """
+        ID列を1回読み込み、TodoのIDからシートの行番号を求める
+        
+        Returns:
+            ID → 行番号の辞書（同じIDが複数ある場合は最初の行）
+        """
+        sheet_rows = {}
+        for idx, value in enumerate(self.worksheet.col_values(1)[1:], start=2):  # ヘッダーを除く
+            if value.isdigit():
+                sheet_rows.setdefault(int(value), idx)
+        return sheet_rows
+    
+    def apply_ops(self, ops: List[Dict]):
+        """
+        ライトビハインドやレプリケーションで溜まった操作をまとめてシートへ反映
+        
+        同じIDへの変更は最終状態だけにまとめ、ID列の読み込み1回と、
+        更新のbatch_update・削除のbatch_update・追加のappend_rowsを各1回で反映する。
+        すでに反映済みの操作を再送しても結果が変わらないよう、ID列から行を特定する。
+        画面表示の呼び出しを優先するため、バックグラウンド扱いでAPIを呼び出す。
+        反映用のスレッドから呼び出されるため、スナップショットの読み込みや他の書き込みと
+        順に実行されるようself._io_lockを取得する（更新日時による変更の確認に使う状態も書き換えるため）。
+        """
+        with background_priority(), self._io_lock:
+            puts, deletes = coalesce_ops(ops)
+            sheet_rows = self._read_sheet_rows()
+            
+            updates = [
+                {"range": f"A{sheet_rows[todo_id]}:I{sheet_rows[todo_id]}", "values": [row]}
+                for todo_id, row in puts.items() if todo_id in sheet_rows
+            ]
+            appends = [row for todo_id, row in puts.items() if todo_id not in sheet_rows]
+            # 行番号がずれないよう下の行から削除する
+            delete_idxs = sorted((sheet_rows[todo_id] for todo_id in deletes if todo_id in sheet_rows), reverse=True)
+            
+            if updates or delete_idxs or appends:
+                self._begin_write()
+            if updates:
+                self.worksheet.batch_update(updates)
+            if delete_idxs:
+                self._delete_sheet_rows(delete_idxs)
+            if appends:
+                self.worksheet.append_rows(appends)
+            if updates or delete_idxs or appends:
+                self._mark_own_write()
+    
+    def flush(self) -> int:
+        """
+        ライトビハインドモードで未反映の変更を即座に反映
+        
+        Returns:
+            反映した操作の件数（ライトビハインドモードでない場合は0）
+        """
+        if not self._write_behind:
+            return 0
+        return self._write_behind.flush()
+    
+    def invalidate_cache(self):
+        """スナップショットを破棄し、次回アクセス時にシートを再読み込みさせる"""
+        with self._io_lock, self._lock:
+            self._rows = None
+            self._sort_index = self._search_index = None
+            self._loaded_columns = set()
+            self._archived = None
+    
+    def _get_max_id(self) -> int:
+        """スナップショットとアーカイブ上の最大IDを取得（Todoがない場合は0）"""
+        with self._snapshot():
+            max_id = max(self._row_index, default=0)
+        # アーカイブへ移動したTodoのIDも再利用しない
+        archive = self._open_archive(create=False)
+        if archive is None:
+            return max_id
+        return max([max_id] + [int(value) for value in archive.col_values(1)[1:] if value.isdigit()])
+    
     def _get_next_id(self) -> int:
-        """次のIDを取得"""
-        all_values = self.worksheet.get_all_values()
-        if len(all_values) <= 1:  # ヘッダーのみ
-            return 1
+        """次のIDを取得（メタデータシートで予約したブロックから払い出す）"""
+        while True:
+            todo_id = self._id_allocator.next_id()
+            # シートに直接追加された行などと重複するIDは飛ばす（スナップショットがある場合）
+            if self._rows is None or todo_id not in self._row_index:
+                return todo_id
+    
+    def _get_next_ids(self, count: int) -> List[int]:
+        """次のIDをcount個まとめて取得（メタデータシートへの追記1回でブロックを予約）"""
+        ids: List[int] = []
+        while len(ids) < count:
+            # シートに直接追加された行などと重複するIDは飛ばす（スナップショットがある場合）
+            ids.extend(
+                todo_id for todo_id in self._id_allocator.reserve(count - len(ids))
+                if self._rows is None or todo_id not in self._row_index
+            )
+        return ids
+    
+    def _find_row(self, todo_id: int) -> Optional[int]:
+        """IDからスナップショット上の位置を取得（インデックス参照、self._io_lockを保持した状態で呼び出す）"""
+        self._get_rows()
+        return self._row_index.get(todo_id)
+    
+    def get_all_records(self) -> List[Todo]:
+        """
+        すべてのTodoを取得（スナップショットから返す）
+        
+        Returns:
+            Todoのリスト
+        """
+        with self._snapshot() as rows:
+            return [todo for todo in rows if todo is not None]
+    
+    def get_record(self, todo_id: int) -> Optional[Todo]:
+        """
+        指定されたIDのTodoを取得
         
-        # 既存のIDを取得して最大値を求める
-        ids = []
-        for row in all_values[1:]:  # ヘッダーを除く
-            if row and row[0].isdigit():
-                ids.append(int(row[0]))
+        Args:
+            todo_id: TodoのID
+            
+        Returns:
+            Todo、見つからない場合はNone
+        """
+        with self._snapshot():
+            pos = self._row_index.get(todo_id)
+            if pos is None:
+                return None
+            return self._rows[pos]
+    
+    @staticmethod
+    def _sort_columns(columns: Optional[List[str]] = None) -> Optional[List[str]]:
+        """並び替えインデックスに必要なカラム名（columnsに並び替え・絞り込みに使うカラムを加える）"""
+        if columns is None:
+            return None
+        return list(columns) + ["期日", "重要度", "ステータス"]
+    
+    def _get_sort_index(self) -> TodoSortIndex:
+        """
+        並び替えインデックスを取得（スナップショットの再読み込み後は作り直す）
         
-        return max(ids) + 1 if ids else 1
+        _sort_columnsのカラムを含むスナップショットを取得し、self._lockを保持した状態で呼び出す。
+        """
+        if self._sort_index is None:
+            # IDが重複している行は先頭の行だけを対象にする
+            self._sort_index = TodoSortIndex(
+                todo for pos, todo in enumerate(self._rows)
+                if todo is not None and self._row_index.get(todo.id) == pos
+            )
+        return self._sort_index
     
-    def get_all_todos(self) -> List[Dict]:
+    def _get_search_index(self) -> BigramSearchIndex:
         """
-        すべてのTodoを取得
+        全文検索インデックスを取得（スナップショットの再読み込み後は作り直す）
+        
+        SEARCH_COLUMNSのカラムを含むスナップショットを取得し、self._lockを保持した状態で呼び出す。
+        """
+        if self._search_index is None:
+            # IDが重複している行は先頭の行だけを対象にする
+            self._search_index = BigramSearchIndex(
+                todo for pos, todo in enumerate(self._rows)
+                if todo is not None and self._row_index.get(todo.id) == pos
+            )
+        return self._search_index
+    
+    def _get_ordering(self, filter_status: str) -> List[int]:
+        """
+        シート上の並び順で絞り込んだスナップショット上の位置リストを取得
         
+        スナップショットが変わっていなければ前回の結果を再利用する。
+        ステータスを含むスナップショットを取得し、self._lockを保持した状態で呼び出す。
+        """
+        rows = self._rows
+        cached = self._orderings.get(filter_status)
+        if cached and cached[0] == self._version:
+            return cached[1]
+        
+        ordering = [
+            pos for pos, todo in enumerate(rows)
+            if todo is not None and (filter_status == 'all' or todo.status.value == filter_status)
+        ]
+        self._orderings[filter_status] = (self._version, ordering)
+        return ordering
+    
+    def get_page(
+        self,
+        sort_by: str = 'default',
+        filter_status: str = 'all',
+        page: int = 1,
+        per_page: int = DEFAULT_PER_PAGE,
+        columns: Optional[List[str]] = None
+    ) -> Tuple[List[Todo], bool, Optional[int]]:
+        """
+        一覧の1ページ分のTodoを取得
+        
+        スナップショットがない状態でデフォルトの並び順・絞り込みなしの場合は、
+        シート全体ではなくそのページの行範囲だけを読み込み、スナップショットはバックグラウンドで読み込む
+        （以降の表示はメモリ上のスナップショットから返す）。
+        並び替えありの場合は並び替えインデックスから該当ページだけを切り出す。
+        
+        Args:
+            sort_by: 並び替え方法（default/priority/due_date/priority_due）
+            filter_status: ステータスフィルター（all/未完了/完了）
+            page: ページ番号（1から）
+            per_page: 1ページあたりの件数
+            columns: 必要なカラム名のリスト（Noneの場合はすべて）。指定したカラムだけを読み込む
+            
         Returns:
-            Todoのリスト（各Todoは辞書形式）
+            (Todoのリスト, 次のページがあるか, 該当件数（不明な場合はNone）) のタプル
         """
-        all_values = self.worksheet.get_all_values()
-        if len(all_values) <= 1:  # ヘッダーのみ
-            return []
+        offset = (page - 1) * per_page
+        with self._lock:
+            pending = self._write_behind and self._write_behind.pending_ops()
+            range_read = sort_by == 'default' and filter_status == 'all' and self._rows is None and not pending
+        if range_read:
+            # スナップショットに触れないため、他のリクエストと並行して読み込めるようロックの外で実行
+            # 次のページの有無を判定するため1行多く読み込む
+            start = offset + 2  # ヘッダーを除く、行番号は2から
+            indices = self._column_indices(columns)
+            if len(indices) == len(HEADERS):
+                rows = [self._normalize_row(row) for row in self.worksheet.get(f"A{start}:I{start + per_page}")]
+            else:
+                rows = self._read_columns(indices, start, start + per_page)
+            todos = [Todo.from_row(row) for row in rows[:per_page] if row[0].isdigit()]
+            self._load_in_background(columns)
+            return todos, len(rows) > per_page, None
         
-        todos = []
-        for row in all_values[1:]:  # ヘッダーを除く
-            if row and row[0].isdigit():  # IDが存在する行のみ
-                todos.append({
-                    'id': int(row[0]),
-                    'title': row[1] if len(row) > 1 else '',
-                    'content': row[2] if len(row) > 2 else '',
-                    'due_date': row[3] if len(row) > 3 else '',
-                    'created_at': row[4] if len(row) > 4 else '',
-                    'updated_at': row[5] if len(row) > 5 else ''
-                })
+        if TodoSortIndex.supports(sort_by, filter_status):
+            with self._snapshot(self._sort_columns(columns)):
+                index = self._get_sort_index()
+                total = index.count(sort_by, filter_status)
+                ids = index.ids(sort_by, filter_status, offset, offset + per_page)
+                todos = [self._rows[self._row_index[todo_id]] for todo_id in ids]
+                return todos, offset + per_page < total, total
+        
+        with self._snapshot(None if columns is None else list(columns) + ["ステータス"]):
+            ordering = self._get_ordering(filter_status)
+            todos = [self._rows[pos] for pos in ordering[offset:offset + per_page]]
+            return todos, offset + per_page < len(ordering), len(ordering)
+    
+    def iter_records(self, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Todo]:
+        """
+        すべてのTodoをシートの並び順に取得（エクスポート用）
+        
+        スナップショットは使わずに、シートをchunk_size行ずつ範囲を指定して読み込むため、
+        保持するのは読み込み中の1回分の行だけになる。画面表示の呼び出しを優先するため、
+        バックグラウンド扱いでAPIを呼び出す。
+        
+        Args:
+            chunk_size: 1回に読み込む行数
+            
+        Returns:
+            Todoのイテレーター
+        """
+        # シートから読み込むため、ライトビハインドモードでは未反映の変更を先に反映する
+        self.flush()
+        start = 2  # ヘッダーを除く、行番号は2から
+        while True:
+            with background_priority():
+                values = self.worksheet.get(f"A{start}:I{start + chunk_size - 1}")
+            for row in values:
+                todo = self._to_todo(self._normalize_row(row))
+                if todo is not None:
+                    yield todo
+            if len(values) < chunk_size:
+                return
+            start += chunk_size
+    
+    def get_projected_records(self, columns: List[str]) -> List[Todo]:
+        """
+        すべてのTodoを指定したカラムだけ読み込んで取得
         
+        スナップショットに必要なカラムがない場合は、そのカラムだけをbatch_get 1回で読み込む。
+        
+        Args:
+            columns: 必要なカラム名のリスト（それ以外のカラムは空の場合がある）
+            
+        Returns:
+            Todoのリスト
+        """
+        with self._snapshot(columns) as rows:
+            return [todo for todo in rows if todo is not None]
+    
+    def get_due_before(self, due_date: str, filter_status: str = 'all') -> List[Todo]:
+        """
+        期日が指定日より前のTodoを期日順に取得（並び替えインデックスを二分探索）
+        
+        Args:
+            due_date: 基準日（YYYY-MM-DD形式、この日は含まない）
+            filter_status: ステータスフィルター（all/未完了/完了）
+            
+        Returns:
+            Todoのリスト
+        """
+        with self._snapshot():
+            ids = self._get_sort_index().due_before(parse_due_ordinal(due_date), filter_status)
+            return [self._rows[self._row_index[todo_id]] for todo_id in ids]
+    
+    def get_due_range(self, due_from: str = '', due_to: str = '', filter_status: str = 'all') -> List[Todo]:
+        """
+        期日が範囲内のTodoを期日順に取得（並び替えインデックスを二分探索）
+        
+        Args:
+            due_from: 範囲の開始日（YYYY-MM-DD形式、この日を含む。空の場合は下限なし）
+            due_to: 範囲の終了日（YYYY-MM-DD形式、この日を含む。空の場合は上限なし）
+            filter_status: ステータスフィルター（all/未完了/完了）
+            
+        Returns:
+            Todoのリスト
+        """
+        start = parse_due_ordinal(due_from) if due_from else 1
+        stop = parse_due_ordinal(due_to) + 1 if due_to else None
+        with self._snapshot():
+            ids = self._get_sort_index().due_range(start, stop, filter_status)
+            return [self._rows[self._row_index[todo_id]] for todo_id in ids]
+    
+    def search(self, query: str, filter_status: str = 'all') -> List[Todo]:
+        """
+        タイトル・内容に検索語を含むTodoを関連度の高い順に取得（全文検索インデックスを参照）
+        
+        Args:
+            query: 検索語（空白区切りで複数指定するとAND検索）
+            filter_status: ステータスフィルター（all/未完了/完了）
+            
+        Returns:
+            Todoのリスト
+        """
+        with self._snapshot(SEARCH_COLUMNS):
+            ids = self._get_search_index().search(query)
+            todos = [self._rows[self._row_index[todo_id]] for todo_id in ids]
+        if filter_status != 'all':
+            todos = [todo for todo in todos if todo.status.value == filter_status]
         return todos
     
+    def data_version(self, columns: Optional[List[str]] = None) -> str:
+        """
+        スナップショットのバージョンを取得（期限切れの場合は変更の有無を確認してから返す）
+        
+        バージョンはプロセスごとに数えるため、プロセスを識別する値を前に付ける。
+        別のワーカーが応答した場合は一致せず、通常の応答になる。
+        まだスナップショットを読み込んでいない場合は、この後のget_pageがそのページの行範囲だけを
+        読み込めるよう、スナップショットは読み込まずにスプレッドシートの更新日時をバージョンとする
+        （更新日時を取得できない場合はスナップショットを読み込む）。スナップショットはget_pageの後に
+        バックグラウンドで読み込むため、以降はAPIを呼び出さずにバージョンを返す。
+        
+        Args:
+            columns: この後の読み込みで必要なカラム名（Noneの場合はすべて）。スナップショットにない場合は読み込む
+            
+        Returns:
+            「プロセスの識別子-バージョン」形式の文字列
+        """
+        with self._lock:
+            cold = self._rows is None and not (self._write_behind and self._write_behind.pending_ops())
+        if cold:
+            modified = self._probe_modified()
+            if modified is not None:
+                return f"{self._instance_id}-m{modified}"
+        with self._snapshot(columns):
+            return f"{self._instance_id}-{self._version}"
+    
+    @staticmethod
+    def _legacy_dict(todo: Todo) -> Dict:
+        """旧形式（英語キー）の辞書に変換"""
+        return {
+            'id': todo.id,
+            'title': todo.title,
+            'content': todo.content,
+            'due_date': todo.due_date,
+            'created_at': todo.created_at,
+            'updated_at': todo.updated_at
+        }
+    
+    def get_all_todos(self) -> List[Dict]:
+        """
+        すべてのTodoを取得
+        
+        Returns:
+            Todoのリスト（各Todoは辞書形式）
+        """
+        return [self._legacy_dict(todo) for todo in self.get_all_records()]
+    
     def get_todo(self, todo_id: int) -> Optional[Dict]:
         """
         指定されたIDのTodoを取得
@@ -215,20 +1084,10 @@ class GoogleSheetsHandler:
         Returns:
             Todoの辞書、見つからない場合はNone
         """
-        all_values = self.worksheet.get_all_values()
-        
-        for row in all_values[1:]:  # ヘッダーを除く
-            if row and row[0].isdigit() and int(row[0]) == todo_id:
-                return {
-                    'id': int(row[0]),
-                    'title': row[1] if len(row) > 1 else '',
-                    'content': row[2] if len(row) > 2 else '',
-                    'due_date': row[3] if len(row) > 3 else '',
-                    'created_at': row[4] if len(row) > 4 else '',
-                    'updated_at': row[5] if len(row) > 5 else ''
-                }
-        
-        return None
+        todo = self.get_record(todo_id)
+        if todo is None:
+            return None
+        return self._legacy_dict(todo)
     
     def create_todo(self, title: str, content: str, due_date: str, priority: str = "中") -> int:
         """
@@ -243,26 +1102,46 @@ class GoogleSheetsHandler:
         Returns:
             作成されたTodoのID
         """
-        todo_id = self._get_next_id()
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # 重要度の検証
-        if priority not in ["高", "中", "低"]:
-            priority = "中"
+        with self._io_lock:
+            # IDの予約（メタデータシートへの追記）も自分の書き込みとして扱う
+            self._begin_write()
+            todo_id = self._get_next_id()
+            self._write_row(None, build_new_row(todo_id, title, content, due_date, priority))
+            self._mark_own_write()
+            return todo_id
+    
+    def create_todos(self, items: List[Dict[str, str]]) -> List[int]:
+        """
+        複数のTodoをまとめて作成（一括登録用）
         
-        self.worksheet.append_row([
-            str(todo_id),
-            title,
-            content,
-            due_date,
-            priority,  # 重要度
-            "未完了",  # ステータス
-            now,  # 作成日時
-            now,  # 更新日時
-            ""  # 完了日時（空）
-        ])
+        IDはメタデータシートへの追記1回でまとめて予約し、行はappend_rows 1回で追記する。
+        ライトビハインドモードでもジャーナルを経由せずに直接追記する。
         
-        return todo_id
+        Args:
+            items: title/content/due_date/priority/statusをキーとする辞書のリスト
+            
+        Returns:
+            作成されたTodoのIDのリスト（itemsと同じ順）
+        """
+        if not items:
+            return []
+        with self._io_lock:
+            # IDの予約（メタデータシートへの追記）も自分の書き込みとして扱う
+            self._begin_write()
+            ids = self._get_next_ids(len(items))
+            rows = [build_imported_row(todo_id, item) for todo_id, item in zip(ids, items)]
+            self.worksheet.append_rows(rows)
+            self._mark_own_write()
+            
+            with self._lock:
+                if self._rows is not None:
+                    for row in rows:
+                        todo = Todo.from_row(row)
+                        self._update_indexes(None, todo)
+                        self._rows.append(todo)
+                        self._row_index.setdefault(todo.id, len(self._rows) - 1)
+                self._version += 1
+            return ids
     
     def update_todo(
         self,
@@ -287,49 +1166,15 @@ class GoogleSheetsHandler:
         Returns:
             更新成功時True、Todoが見つからない場合False
         """
-        all_values = self.worksheet.get_all_values()
-        
-        for idx, row in enumerate(all_values[1:], start=2):  # ヘッダーを除く、行番号は2から
-            if row and row[0].isdigit() and int(row[0]) == todo_id:
-                # 既存の値を取得（互換性のため）
-                created_at = row[6] if len(row) > 6 else (row[4] if len(row) > 4 else datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                # 重要度とステータスの処理
-                if priority is None:
-                    priority = row[4] if len(row) > 4 and row[4] in ["高", "中", "低"] else "中"
-                else:
-                    if priority not in ["高", "中", "低"]:
-                        priority = "中"
-                
-                if status is None:
-                    status = row[5] if len(row) > 5 and row[5] in ["未完了", "完了"] else "未完了"
-                
-                # 完了日時の処理
-                completed_at = ""
-                if status == "完了":
-                    # 既存の完了日時がある場合は保持、ない場合は現在時刻を設定
-                    completed_at = row[8] if len(row) > 8 and row[8] else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                else:
-                    # 未完了の場合は空にする
-                    completed_at = ""
-                
-                # 行を更新（9カラム）
-                self.worksheet.update(f"A{idx}:I{idx}", [[
-                    str(todo_id),
-                    title,
-                    content,
-                    due_date,
-                    priority,  # 重要度
-                    status,  # ステータス
-                    created_at,  # 作成日時
-                    updated_at,  # 更新日時
-                    completed_at  # 完了日時
-                ]])
-                
-                return True
-        
-        return False
+        with self._io_lock:
+            pos = self._find_row(todo_id)
+            if pos is None:
+                return False
+            
+            # 行を更新（9カラム）
+            return self._write_row(pos, build_updated_row(
+                self._rows[pos].to_row(), title, content, due_date, priority, status
+            ))
     
     def complete_todo(self, todo_id: int, completed: bool = True) -> bool:
         """
@@ -342,57 +1187,13 @@ class GoogleSheetsHandler:
         Returns:
             更新成功時True、Todoが見つからない場合False
         """
-        all_values = self.worksheet.get_all_values()
-        
-        for idx, row in enumerate(all_values[1:], start=2):  # ヘッダーを除く、行番号は2から
-            if row and row[0].isdigit() and int(row[0]) == todo_id:
-                # 既存の値を取得（カラム位置を確認）
-                title = row[1] if len(row) > 1 else ""
-                content = row[2] if len(row) > 2 else ""
-                due_date = row[3] if len(row) > 3 else ""
-                
-                # 重要度の取得（カラム位置を確認）
-                if len(row) > 4 and row[4] in ["高", "中", "低"]:
-                    priority = row[4]
-                else:
-                    priority = "中"
-                
-                # 作成日時と更新日時の取得（カラム位置を確認）
-                if len(row) >= 9:
-                    # 新形式（9カラム）
-                    created_at = row[6] if len(row) > 6 else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                elif len(row) >= 6:
-                    # 旧形式（6カラム）
-                    created_at = row[4] if len(row) > 4 else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                else:
-                    created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                
-                # ステータスと完了日時を設定
-                if completed:
-                    status = "完了"
-                    completed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                else:
-                    status = "未完了"
-                    completed_at = ""
-                
-                # 行を更新（9カラム）
-                self.worksheet.update(f"A{idx}:I{idx}", [[
-                    str(todo_id),
-                    title,
-                    content,
-                    due_date,
-                    priority,
-                    status,
-                    created_at,
-                    updated_at,
-                    completed_at
-                ]])
-                
-                return True
-        
-        return False
+        with self._io_lock:
+            pos = self._find_row(todo_id)
+            if pos is None:
+                return False
+            
+            # 行を更新（9カラム）
+            return self._write_row(pos, build_completed_row(self._rows[pos].to_row(), completed))
     
     def delete_todo(self, todo_id: int) -> bool:
         """
@@ -404,13 +1205,214 @@ class GoogleSheetsHandler:
         Returns:
             削除成功時True、Todoが見つからない場合False
         """
-        all_values = self.worksheet.get_all_values()
+        with self._io_lock:
+            pos = self._find_row(todo_id)
+            if pos is None:
+                return False
+            
+            # 行を削除
+            return self._delete_row(pos)
+    
+    def bulk_update(self, todo_ids: List[int], action: str, priority: str = None) -> Dict[str, List[int]]:
+        """
+        複数のTodoをまとめて完了・未完了に戻す・重要度変更・削除する
         
-        for idx, row in enumerate(all_values[1:], start=2):  # ヘッダーを除く、行番号は2から
-            if row and row[0].isdigit() and int(row[0]) == todo_id:
-                # 行を削除
-                self.worksheet.delete_rows(idx)
-                return True
+        他のワーカーや直接編集で行がずれていても正しい行に書き込むよう、ID列の読み込み1回で対象の行を特定し、
+        ステータス・重要度の変更は値のbatch_update 1回、削除はdeleteDimensionのbatch_update 1回（下の行から）で
+        シートに反映する。スナップショットにあってもシートにないTodoは見つからなかったものとする。
         
-        return False
-
+        Args:
+            todo_ids: TodoのIDのリスト
+            action: 一括操作（complete/reopen/priority/delete）
+            priority: action=priorityの場合の重要度（高/中/低）
+        
+        Returns:
+            {"updated": 変更したIDのリスト, "not_found": 見つからなかったIDのリスト}
+        """
+        validate_bulk_action(action, priority)
+        with self._io_lock:
+            self._get_rows()
+            # ライトビハインドモードでは反映時にID列から行を特定するため、ここではシートを読まない
+            sheet_rows = None if self._write_behind else self._read_sheet_rows()
+            result = {"updated": [], "not_found": []}
+            targets = {}  # スナップショットの位置 → シートの行番号
+            gone = []  # スナップショットにあるが、他のワーカーが削除済みのTodoの位置
+            for todo_id in dict.fromkeys(todo_ids):
+                pos = self._row_index.get(todo_id)
+                if pos is not None and sheet_rows is not None and todo_id not in sheet_rows:
+                    gone.append(pos)
+                    pos = None
+                if pos is None:
+                    result["not_found"].append(todo_id)
+                else:
+                    result["updated"].append(todo_id)
+                    # ヘッダーを除く、行番号は2から
+                    targets[pos] = sheet_rows[todo_id] if sheet_rows is not None else pos + 2
+            if gone or any(idx != pos + 2 for pos, idx in targets.items()):
+                # スナップショットとシートの行がずれているため、次回のアクセスで読み直す
+                self._mark_stale()
+            
+            removed = list(gone)
+            rows = {}
+            if targets and action == 'delete':
+                if self._write_behind:
+                    for pos in targets:
+                        self._write_behind.record({"op": "delete", "id": self._rows[pos].id})
+                else:
+                    self._begin_write()
+                    # 行番号がずれないよう下の行から削除する
+                    self._delete_sheet_rows(sorted(targets.values(), reverse=True))
+                    self._mark_own_write()
+                removed.extend(targets)
+            elif targets:
+                rows = {pos: build_bulk_row(self._rows[pos].to_row(), action, priority) for pos in targets}
+                if self._write_behind:
+                    for row in rows.values():
+                        self._write_behind.record({"op": "put", "id": int(row[0]), "row": row})
+                else:
+                    self._begin_write()
+                    self.worksheet.batch_update([
+                        {"range": f"A{targets[pos]}:I{targets[pos]}", "values": [row]} for pos, row in rows.items()
+                    ])
+                    self._mark_own_write()
+            
+            with self._lock:
+                for pos, row in rows.items():
+                    todo = Todo.from_row(row)
+                    self._update_indexes(self._rows[pos], todo)
+                    self._rows[pos] = todo
+                if removed:
+                    # 位置がずれないよう後ろから取り除く
+                    for pos in sorted(removed, reverse=True):
+                        self._update_indexes(self._rows[pos], None)
+                        self._rows.pop(pos)
+                    self._rebuild_index()
+                if targets or removed:
+                    self._version += 1
+            return result
+    
+    def _open_archive(self, create: bool = True):
+        """
+        アーカイブ用ワークシートを開く
+        
+        Args:
+            create: 存在しない場合にヘッダー付きで作成するか
+            
+        Returns:
+            ワークシート（存在せず作成もしない場合はNone）
+        """
+        with self._archive_lock:
+            if self._archive is not None:
+                return self._archive
+            spreadsheet = self.worksheet.spreadsheet
+            try:
+                self._archive = spreadsheet.worksheet(ARCHIVE_SHEET_TITLE)
+            except gspread.exceptions.WorksheetNotFound:
+                if not create:
+                    return None
+                try:
+                    archive = spreadsheet.add_worksheet(title=ARCHIVE_SHEET_TITLE, rows=1000, cols=len(HEADERS))
+                    archive.update("A1:I1", [HEADERS])
+                    self._archive = archive
+                except gspread.exceptions.APIError:
+                    # 他のワーカーが同時に作成した場合はそちらを使う
+                    self._archive = spreadsheet.worksheet(ARCHIVE_SHEET_TITLE)
+            return self._archive
+    
+    def archive_completed(self, older_than_days: int, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+        """
+        完了日時から指定日数が過ぎた完了済みTodoをアーカイブ用ワークシートへ移動
+        
+        アーカイブのID列を読み込んでまだ移していない行だけをappend_rowsで追記し、
+        その後で元のシートの行をdeleteDimensionのbatch_update（下の行から）で削除する。
+        どちらもbatch_size行ずつまとめて呼び出す。途中で失敗しても、再実行すれば
+        追記済みの行は追記せずに削除だけを行う（何度実行しても同じ結果になる）。
+        画面表示の呼び出しを優先するため、バックグラウンド扱いでAPIを呼び出す。
+        
+        Args:
+            older_than_days: 完了からこの日数が過ぎたTodoを移動する
+            batch_size: 1回のAPI呼び出しで追記・削除する行数
+            
+        Returns:
+            移動したTodoの件数
+        """
+        if self._write_behind:
+            # シート上の行を確定させるため、未反映の変更を先に反映する
+            # （反映はself._io_lockを取得するため、ロックを取得する前に行う）
+            with background_priority():
+                self._write_behind.flush()
+        with background_priority(), self._io_lock:
+            # 直接編集された内容を移動しないよう、有効期間内でも更新日時を確認する
+            with self._lock:
+                self._loaded_at = 0.0
+            rows = self._get_rows()
+            # IDが重複している行は先頭の行だけを対象にする
+            targets = select_archivable(
+                (todo for pos, todo in enumerate(rows) if todo is not None and self._row_index.get(todo.id) == pos),
+                older_than_days
+            )
+            if not targets:
+                return 0
+            
+            # アーカイブ用ワークシートの作成も自分の書き込みとして扱う
+            self._begin_write()
+            archive = self._open_archive()
+            archived_ids = {int(value) for value in archive.col_values(1)[1:] if value.isdigit()}
+            appends = [todo.to_row() for todo in targets if todo.id not in archived_ids]
+            for start in range(0, len(appends), batch_size):
+                archive.append_rows(appends[start:start + batch_size])
+            
+            # 追記が済んだ行だけを削除する（直接編集で行がずれていてもよいよう、ID列から行番号を特定）
+            moved = {todo.id for todo in targets}
+            sheet_rows = {}
+            for idx, value in enumerate(self.worksheet.col_values(1)[1:], start=2):  # ヘッダーを除く
+                if value.isdigit() and int(value) in moved:
+                    sheet_rows.setdefault(int(value), idx)
+            # 行番号がずれないよう下の行から削除する
+            delete_idxs = sorted(sheet_rows.values(), reverse=True)
+            for start in range(0, len(delete_idxs), batch_size):
+                self._delete_sheet_rows(delete_idxs[start:start + batch_size])
+            self._mark_own_write()
+            
+            with self._lock:
+                for pos in sorted((self._row_index[todo.id] for todo in targets), reverse=True):
+                    self._update_indexes(self._rows[pos], None)
+                    self._rows.pop(pos)
+                self._rebuild_index()
+                self._version += 1
+                # アーカイブ済みTodoは次に表示するときに読み直す
+                self._archived = None
+            return len(targets)
+    
+    def _get_archived(self) -> List[Todo]:
+        """アーカイブ済みTodoを完了日時の新しい順に取得（キャッシュの有効期間内は読み直さない）"""
+        archived, loaded_at = self._archived, self._archived_loaded_at
+        if archived is not None and time.monotonic() - loaded_at < self.cache_ttl:
+            return archived
+        archive = self._open_archive(create=False)
+        if archive is None:
+            return []
+        todos = [
+            todo for todo in (self._to_todo(self._normalize_row(row)) for row in archive.get_all_values()[1:])
+            if todo is not None
+        ]
+        todos.sort(key=lambda todo: (todo.completed_at, todo.id), reverse=True)
+        self._archived, self._archived_loaded_at = todos, time.monotonic()
+        return todos
+    
+    def get_archived_page(self, page: int = 1, per_page: int = DEFAULT_PER_PAGE) -> Tuple[List[Todo], bool, int]:
+        """
+        アーカイブ済みTodoの1ページ分を完了日時の新しい順に取得
+        
+        アーカイブ用ワークシートは表示したときだけ読み込む（一覧表示のスナップショットには含めない）。
+        
+        Args:
+            page: ページ番号（1から）
+            per_page: 1ページあたりの件数
+            
+        Returns:
+            (Todoのリスト, 次のページがあるか, 該当件数) のタプル
+        """
+        todos = self._get_archived()
+        offset = (page - 1) * per_page
+        return todos[offset:offset + per_page], offset + per_page < len(todos), len(todos)
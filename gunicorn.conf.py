@@ -0,0 +1,25 @@
+"""
+gunicornの設定（gunicornは起動時にカレントディレクトリのこのファイルを読み込みます）
+
+環境変数PROMETHEUS_MULTIPROC_DIRを指定した場合、起動時に前回のメトリクスファイルを削除し、
+終了したワーカーのメトリクスを片付けます（/metricsは全ワーカーの値を合算して出力します）。
+"""
+
+import glob
+import os
+
+
+def on_starting(server):
+    """マスタープロセスの起動時にメトリクスのディレクトリを空にする"""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for db_file in glob.glob(os.path.join(path, "*.db")):
+            os.remove(db_file)
+
+
+def child_exit(server, worker):
+    """終了したワーカーのメトリクスを片付ける"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
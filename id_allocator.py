@@ -0,0 +1,166 @@
+"""
+ID採番モジュール
+
+メタデータ用ワークシートに予約チケットを追記することで、
+複数プロセス（gunicornワーカー）間で重複しないTodo IDをブロック単位で払い出します。
+"""
+
+import gspread
+import os
+import re
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+
+# メタデータ用ワークシート名（手動で行を削除・並び替えしないこと）
+META_SHEET_TITLE = "_meta"
+
+
+def _parse_appended_row(response) -> int:
+    """append_rowのレスポンスから追記された行番号を取得"""
+    updated_range = response["updates"]["updatedRange"]
+    match = re.search(r"![A-Z]+(\d+)", updated_range)
+    if not match:
+        raise ValueError(f"追記範囲を解析できません: {updated_range}")
+    return int(match.group(1))
+
+
+def _parse_appended_rows(response) -> Tuple[int, int]:
+    """append_rowsのレスポンスから追記された最初と最後の行番号を取得"""
+    updated_range = response["updates"]["updatedRange"]
+    match = re.search(r"![A-Z]+(\d+)(?::[A-Z]+(\d+))?", updated_range)
+    if not match:
+        raise ValueError(f"追記範囲を解析できません: {updated_range}")
+    first = int(match.group(1))
+    return first, int(match.group(2) or first)
+
+
+class SheetIdAllocator:
+    """
+    メタデータシートの予約チケットを使ったID採番クラス
+
+    メタデータシートの1行目に「採番開始前の最大ID」と「ブロックサイズ」を保持し、
+    2行目以降に予約チケットを1行ずつ追記します。Sheets APIの追記は直列化されるため、
+    追記された行番号はプロセス間で一意になり、行番号からIDブロックが一意に決まります。
+
+        ブロック番号 n = 行番号 - 2
+        払い出すID   = base + n * block_size + 1 〜 base + (n + 1) * block_size
+
+    シートの再読み込みは行わず、ブロックを使い切ったときだけ追記1回で次のブロックを予約します。
+    """
+
+    def __init__(
+        self,
+        spreadsheet,
+        get_current_max_id: Callable[[], int],
+        block_size: int = 20
+    ):
+        """
+        初期化
+
+        Args:
+            spreadsheet: gspread.Spreadsheetオブジェクト
+            get_current_max_id: メタデータシート新規作成時に使う既存IDの最大値を返す関数
+            block_size: 1回の予約で確保するIDの数（メタデータシート新規作成時のみ使用）
+        """
+        self.spreadsheet = spreadsheet
+        self.get_current_max_id = get_current_max_id
+        self.block_size = block_size
+        self._meta = None
+        self._base: Optional[int] = None
+        self._next_id = 0
+        self._block_end = -1  # 予約済みブロックの最後のID（未予約時は-1）
+        self._lock = threading.Lock()
+
+    def _open_meta(self):
+        """メタデータシートを開く（存在しない場合は作成）"""
+        try:
+            self._meta = self.spreadsheet.worksheet(META_SHEET_TITLE)
+        except gspread.exceptions.WorksheetNotFound:
+            try:
+                meta = self.spreadsheet.add_worksheet(title=META_SHEET_TITLE, rows=100, cols=3)
+                meta.update("A1:C1", [["id_base", self.get_current_max_id(), self.block_size]])
+                self._meta = meta
+            except gspread.exceptions.APIError:
+                # 他のワーカーが同時に作成した場合はそちらを使う
+                self._meta = self.spreadsheet.worksheet(META_SHEET_TITLE)
+
+        # 採番の基準値を読み込む（作成直後で未書き込みの場合は少し待って再試行）
+        for _ in range(5):
+            header = self._meta.get("A1:C1")
+            if header and len(header[0]) >= 3 and header[0][0] == "id_base":
+                self._base = int(header[0][1])
+                self.block_size = int(header[0][2])
+                return
+            time.sleep(0.5)
+        raise RuntimeError("メタデータシートの採番情報を読み込めませんでした")
+
+    def _reserve_block(self):
+        """予約チケットを追記して次のIDブロックを確保"""
+        if self._meta is None:
+            self._open_meta()
+
+        response = self._meta.append_row(self._ticket())
+        block_number = _parse_appended_row(response) - 2
+        self._next_id = self._base + block_number * self.block_size + 1
+        self._block_end = self._next_id + self.block_size - 1
+
+    def _ticket(self) -> List[str]:
+        """予約チケットの行"""
+        return [
+            "block",
+            f"{socket.gethostname()}:{os.getpid()}",
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ]
+
+    def next_id(self) -> int:
+        """
+        次のIDを払い出す
+
+        Returns:
+            プロセス間で一意なID
+        """
+        with self._lock:
+            if self._next_id > self._block_end:
+                self._reserve_block()
+            todo_id = self._next_id
+            self._next_id += 1
+            return todo_id
+
+    def reserve(self, count: int) -> List[int]:
+        """
+        count個のIDをまとめて払い出す（一括登録用）
+
+        予約済みブロックの残りを使い切り、足りない分は予約チケットを1回のappend_rowsで
+        必要なブロック数だけ追記して確保する。1回の追記で書き込まれた行は連続するため、
+        確保したブロックのIDも連続する。使い切らなかった分は次のnext_idで払い出す。
+
+        Args:
+            count: 払い出すIDの数
+
+        Returns:
+            プロセス間で一意なIDのリスト（昇順）
+        """
+        with self._lock:
+            ids: List[int] = []
+            if self._next_id <= self._block_end:
+                take = min(count, self._block_end - self._next_id + 1)
+                ids.extend(range(self._next_id, self._next_id + take))
+                self._next_id += take
+            remaining = count - len(ids)
+            if remaining <= 0:
+                return ids
+
+            if self._meta is None:
+                self._open_meta()
+            blocks = -(-remaining // self.block_size)
+            response = self._meta.append_rows([self._ticket() for _ in range(blocks)])
+            first_row, last_row = _parse_appended_rows(response)
+            first_id = self._base + (first_row - 2) * self.block_size + 1
+            self._block_end = self._base + (last_row - 1) * self.block_size
+            ids.extend(range(first_id, first_id + remaining))
+            self._next_id = first_id + remaining
+            return ids
@@ -0,0 +1,180 @@
+"""
+エクスポート・一括登録モジュール
+
+TodoをCSV・JSON Lines形式で少しずつ書き出し、同じ形式のファイルを1行ずつ読み込んで
+まとめて登録します。どちらも全件をメモリ上のリストにせずに処理します。
+"""
+
+import csv
+import io
+import json
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from storage import PRIORITIES, STATUSES, TodoStorage
+from todo import HEADERS, Todo, parse_due_ordinal
+
+
+# 対応する形式 → Content-Type
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# エクスポートで1回に送る文字数の目安（1行ずつ送ると送信回数が多くなるため）
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+# 一括登録で1回に書き込む件数（スプレッドシートではIDの予約とappend_rowsが各1回）
+IMPORT_CHUNK_SIZE = 1000
+
+# 一括登録の結果に含めるエラーの上限
+MAX_IMPORT_ERRORS = 100
+
+# 登録に使う項目 → 受け付ける列名・キー（エクスポートのヘッダーと英語名）
+FIELD_NAMES = {
+    'title': ('タイトル', 'title'),
+    'content': ('内容', 'content'),
+    'due_date': ('期日', 'due_date'),
+    'priority': ('重要度', 'priority'),
+    'status': ('ステータス', 'status'),
+}
+REQUIRED_FIELDS = ('title', 'content', 'due_date')
+
+
+def guess_format(filename: str) -> str:
+    """ファイル名の拡張子から形式を判定（.jsonl/.ndjson以外はCSV）"""
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def export_chunks(todos: Iterable[Todo], fmt: str, buffer_size: int = EXPORT_BUFFER_SIZE) -> Iterator[str]:
+    """
+    Todoを指定した形式の文字列に変換し、buffer_size文字程度ずつ返す
+
+    Args:
+        todos: Todoのイテレーター（読み込みながら変換する）
+        fmt: 形式（csv/jsonl）。CSVはExcelで開けるようBOMとヘッダー行を付ける
+        buffer_size: 1回に返す文字数の目安
+
+    Returns:
+        文字列のイテレーター
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"形式が不正です（csv/jsonl）: {fmt}")
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        # Excelで開いても文字化けしないようBOMを付ける
+        buffer.write('\ufeff')
+        writer.writerow(HEADERS)
+        write = lambda todo: writer.writerow(todo.to_row())
+    else:
+        write = lambda todo: buffer.write(json.dumps(todo.to_dict(), ensure_ascii=False) + '\n')
+
+    for todo in todos:
+        write(todo)
+        if buffer.tell() >= buffer_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def text_stream(stream: IO[bytes]) -> IO[str]:
+    """アップロードされたバイト列のストリームを1行ずつ読めるテキストに変換（UTF-8、BOMは読み飛ばす）"""
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream)
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def read_records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """
+    ファイルを1件ずつ読み込む
+
+    Args:
+        lines: テキストの行のイテレーター
+        fmt: 形式（csv/jsonl）。CSVは1行目をヘッダーとして扱う
+
+    Returns:
+        (行番号, 列名・キー → 値の辞書) のイテレーター（JSONとして解析できない行は辞書の代わりにNone）
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"形式が不正です（csv/jsonl）: {fmt}")
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_no, record if isinstance(record, dict) else None
+
+
+def parse_item(record: Optional[Dict]) -> Dict[str, str]:
+    """
+    読み込んだ1件を登録用の辞書に変換
+
+    不正な重要度・ステータスは画面からの登録と同じく中・未完了にする。
+
+    Args:
+        record: 列名・キー → 値の辞書
+
+    Returns:
+        title/content/due_date/priority/statusをキーとする辞書（必須項目がない・期日が不正な場合はValueError）
+    """
+    if record is None:
+        raise ValueError("JSONのオブジェクトとして解析できません")
+    item = {}
+    for field, names in FIELD_NAMES.items():
+        value = next((record[name] for name in names if record.get(name) not in (None, '')), '')
+        item[field] = str(value).strip()
+
+    missing = [FIELD_NAMES[field][0] for field in REQUIRED_FIELDS if not item[field]]
+    if missing:
+        raise ValueError(f"{'・'.join(missing)}が空です")
+    if not parse_due_ordinal(item['due_date']):
+        raise ValueError(f"期日の指定が不正です（YYYY-MM-DD形式）: {item['due_date']}")
+    if item['priority'] not in PRIORITIES:
+        item['priority'] = '中'
+    if item['status'] not in STATUSES:
+        item['status'] = '未完了'
+    return item
+
+
+def import_todos(storage: TodoStorage, lines: Iterable[str], fmt: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict:
+    """
+    ファイルを1行ずつ読み込み、chunk_size件ずつまとめてTodoを登録
+
+    登録できない行は飛ばし、行番号と理由を結果に含める。
+
+    Args:
+        storage: 登録先のストレージ
+        lines: テキストの行のイテレーター
+        fmt: 形式（csv/jsonl）
+        chunk_size: 1回にまとめて登録する件数
+
+    Returns:
+        {"imported": 登録した件数, "skipped": 飛ばした件数, "errors": [{"line": 行番号, "error": 理由}, ...]}
+        （errorsは最初のMAX_IMPORT_ERRORS件まで）
+    """
+    result = {"imported": 0, "skipped": 0, "errors": []}
+    chunk: List[Dict[str, str]] = []
+    for line_no, record in read_records(lines, fmt):
+        try:
+            chunk.append(parse_item(record))
+        except ValueError as e:
+            result["skipped"] += 1
+            if len(result["errors"]) < MAX_IMPORT_ERRORS:
+                result["errors"].append({"line": line_no, "error": str(e)})
+            continue
+        if len(chunk) >= chunk_size:
+            result["imported"] += len(storage.create_todos(chunk))
+            chunk = []
+    if chunk:
+        result["imported"] += len(storage.create_todos(chunk))
+    return result
@@ -0,0 +1,127 @@
+"""
+スケジューラーのリーダー選出モジュール
+
+gunicornの複数ワーカーのうち1プロセスだけが定期ジョブを実行するよう、
+ロックを取得できたプロセスをリーダーとしてスケジューラーを開始します。
+リーダーのプロセスが終了するとロックが解放され、待機中の別のプロセスが引き継ぎます。
+"""
+
+import fcntl
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class LeaderElector(ABC):
+    """リーダー選出のインターフェース（ロックの取得方法を差し替えられる）"""
+
+    @abstractmethod
+    def try_acquire(self) -> bool:
+        """
+        リーダーのロックを待たずに取得を試みる
+
+        Returns:
+            取得できた（すでに保持している）場合True
+        """
+
+    def release(self):
+        """リーダーのロックを解放"""
+
+
+class FileLockLeaderElector(LeaderElector):
+    """
+    ファイルロック（fcntl.flock）によるリーダー選出
+
+    ロックはプロセスの終了時にOSが解放するため、リーダーが異常終了しても引き継がれる。
+    同じホスト上のプロセス間でのみ有効。
+    """
+
+    def __init__(self, lock_path: str):
+        """
+        初期化
+
+        Args:
+            lock_path: ロックファイルのパス
+        """
+        self.lock_path = lock_path
+        self._file = None
+
+    def try_acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        f = open(self.lock_path, "a+", encoding="utf-8")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        # 調査用にリーダーのプロセスIDを書いておく
+        f.seek(0)
+        f.truncate()
+        f.write(f"{os.getpid()}\n")
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class LeaderScheduler:
+    """リーダーに選ばれたプロセスだけでスケジューラーを動かす"""
+
+    def __init__(self, scheduler, elector: LeaderElector, retry_interval: float = 30.0):
+        """
+        初期化
+
+        Args:
+            scheduler: APSchedulerのスケジューラー（ジョブ登録済み、未開始）
+            elector: リーダー選出に使うロック
+            retry_interval: リーダーでない場合にロック取得を再試行する間隔（秒）
+        """
+        self.scheduler = scheduler
+        self.elector = elector
+        self.retry_interval = retry_interval
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_leader(self) -> bool:
+        """このプロセスでスケジューラーが動いているか"""
+        return self.scheduler.running
+
+    def _try_lead(self) -> bool:
+        """ロックを取得できたらスケジューラーを開始"""
+        if not self.elector.try_acquire():
+            return False
+        self.scheduler.start()
+        print(f"✓ スケジューラーのリーダーになりました（pid={os.getpid()}）")
+        return True
+
+    def _run(self):
+        """リーダーになるまでロック取得を再試行"""
+        while True:
+            time.sleep(self.retry_interval)
+            try:
+                if self._try_lead():
+                    return
+            except Exception as e:
+                print(f"⚠ スケジューラーのリーダー選出に失敗しました（再試行します）: {str(e)}")
+
+    def start(self) -> bool:
+        """
+        リーダー選出を開始（取得できなかった場合はバックグラウンドで待機）
+
+        Returns:
+            すぐにリーダーになった場合True
+        """
+        if self.is_leader or self._try_lead():
+            return True
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="scheduler-leader-election", daemon=True)
+            self._thread.start()
+        return False
@@ -6,45 +6,165 @@ LINE Messaging API連携モジュール
 
 from linebot import LineBotApi
 from linebot.exceptions import LineBotApiError
+from linebot.http_client import RequestsHttpClient, RequestsHttpResponse
 from linebot.models import TextSendMessage
-from typing import List, Dict
-from datetime import datetime, timedelta
+from metrics import LINE_SEND_SECONDS, timed
+from todo import Todo, TodoStatus
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterable, Optional, Tuple, Union
+from datetime import date, datetime, timedelta
 import os
+import threading
 
+import requests
 
-def send_line_message(channel_access_token: str, user_id: str, message: str) -> bool:
+
+# LINE Messaging APIの上限
+MAX_TEXT_LENGTH = 5000  # テキストメッセージ1件あたりの文字数
+MAX_MESSAGES_PER_REQUEST = 5  # 1リクエストで送れるメッセージ数
+MAX_MULTICAST_RECIPIENTS = 500  # マルチキャスト1回あたりの送信先数
+
+# 通知を並行して送信するスレッド数のデフォルト
+DEFAULT_MAX_WORKERS = 4
+
+
+class PooledHttpClient(RequestsHttpClient):
+    """接続を再利用するHTTPクライアント（プロセス内で1つのセッションを共有）"""
+    
+    _session = None
+    _session_lock = threading.Lock()
+    
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        with cls._session_lock:
+            if cls._session is None:
+                cls._session = requests.Session()
+            return cls._session
+    
+    def get(self, url, headers=None, params=None, stream=False, timeout=None):
+        response = self._get_session().get(
+            url, headers=headers, params=params, stream=stream, timeout=timeout or self.timeout
+        )
+        return RequestsHttpResponse(response)
+    
+    def post(self, url, headers=None, data=None, timeout=None):
+        response = self._get_session().post(url, headers=headers, data=data, timeout=timeout or self.timeout)
+        return RequestsHttpResponse(response)
+    
+    def put(self, url, headers=None, data=None, timeout=None):
+        response = self._get_session().put(url, headers=headers, data=data, timeout=timeout or self.timeout)
+        return RequestsHttpResponse(response)
+    
+    def delete(self, url, headers=None, data=None, timeout=None):
+        response = self._get_session().delete(url, headers=headers, data=data, timeout=timeout or self.timeout)
+        return RequestsHttpResponse(response)
+
+
+_line_bot_apis: Dict[str, LineBotApi] = {}
+_line_bot_apis_lock = threading.Lock()
+
+
+def get_line_bot_api(channel_access_token: str) -> LineBotApi:
     """
-    LINE Messaging APIでメッセージを送信
+    チャネルアクセストークンごとのLineBotApiを取得（接続を再利用するため使い回す）
     
     Args:
         channel_access_token: LINE Messaging API チャネルアクセストークン
-        user_id: 送信先ユーザーID
-        message: 送信するメッセージ
     
     Returns:
-        送信成功時True、失敗時False
+        LineBotApiオブジェクト
     """
-    if not channel_access_token:
-        print("LINE Messaging API チャネルアクセストークンが設定されていません")
-        return False
+    with _line_bot_apis_lock:
+        if channel_access_token not in _line_bot_apis:
+            _line_bot_apis[channel_access_token] = LineBotApi(channel_access_token, http_client=PooledHttpClient)
+        return _line_bot_apis[channel_access_token]
+
+
+def parse_recipients(user_id: Union[str, List[str]]) -> List[str]:
+    """
+    送信先ユーザーIDをリストに変換
     
-    if not user_id:
-        print("LINE ユーザーIDが設定されていません")
-        return False
+    Args:
+        user_id: ユーザーID（カンマ区切りで複数指定可）またはそのリスト
     
-    if not message:
-        print("メッセージ本文が空です")
-        return False
+    Returns:
+        重複を除いたユーザーIDのリスト
+    """
+    if isinstance(user_id, str):
+        user_id = user_id.split(',')
+    return list(dict.fromkeys(uid.strip() for uid in user_id if uid and uid.strip()))
+
+
+def split_message(message: str, limit: int = MAX_TEXT_LENGTH) -> List[str]:
+    """
+    メッセージを1件あたりの文字数上限に収まるように分割
+    
+    空行（Todoごとの区切り）の位置で分割し、それでも長い部分は上限の文字数で切る。
+    
+    Args:
+        message: メッセージ
+        limit: 1件あたりの文字数上限
+    
+    Returns:
+        分割したメッセージのリスト
+    """
+    texts = []
+    current = ""
+    for block in message.split("\n\n"):
+        candidate = f"{current}\n\n{block}" if current else block
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            texts.append(current)
+        while len(block) > limit:
+            texts.append(block[:limit])
+            block = block[limit:]
+        current = block
+    if current.strip():
+        texts.append(current)
+    return texts
+
+
+def pack_messages(texts: List[str]) -> List[List[str]]:
+    """
+    メッセージを1リクエストあたりの件数上限ごとにまとめる
+    
+    Args:
+        texts: メッセージのリスト
+    
+    Returns:
+        1リクエスト分ずつのメッセージのリスト
+    """
+    return [texts[i:i + MAX_MESSAGES_PER_REQUEST] for i in range(0, len(texts), MAX_MESSAGES_PER_REQUEST)]
+
+
+def _send_batch(line_bot_api: LineBotApi, recipients: List[str], texts: List[str]) -> bool:
+    """
+    1リクエスト分のメッセージを送信（送信先が複数の場合はマルチキャスト）
     
+    Args:
+        line_bot_api: LineBotApiオブジェクト
+        recipients: 送信先ユーザーIDのリスト
+        texts: メッセージのリスト（最大5件）
+    
+    Returns:
+        送信成功時True、失敗時False
+    """
+    messages = [TextSendMessage(text=text) for text in texts]
     try:
-        line_bot_api = LineBotApi(channel_access_token)
-        response = line_bot_api.push_message(
-            to=user_id,
-            messages=[TextSendMessage(text=message)]
-        )
-        print(f"✓ LINE通知を送信しました: {message[:50]}...")
-        if hasattr(response, "request_id"):
-            print(f"   request_id: {response.request_id}")
+        for i in range(0, len(recipients), MAX_MULTICAST_RECIPIENTS):
+            chunk = recipients[i:i + MAX_MULTICAST_RECIPIENTS]
+            if len(chunk) == 1:
+                with timed(LINE_SEND_SECONDS, kind="push"):
+                    response = line_bot_api.push_message(to=chunk[0], messages=messages)
+            else:
+                with timed(LINE_SEND_SECONDS, kind="multicast"):
+                    response = line_bot_api.multicast(to=chunk, messages=messages)
+            print(f"✓ LINE通知を送信しました（{len(chunk)}人、{len(messages)}件）: {texts[0][:50]}...")
+            if hasattr(response, "request_id"):
+                print(f"   request_id: {response.request_id}")
         return True
     except LineBotApiError as e:
         print(f"✗ LINE通知送信エラー: {e}")
@@ -57,53 +177,142 @@ def send_line_message(channel_access_token: str, user_id: str, message: str) ->
         return False
 
 
-def check_upcoming_todos(todos: List[Dict], days_before: int = 3) -> List[Dict]:
+def send_line_message(channel_access_token: str, user_id: Union[str, List[str]], message: str) -> bool:
     """
-    期日が近づいているTodoを取得
+    LINE Messaging APIでメッセージを送信
+    
+    長いメッセージは複数のメッセージに分割し、1リクエストに最大5件ずつまとめて送る。
     
     Args:
-        todos: Todoのリスト
-        days_before: 何日前から通知するか（デフォルト: 3日前）
+        channel_access_token: LINE Messaging API チャネルアクセストークン
+        user_id: 送信先ユーザーID（カンマ区切りまたはリストで複数指定するとマルチキャスト）
+        message: 送信するメッセージ
     
     Returns:
-        通知対象のTodoリスト
+        送信成功時True、失敗時False
+    """
+    if not channel_access_token:
+        print("LINE Messaging API チャネルアクセストークンが設定されていません")
+        return False
+    
+    recipients = parse_recipients(user_id or "")
+    if not recipients:
+        print("LINE ユーザーIDが設定されていません")
+        return False
+    
+    if not message:
+        print("メッセージ本文が空です")
+        return False
+    
+    line_bot_api = get_line_bot_api(channel_access_token)
+    return all([_send_batch(line_bot_api, recipients, texts) for texts in pack_messages(split_message(message))])
+
+
+class DueDateBuckets:
     """
-    today = datetime.now().date()
-    target_date = today + timedelta(days=days_before)
+    未完了のTodoを期日（日付の序数）ごとにまとめたもの
     
-    upcoming_todos = []
+    Todoを1回だけ走査して振り分けておき、各通知タイミングの対象は
+    期日の範囲を二分探索して取り出します。
+    """
     
-    for todo in todos:
-        # ステータスが「未完了」のもののみ
-        if todo.get('ステータス', '未完了') != '未完了':
-            continue
+    def __init__(self, todos: Iterable[Todo]):
+        """
+        初期化
         
-        # 期日を取得
-        due_date_str = todo.get('期日', '')
-        if not due_date_str:
-            continue
+        Args:
+            todos: Todoのリスト
+        """
+        self.buckets: Dict[int, List[Todo]] = {}
+        self.scanned = 0
+        self.bucketed = 0
+        for todo in todos:
+            self.scanned += 1
+            # ステータスが「未完了」で期日のあるもののみ（日付形式が正しくない場合は0）
+            if todo.status is not TodoStatus.OPEN or not todo.due_ordinal:
+                continue
+            self.buckets.setdefault(todo.due_ordinal, []).append(todo)
+            self.bucketed += 1
+        self._ordinals = sorted(self.buckets)
+    
+    def between(self, first: int, last: int) -> List[Todo]:
+        """
+        期日が指定範囲内のTodoを期日順に取得
         
-        try:
-            # 期日を日付型に変換
-            due_date = datetime.strptime(due_date_str, '%Y-%m-%d').date()
-            
-            # 期日が指定日数以内の場合
-            if due_date <= target_date and due_date >= today:
-                upcoming_todos.append(todo)
-        except ValueError:
-            # 日付形式が正しくない場合はスキップ
-            continue
+        Args:
+            first: 範囲の開始日（date.toordinal()の値、この日を含む）
+            last: 範囲の終了日（date.toordinal()の値、この日を含む）
+        
+        Returns:
+            Todoのリスト
+        """
+        todos = []
+        for ordinal in self._ordinals[bisect_left(self._ordinals, first):bisect_right(self._ordinals, last)]:
+            todos.extend(self.buckets[ordinal])
+        return todos
+    
+    def within_days(self, days_before: int, today: Optional[date] = None) -> List[Todo]:
+        """
+        期日が今日から指定日数以内のTodoを取得
+        
+        Args:
+            days_before: 何日前から通知するか
+            today: 基準日（省略時は今日）
+        
+        Returns:
+            Todoのリスト
+        """
+        first = (today or date.today()).toordinal()
+        return self.between(first, first + days_before)
+    
+    def within_hours(self, hours_before: int, now: Optional[datetime] = None) -> List[Todo]:
+        """
+        期限（期日の終わり）が現在から指定時間以内のTodoを取得
+        
+        Args:
+            hours_before: 何時間前から通知するか
+            now: 基準日時（省略時は現在）
+        
+        Returns:
+            Todoのリスト
+        """
+        now = now or datetime.now()
+        # 期日の翌日0時が期限なので、期限が範囲内に入る最後の期日は範囲の終わりの前日
+        last = (now + timedelta(hours=hours_before)).date().toordinal() - 1
+        return self.between(now.date().toordinal(), last)
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """走査の統計（走査したTodo数、振り分けたTodo数、期日の種類数）"""
+        return {
+            'scanned': self.scanned,
+            'bucketed': self.bucketed,
+            'days': len(self._ordinals)
+        }
+
+
+def check_upcoming_todos(todos: List[Todo], days_before: int = 3) -> List[Todo]:
+    """
+    期日が近づいているTodoを取得
     
-    return upcoming_todos
+    Args:
+        todos: Todoのリスト
+        days_before: 何日前から通知するか（デフォルト: 3日前）
+    
+    Returns:
+        通知対象のTodoリスト（期日順）
+    """
+    return DueDateBuckets(todos).within_days(days_before)
 
 
-def format_notification_message(todos: List[Dict], days_before: int) -> str:
+def format_notification_message(todos: List[Todo], days_before: int, hours_before: Optional[int] = None) -> str:
     """
     通知メッセージをフォーマット
     
     Args:
         todos: 通知対象のTodoリスト
         days_before: 何日前の通知か
+        hours_before: 何時間前の通知か（指定した場合はdays_beforeより優先）
     
     Returns:
         フォーマットされたメッセージ
@@ -111,7 +320,9 @@ def format_notification_message(todos: List[Dict], days_before: int) -> str:
     if not todos:
         return ""
     
-    if days_before == 0:
+    if hours_before is not None:
+        date_text = f"{hours_before}時間以内"
+    elif days_before == 0:
         date_text = "今日"
     elif days_before == 1:
         date_text = "明日"
@@ -128,29 +339,36 @@ def format_notification_message(todos: List[Dict], days_before: int) -> str:
     message = f"📋 Todo期日通知（{date_text}）\n\n"
     
     for todo in todos:
-        priority = todo.get('重要度', '中')
+        priority = todo.priority
         emoji = priority_emoji.get(priority, '🟡')
-        message += f"{emoji} {todo.get('タイトル', 'タイトルなし')}\n"
-        message += f"   期日: {todo.get('期日', '')}\n"
+        message += f"{emoji} {todo.title or 'タイトルなし'}\n"
+        message += f"   期日: {todo.due_date}\n"
         message += f"   重要度: {priority}\n\n"
     
     return message
 
 
 def send_todo_notifications(
-    todos: List[Dict],
+    todos: List[Todo],
     channel_access_token: str,
     user_id: str,
-    days_before_list: List[int] = [3, 1, 0]
+    days_before_list: List[int] = [3, 1, 0],
+    hours_before_list: List[int] = [],
+    max_workers: int = DEFAULT_MAX_WORKERS
 ) -> Dict[str, bool]:
     """
     Todoの期日通知を送信
     
+    Todoは1回だけ走査して期日ごとに振り分け、各通知タイミングの対象はそこから取り出す。
+    各タイミングのメッセージは1リクエストに最大5件ずつまとめ、スレッドプールで並行して送信する。
+    
     Args:
         todos: Todoのリスト
         channel_access_token: LINE Messaging API チャネルアクセストークン
-        user_id: 送信先ユーザーID
+        user_id: 送信先ユーザーID（カンマ区切りまたはリストで複数指定するとマルチキャスト）
         days_before_list: 通知する日数リスト（デフォルト: [3, 1, 0] = 3日前、1日前、当日）
+        hours_before_list: 通知する時間数リスト（期日の終わりまでの時間、デフォルト: なし）
+        max_workers: 並行して送信するスレッド数の上限
     
     Returns:
         各通知タイミングの送信結果（辞書形式）
@@ -161,20 +379,46 @@ def send_todo_notifications(
         print("LINE Messaging API チャネルアクセストークンが設定されていません")
         return results
     
-    if not user_id:
+    recipients = parse_recipients(user_id or "")
+    if not recipients:
         print("LINE ユーザーIDが設定されていません")
         return results
     
-    for days_before in days_before_list:
-        upcoming_todos = check_upcoming_todos(todos, days_before)
-        
+    buckets = DueDateBuckets(todos)
+    stats = buckets.stats
+    print(f"通知チェック: {stats['scanned']}件を走査（期日のある未完了 {stats['bucketed']}件、期日 {stats['days']}種類）")
+    
+    windows = [
+        (f"{days_before}日前" if days_before > 0 else "当日", buckets.within_days(days_before), days_before, None)
+        for days_before in days_before_list
+    ] + [
+        (f"{hours_before}時間前", buckets.within_hours(hours_before), 0, hours_before)
+        for hours_before in hours_before_list
+    ]
+    
+    # 各タイミングのメッセージを分割し、タイミングをまたいでリクエストにまとめる
+    chunks: List[Tuple[str, str]] = []
+    for timing, upcoming_todos, days_before, hours_before in windows:
         if upcoming_todos:
-            message = format_notification_message(upcoming_todos, days_before)
-            if message:
-                success = send_line_message(channel_access_token, user_id, message)
-                results[f"{days_before}日前" if days_before > 0 else "当日"] = success
+            message = format_notification_message(upcoming_todos, days_before, hours_before)
+            chunks.extend((timing, text) for text in split_message(message))
         else:
-            results[f"{days_before}日前" if days_before > 0 else "当日"] = None
+            results[timing] = None
+    
+    batches = pack_messages(chunks)
+    if not batches:
+        return results
+    
+    line_bot_api = get_line_bot_api(channel_access_token)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+        futures = [
+            (batch, executor.submit(_send_batch, line_bot_api, recipients, [text for _, text in batch]))
+            for batch in batches
+        ]
+        for batch, future in futures:
+            success = future.result()
+            for timing, _ in batch:
+                results[timing] = results.get(timing, True) and success
     
     return results
 
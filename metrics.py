@@ -0,0 +1,203 @@
+"""
+メトリクスモジュール
+
+リクエストの処理時間、Sheets APIの呼び出し回数・時間・転送量、LINE通知の送信時間、
+スケジューラーのジョブの実行時間をPrometheusのメトリクスとして記録します。
+
+gunicornで複数ワーカーを動かす場合は、環境変数PROMETHEUS_MULTIPROC_DIRに
+書き込み可能な空のディレクトリを指定してください（gunicorn.conf.pyが起動時に中身を削除します）。
+全ワーカーの値を合算して/metricsで出力します。
+"""
+
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+
+# 回数・転送量のヒストグラムのバケット
+CALL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+BYTES_BUCKETS = (0, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'todolist_http_request_duration_seconds',
+    'リクエストの処理時間（秒）',
+    ['route', 'method', 'status']
+)
+REQUEST_SHEETS_CALLS = Histogram(
+    'todolist_request_sheets_api_calls',
+    '1リクエストあたりのSheets API呼び出し回数',
+    ['route'],
+    buckets=CALL_COUNT_BUCKETS
+)
+REQUEST_SHEETS_BYTES = Histogram(
+    'todolist_request_sheets_api_bytes',
+    '1リクエストあたりのSheets APIの転送量（送受信の合計バイト数）',
+    ['route'],
+    buckets=BYTES_BUCKETS
+)
+REQUEST_SHEETS_SECONDS = Histogram(
+    'todolist_request_sheets_api_seconds',
+    '1リクエストのうちSheets APIの応答を待った時間（秒）',
+    ['route']
+)
+SHEETS_CALLS = Counter(
+    'todolist_sheets_api_calls_total',
+    'Sheets API（Drive APIを含む）の呼び出し回数',
+    ['method', 'outcome']
+)
+SHEETS_CALL_SECONDS = Histogram(
+    'todolist_sheets_api_call_duration_seconds',
+    'Sheets API呼び出し1回の時間（秒、再試行の待ちを含む）',
+    ['method']
+)
+SHEETS_BYTES = Counter(
+    'todolist_sheets_api_bytes_total',
+    'Sheets APIの転送量（バイト数）',
+    ['direction']
+)
+SHEETS_THROTTLE_SECONDS = Histogram(
+    'todolist_sheets_api_throttle_wait_seconds',
+    'クォータ制御（トークンバケット）で呼び出しを待たせた時間（秒）',
+    ['priority']
+)
+SHEETS_RETRIES = Counter(
+    'todolist_sheets_api_retries_total',
+    'クォータ超過・一時的なエラーによるSheets APIの再試行回数',
+    ['status']
+)
+SNAPSHOT_LOAD_SECONDS = Histogram(
+    'todolist_sheets_snapshot_load_seconds',
+    'シートの読み込み（スナップショットの作り直し）にかかった時間（秒）',
+    ['columns']
+)
+LINE_SEND_SECONDS = Histogram(
+    'todolist_line_send_duration_seconds',
+    'LINE通知の送信1回（push/multicast）の時間（秒）',
+    ['kind', 'outcome']
+)
+SCHEDULER_JOB_SECONDS = Histogram(
+    'todolist_scheduler_job_duration_seconds',
+    'スケジューラーのジョブの実行時間（秒）',
+    ['job', 'outcome']
+)
+
+
+class RequestStats:
+    """1リクエストの間のSheets APIの呼び出し回数・転送量・待ち時間"""
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def add_call(self, seconds: float):
+        self.calls += 1
+        self.seconds += seconds
+
+    def add_bytes(self, size: int):
+        self.bytes += size
+
+
+# 処理中のリクエストの集計
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    'todolist_request_stats', default=None
+)
+
+
+def start_request() -> RequestStats:
+    """リクエストの集計を開始"""
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def finish_request(route: str, method: str, status: int, seconds: float):
+    """
+    リクエストの処理時間とSheets APIの集計を記録
+
+    Args:
+        route: ルールのパス（/edit/<int:todo_id> など、IDごとにラベルが増えないようにする）
+        method: HTTPメソッド
+        status: ステータスコード
+        seconds: 処理時間（秒）
+    """
+    HTTP_REQUEST_SECONDS.labels(route, method, str(status)).observe(seconds)
+    stats = _request_stats.get()
+    if stats is not None:
+        REQUEST_SHEETS_CALLS.labels(route).observe(stats.calls)
+        REQUEST_SHEETS_BYTES.labels(route).observe(stats.bytes)
+        REQUEST_SHEETS_SECONDS.labels(route).observe(stats.seconds)
+        _request_stats.set(None)
+
+
+def record_sheets_call(method: str, seconds: float, outcome: str = 'success'):
+    """Sheets APIの呼び出しを記録（処理中のリクエストがあればその集計にも加える）"""
+    SHEETS_CALLS.labels(method, outcome).inc()
+    SHEETS_CALL_SECONDS.labels(method).observe(seconds)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.add_call(seconds)
+
+
+def _record_response_bytes(response, *args, **kwargs):
+    """requestsのレスポンスフック（送受信のバイト数を記録）"""
+    body = response.request.body if response.request is not None else None
+    sent = len(body) if body else 0
+    received = len(response.content or b'')
+    SHEETS_BYTES.labels('sent').inc(sent)
+    SHEETS_BYTES.labels('received').inc(received)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.add_bytes(sent + received)
+    return response
+
+
+def instrument_session(session):
+    """gspreadが使うrequestsのセッションに転送量を記録するフックを追加"""
+    if session is not None and _record_response_bytes not in session.hooks['response']:
+        session.hooks['response'].append(_record_response_bytes)
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels):
+    """
+    ブロックの実行時間をヒストグラムに記録（outcomeラベルには成功ならsuccess、例外ならerrorを付ける）
+
+    Args:
+        histogram: outcomeラベルを持つヒストグラム
+        **labels: outcome以外のラベル
+    """
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'success'
+    finally:
+        histogram.labels(outcome=outcome, **labels).observe(time.perf_counter() - started)
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """
+    Prometheusのテキスト形式でメトリクスを出力
+
+    Returns:
+        (本文, Content-Type) のタプル
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # 全ワーカーがディレクトリに書き出した値を合算する
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,109 @@
+"""
+スプレッドシートのスキーマ移行モジュール
+
+旧形式のシートを現在の形式（HEADERS）に移行します。移行後の行はすべてメモリ上で組み立て、
+まとめて数回のbatch_updateで書き込みます。ヘッダー行は最後に書き換えるため、
+途中で中断しても次回の起動時に続きから（移行済みの行はそのまま）やり直せます。
+"""
+
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from storage import HEADERS, PRIORITIES, STATUSES
+
+
+# 現在のスキーマのバージョン
+SCHEMA_VERSION = 2
+
+# 1回のbatch_updateで書き込む行数
+MIGRATION_CHUNK_ROWS = 1000
+
+# バージョン1（6カラム）のヘッダー
+HEADERS_V1 = ["ID", "タイトル", "内容", "期日", "作成日時", "更新日時"]
+
+
+def _migrate_v1_row(row: List[str]) -> List[str]:
+    """バージョン1の行を9カラムの行に変換（移行済みの行はそのまま返す）"""
+    if len(row) >= len(HEADERS) and row[4] in PRIORITIES and row[5] in STATUSES:
+        return row[:len(HEADERS)]
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return [
+        row[0],
+        row[1] if len(row) > 1 else "",
+        row[2] if len(row) > 2 else "",
+        row[3] if len(row) > 3 else "",
+        "中",  # 重要度（デフォルト）
+        "未完了",  # ステータス（デフォルト）
+        row[4] if len(row) > 4 and row[4] else now,  # 作成日時
+        row[5] if len(row) > 5 and row[5] else now,  # 更新日時
+        ""  # 完了日時（空）
+    ]
+
+
+# (移行元のバージョン, 移行元のヘッダー, 行の変換関数) をバージョン順に並べたもの
+MIGRATIONS: List[Tuple[int, List[str], Callable[[List[str]], List[str]]]] = [
+    (1, HEADERS_V1, _migrate_v1_row),
+]
+
+
+def detect_schema_version(header: List[str]) -> Optional[int]:
+    """
+    ヘッダー行からスキーマのバージョンを判定
+
+    get_all_values()は全行を最も長い行に合わせて空文字で埋めるため、
+    移行が途中で中断されたシートでは旧形式のヘッダーの後ろに空のセルが付く。
+    末尾の空のセルを除いてから比較する。
+
+    Args:
+        header: シートの1行目
+
+    Returns:
+        バージョン（判定できない場合はNone）
+    """
+    header = list(header)
+    while header and header[-1] == "":
+        header.pop()
+    if header[:len(HEADERS)] == HEADERS:
+        return SCHEMA_VERSION
+    for version, headers, _ in MIGRATIONS:
+        if header == headers:
+            return version
+    return None
+
+
+def migrate_sheet(worksheet, all_values: List[List[str]]) -> bool:
+    """
+    シートを現在のスキーマに移行
+
+    データ行をMIGRATION_CHUNK_ROWS行ずつbatch_updateで書き込み、最後にヘッダー行を書き換える。
+
+    Args:
+        worksheet: gspread.Worksheetオブジェクト
+        all_values: シートの全セルの値（1行目はヘッダー）
+
+    Returns:
+        移行した場合True（移行が不要な場合False）
+    """
+    version = detect_schema_version(all_values[0])
+    if version is None or version >= SCHEMA_VERSION:
+        return False
+
+    rows = [list(row) for row in all_values[1:]]
+    for from_version, _, migrate_row in MIGRATIONS:
+        if from_version < version:
+            continue
+        # IDが存在する行のみ変換
+        rows = [migrate_row(row) if len(row) >= 4 and row[0] else row for row in rows]
+
+    # 行番号を保ったまま、移行後の行を9カラムに揃えて書き込む
+    rows = [(row + [""] * len(HEADERS))[:len(HEADERS)] for row in rows]
+    for start in range(0, len(rows), MIGRATION_CHUNK_ROWS):
+        chunk = rows[start:start + MIGRATION_CHUNK_ROWS]
+        first = start + 2  # ヘッダーを除く、行番号は2から
+        worksheet.batch_update([{"range": f"A{first}:I{first + len(chunk) - 1}", "values": chunk}])
+        print(f"✓ スキーマ移行: {start + len(chunk)}/{len(rows)}行を書き込みました")
+
+    # ヘッダー行は最後に書き換える（途中で中断した場合は次回やり直す）
+    worksheet.update("A1:I1", [HEADERS])
+    print(f"✓ スキーマをバージョン{version}からバージョン{SCHEMA_VERSION}に移行しました")
+    return True
@@ -0,0 +1,77 @@
+"""
+描画済みページのキャッシュモジュール
+
+一覧画面のHTMLを表示条件（並び替え・絞り込み・ページ）ごとに保持し、
+データのバージョンが変わるまで再描画せずに返します。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class RenderCache:
+    """データのバージョンごとに描画済みのHTMLを保持するLRUキャッシュ"""
+
+    def __init__(self, max_entries: int = 256):
+        """
+        初期化
+
+        Args:
+            max_entries: 保持するページ数の上限（0以下でキャッシュ無効）
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        # 保持しているページのデータのバージョン
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version: Optional[str], key: Hashable) -> Optional[str]:
+        """
+        描画済みのHTMLを取得
+
+        Args:
+            version: 現在のデータのバージョン（Noneの場合はキャッシュしない）
+            key: 表示条件のタプル
+
+        Returns:
+            HTML（キャッシュにない場合はNone）
+        """
+        if version is None or self.max_entries <= 0:
+            return None
+        with self._lock:
+            html = self._entries.get(key) if version == self._version else None
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def put(self, version: Optional[str], key: Hashable, html: str):
+        """
+        描画したHTMLを保存（バージョンが変わった場合は古いページをすべて破棄）
+
+        Args:
+            version: 描画に使ったデータを読み込む前に取得したバージョン
+            key: 表示条件のタプル
+            html: 描画したHTML
+        """
+        if version is None or self.max_entries <= 0:
+            return
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """すべてのページを破棄"""
+        with self._lock:
+            self._entries.clear()
+            self._version = None
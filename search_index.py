@@ -0,0 +1,161 @@
+"""
+全文検索インデックスモジュール
+
+タイトルと内容を文字単位のバイグラム（2文字ずつ）に分割した転置インデックスで、
+形態素解析なしに日本語のTodoを検索します。Todoの追加・更新・削除のたびに差分だけを反映します。
+"""
+
+import unicodedata
+from typing import Dict, Iterable, List, Set, Tuple
+
+from todo import Todo
+
+
+# タイトルに一致した場合の重み（内容に一致した場合は1）
+TITLE_WEIGHT = 3
+
+
+def normalize_text(text: str) -> str:
+    """検索用に正規化（全角英数字・半角カナの統一、英字は小文字）"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def split_query(query: str) -> List[str]:
+    """検索語を空白（全角空白を含む）で分割して正規化"""
+    return [term for term in normalize_text(query).split() if term]
+
+
+def ngrams(text: str) -> Set[str]:
+    """
+    文字のバイグラムと1文字のユニグラムを取得（1文字の検索語にも一致させるため）
+
+    Args:
+        text: 正規化済みの文字列
+
+    Returns:
+        n-gramの集合（空白をまたぐものは含まない）
+    """
+    grams: Set[str] = set()
+    for word in text.split():
+        grams.update(word)
+        grams.update(word[i:i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+def query_grams(term: str) -> Set[str]:
+    """検索語1つを絞り込むn-gram（2文字以上はバイグラムのみ）"""
+    if len(term) == 1:
+        return {term}
+    return {term[i:i + 2] for i in range(len(term) - 1)}
+
+
+def match_score(title: str, content: str, terms: List[str]) -> int:
+    """
+    正規化済みのタイトル・内容が検索語をすべて含む場合の関連度
+
+    Returns:
+        関連度（出現回数をタイトルは重み付けして合計、含まない検索語がある場合は0）
+    """
+    score = 0
+    for term in terms:
+        term_score = title.count(term) * TITLE_WEIGHT + content.count(term)
+        if term_score == 0:
+            return 0
+        score += term_score
+    return score
+
+
+class BigramSearchIndex:
+    """タイトル・内容のバイグラム転置インデックス"""
+
+    def __init__(self, todos: Iterable[Todo] = ()):
+        """
+        初期化
+
+        Args:
+            todos: 最初に登録するTodo
+        """
+        # n-gram → TodoのIDの集合
+        self._postings: Dict[str, Set[int]] = {}
+        # ID → 正規化済みの (タイトル, 内容)（一致の確認と関連度の計算に使う）
+        self._documents: Dict[int, Tuple[str, str]] = {}
+        for todo in todos:
+            self.add(todo)
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, todo: Todo):
+        """Todoを登録（同じIDが登録済みの場合は置き換える）"""
+        if todo.id in self._documents:
+            self.remove(todo.id)
+        title, content = normalize_text(todo.title), normalize_text(todo.content)
+        self._documents[todo.id] = (title, content)
+        for gram in ngrams(title) | ngrams(content):
+            self._postings.setdefault(gram, set()).add(todo.id)
+
+    def remove(self, todo_id: int):
+        """Todoを取り除く（登録されていない場合は何もしない）"""
+        document = self._documents.pop(todo_id, None)
+        if document is None:
+            return
+        for gram in ngrams(document[0]) | ngrams(document[1]):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(todo_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def replace(self, old: Todo = None, new: Todo = None):
+        """
+        Todoの変更を反映
+
+        Args:
+            old: 変更前のTodo（新規追加の場合はNone）
+            new: 変更後のTodo（削除の場合はNone）
+        """
+        if new is None:
+            if old is not None:
+                self.remove(old.id)
+            return
+        if old is not None and old.id != new.id:
+            self.remove(old.id)
+        if old is None or old.title != new.title or old.content != new.content or new.id not in self._documents:
+            self.add(new)
+
+    def search(self, query: str) -> List[int]:
+        """
+        検索語をすべて含むTodoのIDを関連度の高い順に取得
+
+        転置インデックスの積集合で候補を絞り込み、候補だけを部分一致で確認する。
+
+        Args:
+            query: 検索語（空白区切りで複数指定するとAND検索）
+
+        Returns:
+            TodoのIDのリスト（同じ関連度の場合はIDの小さい順）
+        """
+        terms = split_query(query)
+        if not terms:
+            return []
+        grams = set()
+        for term in terms:
+            grams |= query_grams(term)
+        # 該当件数の少ないn-gramから積集合を取る
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        if not postings or not postings[0]:
+            return []
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates &= ids
+            if not candidates:
+                return []
+
+        scored = []
+        for todo_id in candidates:
+            title, content = self._documents[todo_id]
+            score = match_score(title, content, terms)
+            if score:
+                scored.append((-score, todo_id))
+        scored.sort()
+        return [todo_id for _, todo_id in scored]
@@ -0,0 +1,225 @@
+"""
+Google Sheets APIクォータ制御モジュール
+
+gspreadの呼び出しをトークンバケットで間引き、クォータ超過（429）や
+一時的なサーバーエラーはジッター付き指数バックオフで再試行します。
+サーバーエラーは書き込みが反映済みの場合があるため、何度実行しても結果が同じ
+呼び出し（読み込みと値の上書き）だけを再試行します。
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import gspread
+
+from metrics import SHEETS_RETRIES, SHEETS_THROTTLE_SECONDS, record_sheets_call
+
+
+# 再試行するHTTPステータスコード（クォータ超過と一時的なサーバーエラー）
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# どの呼び出しでも再試行するHTTPステータスコード（クォータ超過はリクエストが処理されていない）
+ALWAYS_RETRYABLE_STATUS_CODES = {429}
+
+# サーバーエラーでも再試行するメソッド（読み込みと、同じ値で上書きするだけの書き込み）
+# 行の追加・削除やワークシートの追加は、反映済みのまま失敗が返ると重複・削除しすぎになるため含めない
+IDEMPOTENT_METHODS = {
+    "open_by_key", "worksheet", "worksheets", "get_worksheet", "get_lastUpdateTime",
+    "get", "batch_get", "get_all_values", "get_all_records", "get_values",
+    "col_values", "row_values", "acell", "cell",
+    "update", "batch_update", "clear", "format",
+}
+
+_priority = threading.local()
+
+
+@contextmanager
+def background_priority():
+    """
+    このブロック内のAPI呼び出しをバックグラウンド扱いにする
+
+    通知ジョブや遅延書き込みなど、ユーザーを待たせない処理で使用します。
+    バックグラウンドの呼び出しは、画面表示などの呼び出しのために残りトークンを譲ります。
+    """
+    previous = getattr(_priority, "background", False)
+    _priority.background = True
+    try:
+        yield
+    finally:
+        _priority.background = previous
+
+
+def is_background() -> bool:
+    """現在のスレッドがバックグラウンド扱いか"""
+    return getattr(_priority, "background", False)
+
+
+def is_idempotent(func) -> bool:
+    """
+    何度実行しても結果が同じ呼び出しか（サーバーエラーで再試行してよいか）
+
+    Spreadsheet.batch_update（行の削除など）はWorksheet.batch_update（値の上書き）と同じ名前のため、
+    呼び出し先のオブジェクトで区別する。
+    """
+    if getattr(func, "__name__", None) not in IDEMPOTENT_METHODS:
+        return False
+    return not (func.__name__ == "batch_update" and isinstance(getattr(func, "__self__", None), gspread.Spreadsheet))
+
+
+class TokenBucket:
+    """優先度付きトークンバケット"""
+
+    def __init__(self, rate_per_minute: float, capacity: float, background_reserve: float):
+        """
+        初期化
+
+        Args:
+            rate_per_minute: 1分あたりに補充するトークン数
+            capacity: バケットの最大トークン数（瞬間的に許容する呼び出し数）
+            background_reserve: バックグラウンドの呼び出しが手を付けずに残すトークン数
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.background_reserve = min(background_reserve, capacity - 1)
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._foreground_waiting = 0
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self, background: bool = False):
+        """
+        トークンを1つ取得（足りない場合は補充されるまで待つ）
+
+        Args:
+            background: Trueの場合、フォアグラウンドの待ちがなく予備分を超えるトークンがあるときだけ取得
+        """
+        with self._cond:
+            if not background:
+                self._foreground_waiting += 1
+            try:
+                while True:
+                    self._refill()
+                    floor = self.background_reserve if background else 0
+                    if self._tokens >= 1 + floor and (not background or self._foreground_waiting == 0):
+                        self._tokens -= 1
+                        return
+                    wait = max((1 + floor - self._tokens) / self.rate, 0.01)
+                    self._cond.wait(timeout=wait)
+            finally:
+                if not background:
+                    self._foreground_waiting -= 1
+                    self._cond.notify_all()
+
+
+class QuotaAwareClient:
+    """クォータを考慮してgspreadを呼び出すクライアント"""
+
+    def __init__(
+        self,
+        requests_per_minute: float = 60,
+        burst: float = 10,
+        background_reserve: float = 3,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 32.0
+    ):
+        """
+        初期化
+
+        Args:
+            requests_per_minute: 1分あたりのAPI呼び出し上限（プロセス単位）
+            burst: 瞬間的に許容する呼び出し数
+            background_reserve: バックグラウンド処理が残しておくトークン数
+            max_retries: 429などで再試行する最大回数（サーバーエラーは読み込みと値の上書きだけ再試行）
+            base_delay: バックオフの初期待ち時間（秒）
+            max_delay: バックオフの最大待ち時間（秒）
+        """
+        self.bucket = TokenBucket(requests_per_minute, burst, background_reserve)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def call(self, func, *args, **kwargs):
+        """
+        API呼び出しをクォータ制御付きで実行
+
+        Args:
+            func: gspreadのメソッド
+            *args, **kwargs: funcに渡す引数
+
+        Returns:
+            funcの戻り値
+        """
+        attempt = 0
+        method = getattr(func, "__name__", "unknown")
+        retryable = RETRYABLE_STATUS_CODES if is_idempotent(func) else ALWAYS_RETRYABLE_STATUS_CODES
+        started = time.perf_counter()
+        while True:
+            waited_from = time.perf_counter()
+            background = is_background()
+            self.bucket.acquire(background=background)
+            SHEETS_THROTTLE_SECONDS.labels("background" if background else "foreground").observe(
+                time.perf_counter() - waited_from
+            )
+            try:
+                result = func(*args, **kwargs)
+                record_sheets_call(method, time.perf_counter() - started)
+                return result
+            except gspread.exceptions.APIError as e:
+                if e.code not in retryable or attempt >= self.max_retries:
+                    record_sheets_call(method, time.perf_counter() - started, outcome="error")
+                    raise
+                SHEETS_RETRIES.labels(str(e.code)).inc()
+                # フルジッター付き指数バックオフ
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                print(f"⚠ Sheets APIエラー（{e.code}）のため{delay:.1f}秒後に再試行します")
+                time.sleep(delay)
+                attempt += 1
+
+    def wrap(self, obj):
+        """
+        gspreadのClient/Spreadsheet/Worksheetを、メソッド呼び出しがクォータ制御されるように包む
+
+        Args:
+            obj: gspreadのオブジェクト
+
+        Returns:
+            同じインターフェースを持つラッパー
+        """
+        if isinstance(obj, _Throttled):
+            return obj
+        return _Throttled(obj, self)
+
+
+# 包んだ結果も包み直す型（Spreadsheet.worksheet() などの戻り値）
+_WRAPPED_TYPES = (gspread.Client, gspread.Spreadsheet, gspread.Worksheet)
+
+
+class _Throttled:
+    """メソッド呼び出しをQuotaAwareClient経由にするラッパー"""
+
+    def __init__(self, obj, client: QuotaAwareClient):
+        self._obj = obj
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if isinstance(attr, _WRAPPED_TYPES):
+            return _Throttled(attr, self._client)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = self._client.call(attr, *args, **kwargs)
+            if isinstance(result, _WRAPPED_TYPES):
+                return _Throttled(result, self._client)
+            return result
+
+        return call
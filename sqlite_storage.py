@@ -0,0 +1,498 @@
+"""
+SQLiteストレージモジュール
+
+TodoデータをローカルのSQLiteで管理し、変更をGoogleスプレッドシートへ非同期に複製します。
+"""
+
+import fcntl
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from storage import (
+    DEFAULT_PER_PAGE,
+    EXPORT_CHUNK_SIZE,
+    HEADERS,
+    TodoStorage,
+    build_completed_row,
+    build_imported_row,
+    build_new_row,
+    build_updated_row,
+)
+from todo import Todo
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS todos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL DEFAULT '',
+    content TEXT NOT NULL DEFAULT '',
+    due_date TEXT NOT NULL DEFAULT '',
+    priority TEXT NOT NULL DEFAULT '中',
+    status TEXT NOT NULL DEFAULT '未完了',
+    created_at TEXT NOT NULL DEFAULT '',
+    updated_at TEXT NOT NULL DEFAULT '',
+    completed_at TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_todos_due_date ON todos (due_date);
+CREATE INDEX IF NOT EXISTS idx_todos_status ON todos (status);
+CREATE INDEX IF NOT EXISTS idx_todos_priority ON todos (priority);
+
+-- スプレッドシートへ複製する変更（ライトビハインドのジャーナルと同じ形式）
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL
+);
+"""
+
+# HEADERSの順に並べたカラム名
+COLUMNS = ["id", "title", "content", "due_date", "priority", "status", "created_at", "updated_at", "completed_at"]
+
+# 並び替え方法ごとのORDER BY句（同順位は登録順）
+PRIORITY_RANK_SQL = "CASE priority WHEN '高' THEN 1 WHEN '低' THEN 3 ELSE 2 END"
+ORDER_BY = {
+    'default': "id",
+    'priority': f"{PRIORITY_RANK_SQL}, id",
+    'due_date': "due_date, id",
+    'priority_due': f"{PRIORITY_RANK_SQL}, due_date, id",
+}
+
+
+class SQLiteTodoStorage(TodoStorage):
+    """SQLiteでTodoデータを管理するクラス"""
+
+    def __init__(self, db_path: str):
+        """
+        初期化
+
+        Args:
+            db_path: SQLiteデータベースファイルのパス
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """スレッドごとの接続を取得"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            # 複数ワーカーからの読み込みと書き込みを並行させる
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_row(values: Tuple) -> List[str]:
+        """SELECT結果を9カラムの行に変換"""
+        return [str(values[0])] + list(values[1:])
+
+    def _select_row(self, conn: sqlite3.Connection, todo_id: int) -> Optional[List[str]]:
+        """IDから行を取得"""
+        values = conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM todos WHERE id = ?", (todo_id,)
+        ).fetchone()
+        return self._to_row(values) if values else None
+
+    @staticmethod
+    def _record_op(conn: sqlite3.Connection, op: Dict):
+        """複製用のoutboxに操作を記録（呼び出し元と同じトランザクション内）"""
+        conn.execute("INSERT INTO outbox (op) VALUES (?)", (json.dumps(op, ensure_ascii=False),))
+
+    def _save_row(self, conn: sqlite3.Connection, row: List[str]):
+        """行を保存し、複製用のoutboxにも記録"""
+        conn.execute(
+            f"INSERT OR REPLACE INTO todos ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            [int(row[0])] + row[1:]
+        )
+        self._record_op(conn, {"op": "put", "id": int(row[0]), "row": row})
+
+    def is_empty(self) -> bool:
+        """Todoが1件も保存されていないか"""
+        return self._conn().execute("SELECT 1 FROM todos LIMIT 1").fetchone() is None
+
+    def import_records(self, todos: List[Todo]):
+        """
+        既存のTodoを取り込む（outboxには記録しない）
+
+        Args:
+            todos: Todoのリスト
+        """
+        with self._conn() as conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO todos ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [[todo.id] + todo.to_row()[1:] for todo in todos]
+            )
+
+    def get_all_records(self) -> List[Todo]:
+        """
+        すべてのTodoを取得
+
+        Returns:
+            Todoのリスト
+        """
+        rows = self._conn().execute(f"SELECT {', '.join(COLUMNS)} FROM todos ORDER BY id").fetchall()
+        return [Todo.from_row(self._to_row(values)) for values in rows]
+
+    def iter_records(self, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Todo]:
+        """
+        すべてのTodoをID順に取得（エクスポート用、chunk_size件ずつ読み込む）
+
+        Args:
+            chunk_size: 1回に読み込む件数
+
+        Returns:
+            Todoのイテレーター
+        """
+        cursor = self._conn().execute(f"SELECT {', '.join(COLUMNS)} FROM todos ORDER BY id")
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for values in rows:
+                    yield Todo.from_row(self._to_row(values))
+        finally:
+            cursor.close()
+
+    def get_page(
+        self,
+        sort_by: str = 'default',
+        filter_status: str = 'all',
+        page: int = 1,
+        per_page: int = DEFAULT_PER_PAGE,
+        columns: Optional[List[str]] = None
+    ) -> Tuple[List[Todo], bool, Optional[int]]:
+        """
+        一覧の1ページ分のTodoを取得（インデックスを使って該当ページだけを読み込む）
+
+        Args:
+            sort_by: 並び替え方法（default/priority/due_date/priority_due）
+            filter_status: ステータスフィルター（all/未完了/完了）
+            page: ページ番号（1から）
+            per_page: 1ページあたりの件数
+            columns: 必要なカラム名のリスト（Noneの場合はすべて）
+
+        Returns:
+            (Todoのリスト, 次のページがあるか, 該当件数) のタプル
+        """
+        where, params = "", []
+        if filter_status != 'all':
+            where, params = "WHERE status = ?", [filter_status]
+        conn = self._conn()
+        total = conn.execute(f"SELECT COUNT(*) FROM todos {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM todos {where} "
+            f"ORDER BY {ORDER_BY.get(sort_by, ORDER_BY['default'])} LIMIT ? OFFSET ?",
+            params + [per_page, (page - 1) * per_page]
+        ).fetchall()
+        todos = [Todo.from_row(self._to_row(values)) for values in rows]
+        return todos, page * per_page < total, total
+
+    def get_projected_records(self, columns: List[str]) -> List[Todo]:
+        """
+        すべてのTodoを指定したカラムだけ読み込んで取得（SELECTするカラムを絞る）
+
+        Args:
+            columns: 必要なカラム名のリスト（それ以外のカラムは空になる）
+
+        Returns:
+            Todoのリスト
+        """
+        indices = sorted({0} | {HEADERS.index(column) for column in columns})
+        rows = self._conn().execute(
+            f"SELECT {', '.join(COLUMNS[i] for i in indices)} FROM todos ORDER BY id"
+        ).fetchall()
+        todos = []
+        for values in rows:
+            # 読み込まないカラムは空文字で埋めて行の形に揃える
+            row = [""] * len(HEADERS)
+            for i, value in zip(indices, values):
+                row[i] = str(value)
+            todos.append(Todo.from_row(row))
+        return todos
+
+    def get_due_before(self, due_date: str, filter_status: str = 'all') -> List[Todo]:
+        """
+        期日が指定日より前のTodoを期日順に取得（期日のインデックスで範囲検索）
+
+        Args:
+            due_date: 基準日（YYYY-MM-DD形式、この日は含まない）
+            filter_status: ステータスフィルター（all/未完了/完了）
+
+        Returns:
+            Todoのリスト
+        """
+        where, params = "due_date != '' AND due_date < ?", [due_date]
+        if filter_status != 'all':
+            where, params = where + " AND status = ?", params + [filter_status]
+        rows = self._conn().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM todos WHERE {where} ORDER BY due_date, id", params
+        ).fetchall()
+        return [Todo.from_row(self._to_row(values)) for values in rows]
+
+    def get_due_range(self, due_from: str = '', due_to: str = '', filter_status: str = 'all') -> List[Todo]:
+        """
+        期日が範囲内のTodoを期日順に取得（期日のインデックスで範囲検索）
+
+        Args:
+            due_from: 範囲の開始日（YYYY-MM-DD形式、この日を含む。空の場合は下限なし）
+            due_to: 範囲の終了日（YYYY-MM-DD形式、この日を含む。空の場合は上限なし）
+            filter_status: ステータスフィルター（all/未完了/完了）
+
+        Returns:
+            Todoのリスト
+        """
+        where, params = "due_date != ''", []
+        if due_from:
+            where, params = where + " AND due_date >= ?", params + [due_from]
+        if due_to:
+            where, params = where + " AND due_date <= ?", params + [due_to]
+        if filter_status != 'all':
+            where, params = where + " AND status = ?", params + [filter_status]
+        rows = self._conn().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM todos WHERE {where} ORDER BY due_date, id", params
+        ).fetchall()
+        return [Todo.from_row(self._to_row(values)) for values in rows]
+
+    def data_version(self, columns: Optional[List[str]] = None) -> str:
+        """
+        データのバージョンを取得
+
+        変更のたびにoutboxの連番が増えるため、連番と件数（取り込み時はoutboxに記録しない）から求める。
+        データベースを共有する全ワーカーで同じ値になる。
+
+        Args:
+            columns: 使用しない（インターフェースを揃えるための引数）
+
+        Returns:
+            「連番-件数」形式の文字列
+        """
+        conn = self._conn()
+        seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'outbox'").fetchone()
+        count = conn.execute("SELECT COUNT(*) FROM todos").fetchone()[0]
+        return f"{seq[0] if seq else 0}-{count}"
+
+    def get_record(self, todo_id: int) -> Optional[Todo]:
+        """
+        指定されたIDのTodoを取得
+
+        Args:
+            todo_id: TodoのID
+
+        Returns:
+            Todo、見つからない場合はNone
+        """
+        row = self._select_row(self._conn(), todo_id)
+        return Todo.from_row(row) if row else None
+
+    def create_todo(self, title: str, content: str, due_date: str, priority: str = "中") -> int:
+        """
+        Todoを作成
+
+        Args:
+            title: タイトル
+            content: 内容
+            due_date: 期日（YYYY-MM-DD形式）
+            priority: 重要度（高/中/低、デフォルト: 中）
+
+        Returns:
+            作成されたTodoのID
+        """
+        with self._conn() as conn:
+            row = build_new_row(0, title, content, due_date, priority)
+            # IDはSQLiteのAUTOINCREMENTで採番（プロセス間でも一意）
+            cursor = conn.execute(
+                f"INSERT INTO todos ({', '.join(COLUMNS[1:])}) VALUES ({', '.join('?' * (len(COLUMNS) - 1))})",
+                row[1:]
+            )
+            row[0] = str(cursor.lastrowid)
+            self._record_op(conn, {"op": "put", "id": cursor.lastrowid, "row": row})
+            return cursor.lastrowid
+
+    def create_todos(self, items: List[Dict[str, str]]) -> List[int]:
+        """
+        複数のTodoをまとめて作成（一括登録用、1回のトランザクションで保存）
+
+        スプレッドシートへはoutboxの操作として複製され、複製時にappend_rowsでまとめて追記される。
+
+        Args:
+            items: title/content/due_date/priority/statusをキーとする辞書のリスト
+
+        Returns:
+            作成されたTodoのIDのリスト（itemsと同じ順）
+        """
+        ids = []
+        with self._conn() as conn:
+            for item in items:
+                row = build_imported_row(0, item)
+                cursor = conn.execute(
+                    f"INSERT INTO todos ({', '.join(COLUMNS[1:])}) VALUES ({', '.join('?' * (len(COLUMNS) - 1))})",
+                    row[1:]
+                )
+                row[0] = str(cursor.lastrowid)
+                self._record_op(conn, {"op": "put", "id": cursor.lastrowid, "row": row})
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def update_todo(
+        self,
+        todo_id: int,
+        title: str,
+        content: str,
+        due_date: str,
+        priority: str = None,
+        status: str = None
+    ) -> bool:
+        """
+        Todoを更新
+
+        Args:
+            todo_id: TodoのID
+            title: タイトル
+            content: 内容
+            due_date: 期日（YYYY-MM-DD形式）
+            priority: 重要度（高/中/低、Noneの場合は既存値を保持）
+            status: ステータス（未完了/完了、Noneの場合は既存値を保持）
+
+        Returns:
+            更新成功時True、Todoが見つからない場合False
+        """
+        with self._conn() as conn:
+            row = self._select_row(conn, todo_id)
+            if row is None:
+                return False
+            self._save_row(conn, build_updated_row(row, title, content, due_date, priority, status))
+            return True
+
+    def complete_todo(self, todo_id: int, completed: bool = True) -> bool:
+        """
+        Todoの完了ステータスを更新
+
+        Args:
+            todo_id: TodoのID
+            completed: Trueで完了、Falseで未完了に戻す
+
+        Returns:
+            更新成功時True、Todoが見つからない場合False
+        """
+        with self._conn() as conn:
+            row = self._select_row(conn, todo_id)
+            if row is None:
+                return False
+            self._save_row(conn, build_completed_row(row, completed))
+            return True
+
+    def delete_todo(self, todo_id: int) -> bool:
+        """
+        Todoを削除
+
+        Args:
+            todo_id: TodoのID
+
+        Returns:
+            削除成功時True、Todoが見つからない場合False
+        """
+        with self._conn() as conn:
+            cursor = conn.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
+            if cursor.rowcount == 0:
+                return False
+            self._record_op(conn, {"op": "delete", "id": todo_id})
+            return True
+
+    def pending_ops(self, limit: int = 500) -> List[Tuple[int, Dict]]:
+        """
+        スプレッドシートへ未複製の変更を古い順に取得
+
+        Args:
+            limit: 取得する最大件数
+
+        Returns:
+            (連番, 操作) のタプルのリスト
+        """
+        rows = self._conn().execute(
+            "SELECT seq, op FROM outbox ORDER BY seq LIMIT ?", (limit,)
+        ).fetchall()
+        return [(seq, json.loads(op)) for seq, op in rows]
+
+    def ack_ops(self, last_seq: int):
+        """
+        指定した連番までの変更を複製済みとしてoutboxから取り除く
+
+        Args:
+            last_seq: 複製が完了した最後の連番
+        """
+        with self._conn() as conn:
+            conn.execute("DELETE FROM outbox WHERE seq <= ?", (last_seq,))
+
+
+class SheetsReplicator:
+    """
+    SQLiteの変更をGoogleスプレッドシートへ非同期に複製するクラス
+
+    複数のワーカーが起動していても、ロックファイルを取得できた1プロセスだけが複製します。
+    """
+
+    def __init__(
+        self,
+        storage: SQLiteTodoStorage,
+        sheets_handler,
+        interval: float = 5.0,
+        batch_size: int = 500
+    ):
+        """
+        初期化
+
+        Args:
+            storage: 複製元のSQLiteストレージ
+            sheets_handler: 複製先のGoogleSheetsHandler（apply_opsで反映する）
+            interval: 複製の間隔（秒）
+            batch_size: 1回の複製で送る最大件数
+        """
+        self.storage = storage
+        self.sheets_handler = sheets_handler
+        self.interval = interval
+        self.batch_size = batch_size
+        self._lock_path = f"{storage.db_path}.replicator.lock"
+        self._thread = None
+
+    def sync_once(self) -> int:
+        """
+        未複製の変更を1バッチ分スプレッドシートへ反映
+
+        Returns:
+            反映した変更の件数（他のプロセスが複製中の場合は0）
+        """
+        with open(self._lock_path, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return 0  # 他のプロセスが複製中
+
+            pending = self.storage.pending_ops(self.batch_size)
+            if not pending:
+                return 0
+            self.sheets_handler.apply_ops([op for _, op in pending])
+            self.storage.ack_ops(pending[-1][0])
+            return len(pending)
+
+    def _run(self):
+        """バックグラウンドで定期的に複製"""
+        while True:
+            try:
+                # 溜まっている分はまとめて送り切る
+                while self.sync_once() >= self.batch_size:
+                    pass
+            except Exception as e:
+                print(f"✗ スプレッドシートへの複製に失敗しました（再試行します）: {str(e)}")
+            time.sleep(self.interval)
+
+    def start(self):
+        """複製スレッドを開始"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sheets-replicator", daemon=True)
+            self._thread.start()
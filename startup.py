@@ -0,0 +1,78 @@
+"""
+起動処理モジュール
+
+スプレッドシートへの接続などの重い初期化をバックグラウンドで実行し、
+起動の各フェーズにかかった時間をログに出力します。
+"""
+
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+@contextmanager
+def timed_phase(name: str):
+    """
+    ブロックの実行時間をログに出力
+
+    Args:
+        name: フェーズ名
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        print(f"⏱ 起動フェーズ「{name}」: {time.perf_counter() - started:.2f}秒")
+
+
+class Warmup:
+    """初期化処理をバックグラウンドで実行し、完了を待てるようにする"""
+
+    def __init__(self, func: Callable[[], object], name: str = "起動処理"):
+        """
+        初期化（すぐに別スレッドで実行を開始する）
+
+        Args:
+            func: 初期化処理
+            name: ログに出力するフェーズ名
+        """
+        self.func = func
+        self.name = name
+        self.future: Future = Future()
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            with timed_phase(self.name):
+                self.future.set_result(self.func())
+        except Exception as e:
+            print(f"✗ {self.name}に失敗しました: {str(e)}")
+            self.future.set_exception(e)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        初期化の完了を待つ
+
+        Args:
+            timeout: 最大待ち時間（秒、Noneの場合は完了まで待つ）
+
+        Returns:
+            初期化が成功していればTrue（失敗・タイムアウトの場合はFalse）
+        """
+        try:
+            self.future.result(timeout=timeout)
+            return True
+        except TimeoutError:
+            return False
+        except Exception:
+            return False
+
+    @property
+    def status(self) -> str:
+        """初期化の状態（starting/ready/error）"""
+        if not self.future.done():
+            return "starting"
+        return "error" if self.future.exception() else "ready"
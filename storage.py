@@ -0,0 +1,563 @@
+"""
+Todoストレージ共通モジュール
+
+ストレージ（Googleスプレッドシート・SQLite）が実装するインターフェースと、
+行データの組み立て・変換処理をまとめます。
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from search_index import match_score, normalize_text, split_query
+from todo import HEADERS, PRIORITY_ORDER, Todo, TodoStatus, parse_due_ordinal  # noqa: F401
+
+PRIORITIES = ["高", "中", "低"]
+STATUSES = [status.value for status in TodoStatus]
+
+# 一覧表示・通知で使うカラム（内容や日時カラムは読み込まない）
+LIST_COLUMNS = ["ID", "タイトル", "期日", "重要度", "ステータス"]
+
+# 一覧の1ページあたりの件数
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+# 一括操作（完了/未完了に戻す/重要度の変更/削除）
+BULK_ACTIONS = ('complete', 'reopen', 'priority', 'delete')
+
+# アーカイブへの移動で1回のAPI呼び出しで追記・削除する行数
+ARCHIVE_BATCH_SIZE = 500
+
+# エクスポートで1回に読み込む件数
+EXPORT_CHUNK_SIZE = 1000
+
+
+def now_str() -> str:
+    """現在時刻を「YYYY-MM-DD HH:MM:SS」形式で取得"""
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def record_sort_key(sort_by: str) -> Optional[Callable[[Todo], Tuple]]:
+    """
+    一覧の並び替えに使うキー関数を取得
+
+    Args:
+        sort_by: 並び替え方法（default/priority/due_date/priority_due）
+
+    Returns:
+        キー関数（デフォルトの並び順の場合はNone）
+    """
+    if sort_by == 'priority':
+        # 重要度順（高→中→低）
+        return lambda todo: (todo.priority_rank,)
+    elif sort_by == 'due_date':
+        # 期日順（近い順、期日なしは先頭）
+        return lambda todo: (todo.due_ordinal,)
+    elif sort_by == 'priority_due':
+        # 重要度→期日（重要度優先、同重要度は期日順）
+        return lambda todo: (todo.priority_rank, todo.due_ordinal)
+    return None
+
+
+def filter_and_sort_records(todos: List[Todo], sort_by: str, filter_status: str) -> List[Todo]:
+    """
+    ステータスで絞り込み、並び替えたTodoのリストを取得
+
+    Args:
+        todos: Todoのリスト
+        sort_by: 並び替え方法（default/priority/due_date/priority_due）
+        filter_status: ステータスフィルター（all/未完了/完了）
+
+    Returns:
+        絞り込み・並び替え後のTodoのリスト
+    """
+    if filter_status != 'all':
+        todos = [todo for todo in todos if todo.status.value == filter_status]
+    key = record_sort_key(sort_by)
+    if key:
+        todos = sorted(todos, key=key)
+    return todos
+
+
+def due_range_filter(due_from: str = '', due_to: str = '') -> Callable[[Todo], bool]:
+    """
+    期日が範囲内かを判定する関数を取得（期日なしは範囲外）
+
+    Args:
+        due_from: 範囲の開始日（YYYY-MM-DD形式、この日を含む。空の場合は下限なし）
+        due_to: 範囲の終了日（YYYY-MM-DD形式、この日を含む。空の場合は上限なし）
+
+    Returns:
+        Todoを受け取り、範囲内ならTrueを返す関数
+    """
+    first = parse_due_ordinal(due_from) if due_from else 1
+    last = parse_due_ordinal(due_to) if due_to else None
+    return lambda todo: 0 < todo.due_ordinal and first <= todo.due_ordinal and (last is None or todo.due_ordinal <= last)
+
+
+def select_archivable(todos: Iterable[Todo], older_than_days: int, now: Optional[datetime] = None) -> List[Todo]:
+    """
+    完了日時から指定日数が過ぎた完了済みのTodoを取得（完了日時が空・不正な形式のものは含まない）
+
+    Args:
+        todos: Todoのリスト
+        older_than_days: 完了からの日数
+        now: 基準の時刻（省略時は現在時刻）
+
+    Returns:
+        アーカイブ対象のTodoのリスト
+    """
+    cutoff = (now or datetime.now()) - timedelta(days=older_than_days)
+    archivable = []
+    for todo in todos:
+        if not todo.is_completed or not todo.completed_at:
+            continue
+        try:
+            completed_at = datetime.strptime(todo.completed_at, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+        if completed_at < cutoff:
+            archivable.append(todo)
+    return archivable
+
+
+def build_new_row(todo_id: int, title: str, content: str, due_date: str, priority: str = "中") -> List[str]:
+    """
+    新規Todoの行を組み立てる
+
+    Args:
+        todo_id: TodoのID
+        title: タイトル
+        content: 内容
+        due_date: 期日（YYYY-MM-DD形式）
+        priority: 重要度（高/中/低、不正な値の場合は中）
+
+    Returns:
+        9カラムの行
+    """
+    now = now_str()
+
+    # 重要度の検証
+    if priority not in PRIORITIES:
+        priority = "中"
+
+    return [
+        str(todo_id),
+        title,
+        content,
+        due_date,
+        priority,  # 重要度
+        "未完了",  # ステータス
+        now,  # 作成日時
+        now,  # 更新日時
+        ""  # 完了日時（空）
+    ]
+
+
+def build_updated_row(
+    row: List[str],
+    title: str,
+    content: str,
+    due_date: str,
+    priority: str = None,
+    status: str = None
+) -> List[str]:
+    """
+    編集後の行を組み立てる
+
+    Args:
+        row: 既存の9カラムの行
+        title: タイトル
+        content: 内容
+        due_date: 期日（YYYY-MM-DD形式）
+        priority: 重要度（高/中/低、Noneの場合は既存値を保持）
+        status: ステータス（未完了/完了、Noneの場合は既存値を保持）
+
+    Returns:
+        9カラムの行
+    """
+    # 既存の値を取得
+    created_at = row[6] or now_str()
+    updated_at = now_str()
+
+    # 重要度とステータスの処理
+    if priority is None:
+        priority = row[4] if row[4] in PRIORITIES else "中"
+    else:
+        if priority not in PRIORITIES:
+            priority = "中"
+
+    if status is None:
+        status = row[5] if row[5] in STATUSES else "未完了"
+
+    # 完了日時の処理
+    if status == "完了":
+        # 既存の完了日時がある場合は保持、ない場合は現在時刻を設定
+        completed_at = row[8] or now_str()
+    else:
+        # 未完了の場合は空にする
+        completed_at = ""
+
+    return [
+        row[0],
+        title,
+        content,
+        due_date,
+        priority,  # 重要度
+        status,  # ステータス
+        created_at,  # 作成日時
+        updated_at,  # 更新日時
+        completed_at  # 完了日時
+    ]
+
+
+def build_completed_row(row: List[str], completed: bool = True) -> List[str]:
+    """
+    完了ステータスを切り替えた行を組み立てる
+
+    Args:
+        row: 既存の9カラムの行
+        completed: Trueで完了、Falseで未完了に戻す
+
+    Returns:
+        9カラムの行
+    """
+    # ステータスと完了日時を設定
+    if completed:
+        status = "完了"
+        completed_at = now_str()
+    else:
+        status = "未完了"
+        completed_at = ""
+
+    return [
+        row[0],
+        row[1],  # タイトル
+        row[2],  # 内容
+        row[3],  # 期日
+        row[4] if row[4] in PRIORITIES else "中",  # 重要度
+        status,
+        row[6] or now_str(),  # 作成日時
+        now_str(),  # 更新日時
+        completed_at
+    ]
+
+
+def build_imported_row(todo_id: int, item: Dict[str, str]) -> List[str]:
+    """
+    一括登録するTodoの行を組み立てる
+
+    Args:
+        todo_id: TodoのID
+        item: title/content/due_date/priority/statusをキーとする辞書（statusが完了の場合は完了済みで登録）
+
+    Returns:
+        9カラムの行
+    """
+    row = build_new_row(todo_id, item["title"], item["content"], item["due_date"], item.get("priority", "中"))
+    if item.get("status") == TodoStatus.DONE.value:
+        return build_completed_row(row, True)
+    return row
+
+
+def build_bulk_row(row: List[str], action: str, priority: str = None) -> List[str]:
+    """
+    一括操作（削除以外）の後の行を組み立てる
+
+    Args:
+        row: 既存の9カラムの行
+        action: 一括操作（complete/reopen/priority）
+        priority: action=priorityの場合の重要度（高/中/低）
+
+    Returns:
+        9カラムの行
+    """
+    if action == 'complete':
+        return build_completed_row(row, True)
+    elif action == 'reopen':
+        return build_completed_row(row, False)
+    return build_updated_row(row, row[1], row[2], row[3], priority)
+
+
+def validate_bulk_action(action: str, priority: str = None):
+    """一括操作の指定を検証（不正な場合はValueError）"""
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"不明な一括操作です: {action}")
+    if action == 'priority' and priority not in PRIORITIES:
+        raise ValueError(f"重要度が不正です: {priority}")
+
+
+class TodoStorage(ABC):
+    """Todoストレージのインターフェース"""
+
+    def get_page(
+        self,
+        sort_by: str = 'default',
+        filter_status: str = 'all',
+        page: int = 1,
+        per_page: int = DEFAULT_PER_PAGE,
+        columns: Optional[List[str]] = None
+    ) -> Tuple[List[Todo], bool, Optional[int]]:
+        """
+        一覧の1ページ分のTodoを取得
+
+        Args:
+            sort_by: 並び替え方法（default/priority/due_date/priority_due）
+            filter_status: ステータスフィルター（all/未完了/完了）
+            page: ページ番号（1から）
+            per_page: 1ページあたりの件数
+            columns: 必要なカラム名のリスト（Noneの場合はすべて）。それ以外のカラムは空の場合がある
+
+        Returns:
+            (Todoのリスト, 次のページがあるか, 該当件数（不明な場合はNone）) のタプル
+        """
+        todos = filter_and_sort_records(self.get_all_records(), sort_by, filter_status)
+        offset = (page - 1) * per_page
+        return todos[offset:offset + per_page], offset + per_page < len(todos), len(todos)
+
+    def get_projected_records(self, columns: List[str]) -> List[Todo]:
+        """
+        すべてのTodoを指定したカラムだけ読み込んで取得
+
+        Args:
+            columns: 必要なカラム名のリスト（それ以外のカラムは空の場合がある）
+
+        Returns:
+            Todoのリスト
+        """
+        return self.get_all_records()
+
+    def get_due_before(self, due_date: str, filter_status: str = 'all') -> List[Todo]:
+        """
+        期日が指定日より前のTodoを期日順に取得（期日なしは含まない）
+
+        Args:
+            due_date: 基準日（YYYY-MM-DD形式、この日は含まない）
+            filter_status: ステータスフィルター（all/未完了/完了）
+
+        Returns:
+            Todoのリスト
+        """
+        limit = parse_due_ordinal(due_date)
+        todos = filter_and_sort_records(self.get_all_records(), 'due_date', filter_status)
+        return [todo for todo in todos if 0 < todo.due_ordinal < limit]
+
+    def get_due_range(self, due_from: str = '', due_to: str = '', filter_status: str = 'all') -> List[Todo]:
+        """
+        期日が範囲内のTodoを期日順に取得（期日なしは含まない）
+
+        Args:
+            due_from: 範囲の開始日（YYYY-MM-DD形式、この日を含む。空の場合は下限なし）
+            due_to: 範囲の終了日（YYYY-MM-DD形式、この日を含む。空の場合は上限なし）
+            filter_status: ステータスフィルター（all/未完了/完了）
+
+        Returns:
+            Todoのリスト
+        """
+        in_range = due_range_filter(due_from, due_to)
+        todos = filter_and_sort_records(self.get_all_records(), 'due_date', filter_status)
+        return [todo for todo in todos if in_range(todo)]
+
+    def search(self, query: str, filter_status: str = 'all') -> List[Todo]:
+        """
+        タイトル・内容に検索語を含むTodoを関連度の高い順に取得
+
+        Args:
+            query: 検索語（空白区切りで複数指定するとAND検索）
+            filter_status: ステータスフィルター（all/未完了/完了）
+
+        Returns:
+            Todoのリスト（同じ関連度の場合はIDの小さい順）
+        """
+        terms = split_query(query)
+        if not terms:
+            return []
+        scored = []
+        for todo in filter_and_sort_records(self.get_all_records(), 'default', filter_status):
+            score = match_score(normalize_text(todo.title), normalize_text(todo.content), terms)
+            if score:
+                scored.append((-score, todo.id, todo))
+        scored.sort(key=lambda item: item[:2])
+        return [todo for _, _, todo in scored]
+
+    def data_version(self, columns: Optional[List[str]] = None) -> Optional[str]:
+        """
+        データのバージョンを取得（データが変わると値が変わる。ETagや描画済みページのキャッシュに使う）
+
+        Args:
+            columns: この後の読み込みで必要なカラム名（Noneの場合はすべて）
+
+        Returns:
+            バージョンを表す文字列（バージョンを管理していない場合はNone）
+        """
+        return None
+
+    def bulk_update(self, todo_ids: List[int], action: str, priority: str = None) -> Dict[str, List[int]]:
+        """
+        複数のTodoをまとめて完了・未完了に戻す・重要度変更・削除する
+
+        Args:
+            todo_ids: TodoのIDのリスト
+            action: 一括操作（complete/reopen/priority/delete）
+            priority: action=priorityの場合の重要度（高/中/低）
+
+        Returns:
+            {"updated": 変更したIDのリスト, "not_found": 見つからなかったIDのリスト}
+        """
+        validate_bulk_action(action, priority)
+        result = {"updated": [], "not_found": []}
+        for todo_id in dict.fromkeys(todo_ids):
+            todo = self.get_record(todo_id)
+            if todo is None:
+                result["not_found"].append(todo_id)
+                continue
+            if action == 'delete':
+                self.delete_todo(todo_id)
+            elif action == 'priority':
+                self.update_todo(todo_id, todo.title, todo.content, todo.due_date, priority=priority)
+            else:
+                self.complete_todo(todo_id, action == 'complete')
+            result["updated"].append(todo_id)
+        return result
+
+    def iter_records(self, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Todo]:
+        """
+        すべてのTodoを順に取得（エクスポート用、ストレージが対応していればchunk_size件ずつ読み込む）
+
+        Args:
+            chunk_size: 1回に読み込む件数
+
+        Returns:
+            Todoのイテレーター
+        """
+        yield from self.get_all_records()
+
+    def create_todos(self, items: List[Dict[str, str]]) -> List[int]:
+        """
+        複数のTodoをまとめて作成（一括登録用）
+
+        Args:
+            items: title/content/due_date/priority/statusをキーとする辞書のリスト
+
+        Returns:
+            作成されたTodoのIDのリスト（itemsと同じ順）
+        """
+        ids = []
+        for item in items:
+            todo_id = self.create_todo(item["title"], item["content"], item["due_date"], item.get("priority", "中"))
+            if item.get("status") == TodoStatus.DONE.value:
+                self.complete_todo(todo_id)
+            ids.append(todo_id)
+        return ids
+
+    def archive_completed(self, older_than_days: int, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+        """
+        完了日時から指定日数が過ぎた完了済みTodoをアーカイブへ移動（アーカイブに対応していないストレージでは何もしない）
+
+        Args:
+            older_than_days: 完了からこの日数が過ぎたTodoを移動する
+            batch_size: 1回のAPI呼び出しで移動する行数
+
+        Returns:
+            移動したTodoの件数
+        """
+        return 0
+
+    def get_archived_page(self, page: int = 1, per_page: int = DEFAULT_PER_PAGE) -> Tuple[List[Todo], bool, int]:
+        """
+        アーカイブ済みTodoの1ページ分を完了日時の新しい順に取得
+
+        Args:
+            page: ページ番号（1から）
+            per_page: 1ページあたりの件数
+
+        Returns:
+            (Todoのリスト, 次のページがあるか, 該当件数) のタプル
+        """
+        return [], False, 0
+
+    @abstractmethod
+    def get_all_records(self) -> List[Todo]:
+        """
+        すべてのTodoを取得
+
+        Returns:
+            Todoのリスト
+        """
+
+    @abstractmethod
+    def get_record(self, todo_id: int) -> Optional[Todo]:
+        """
+        指定されたIDのTodoを取得
+
+        Args:
+            todo_id: TodoのID
+
+        Returns:
+            Todo、見つからない場合はNone
+        """
+
+    @abstractmethod
+    def create_todo(self, title: str, content: str, due_date: str, priority: str = "中") -> int:
+        """
+        Todoを作成
+
+        Args:
+            title: タイトル
+            content: 内容
+            due_date: 期日（YYYY-MM-DD形式）
+            priority: 重要度（高/中/低、デフォルト: 中）
+
+        Returns:
+            作成されたTodoのID
+        """
+
+    @abstractmethod
+    def update_todo(
+        self,
+        todo_id: int,
+        title: str,
+        content: str,
+        due_date: str,
+        priority: str = None,
+        status: str = None
+    ) -> bool:
+        """
+        Todoを更新
+
+        Args:
+            todo_id: TodoのID
+            title: タイトル
+            content: 内容
+            due_date: 期日（YYYY-MM-DD形式）
+            priority: 重要度（高/中/低、Noneの場合は既存値を保持）
+            status: ステータス（未完了/完了、Noneの場合は既存値を保持）
+
+        Returns:
+            更新成功時True、Todoが見つからない場合False
+        """
+
+    @abstractmethod
+    def complete_todo(self, todo_id: int, completed: bool = True) -> bool:
+        """
+        Todoの完了ステータスを更新
+
+        Args:
+            todo_id: TodoのID
+            completed: Trueで完了、Falseで未完了に戻す
+
+        Returns:
+            更新成功時True、Todoが見つからない場合False
+        """
+
+    @abstractmethod
+    def delete_todo(self, todo_id: int) -> bool:
+        """
+        Todoを削除
+
+        Args:
+            todo_id: TodoのID
+
+        Returns:
+            削除成功時True、Todoが見つからない場合False
+        """
@@ -0,0 +1,33 @@
+"""
+テスト共通の設定
+
+Googleには接続せず、ベンチマーク用のメモリ上のスプレッドシート（benchmarks/fakes.py）を使います。
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeSpreadsheet, make_rows  # noqa: E402
+from google_sheets_handler import GoogleSheetsHandler  # noqa: E402
+from sheets_client import QuotaAwareClient  # noqa: E402
+
+
+def make_handler(spreadsheet: FakeSpreadsheet, **kwargs) -> GoogleSheetsHandler:
+    """フェイクのワークシートを渡したハンドラーを作成（クォータ制御による待ちなし）"""
+    return GoogleSheetsHandler(
+        credentials_path='',
+        spreadsheet_id='',
+        quota_client=QuotaAwareClient(requests_per_minute=1e9, burst=1e9, background_reserve=0),
+        worksheet=spreadsheet.sheet1,
+        **kwargs
+    )
+
+
+@pytest.fixture
+def spreadsheet():
+    """Todo 5件（IDは1〜5）のスプレッドシート"""
+    return FakeSpreadsheet(make_rows(5))
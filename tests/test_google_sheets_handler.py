@@ -0,0 +1,223 @@
+"""GoogleSheetsHandlerのテスト"""
+
+import threading
+
+from benchmarks.fakes import FakeSpreadsheet, make_rows
+from conftest import make_handler
+from todo import TodoStatus
+
+
+def sheet_ids(spreadsheet):
+    """シートのID列（ヘッダーを除く）"""
+    return [row[0] for row in spreadsheet.sheet1.rows[1:]]
+
+
+def test_delete_after_other_worker_deleted_row(spreadsheet):
+    """他のワーカーが上の行を削除した後でも、古いスナップショットの位置ではなくIDで行を削除する"""
+    a, b = make_handler(spreadsheet), make_handler(spreadsheet)
+    a.get_all_records()
+    b.get_all_records()
+
+    assert a.delete_todo(1)
+    assert b.delete_todo(3)
+
+    assert sheet_ids(spreadsheet) == ['2', '4', '5']
+
+
+def test_update_after_other_worker_deleted_row(spreadsheet):
+    """他のワーカーが上の行を削除した後でも、更新は対象のTodoの行に書き込む"""
+    a, b = make_handler(spreadsheet), make_handler(spreadsheet)
+    a.get_all_records()
+    b.get_all_records()
+
+    assert a.delete_todo(2)
+    assert b.update_todo(4, '更新後', '内容', '2026-12-31', '高')
+
+    rows = {row[0]: row for row in spreadsheet.sheet1.rows[1:]}
+    assert rows['4'][1] == '更新後'
+    assert rows['5'][1] == 'Todo 5'
+    assert b.get_record(4).title == '更新後'
+
+
+def test_write_to_row_deleted_by_other_worker(spreadsheet):
+    """他のワーカーが削除したTodoへの更新・削除は失敗を返し、他の行には書き込まない"""
+    a, b = make_handler(spreadsheet), make_handler(spreadsheet)
+    a.get_all_records()
+    b.get_all_records()
+
+    assert a.delete_todo(3)
+    assert not b.complete_todo(3)
+    assert not b.delete_todo(3)
+
+    assert sheet_ids(spreadsheet) == ['1', '2', '4', '5']
+    assert [row[5] for row in spreadsheet.sheet1.rows[1:]] == ['未完了', '未完了', '未完了', '未完了']
+    assert b.get_record(3) is None
+
+
+def test_write_after_rows_inserted_directly(spreadsheet):
+    """シートに直接行が挿入されて行がずれていても、IDで行を特定して更新する"""
+    handler = make_handler(spreadsheet)
+    handler.get_all_records()
+    spreadsheet.sheet1.rows.insert(1, ['100', '直接追加', '', '2026-01-01', '中', '未完了', '', '', ''])
+    # 直接編集ではスプレッドシートの更新日時が変わる
+    spreadsheet.touch()
+
+    assert handler.complete_todo(2)
+
+    rows = {row[0]: row for row in spreadsheet.sheet1.rows[1:]}
+    assert rows['2'][5] == '完了'
+    assert rows['1'][5] == rows['100'][5] == '未完了'
+
+
+def test_write_without_foreign_change_skips_row_check(spreadsheet):
+    """前回の読み込み以降に他からの変更がなければ、行の確認をせずに書き込む"""
+    handler = make_handler(spreadsheet)
+    handler.get_all_records()
+    spreadsheet.recorder.reset()
+
+    assert handler.complete_todo(2)
+    assert handler.delete_todo(4)
+
+    assert spreadsheet.recorder.reset() == {'drive.get_lastUpdateTime': 2, 'update': 1, 'delete_rows': 1}
+    assert sheet_ids(spreadsheet) == ['1', '2', '3', '5']
+    assert spreadsheet.sheet1.rows[2][5] == '完了'
+
+
+def test_direct_edit_before_own_write_is_reloaded(spreadsheet):
+    """直接編集の後に自分が書き込んでも、キャッシュの期限切れ後に直接編集を読み込む"""
+    handler = make_handler(spreadsheet, cache_ttl=30)
+    handler.get_all_records()
+    spreadsheet.sheet1.update('B2', [['直接編集']])
+
+    assert handler.complete_todo(4)
+    # キャッシュの有効期間を過ぎたことにする
+    handler._loaded_at -= 30
+
+    assert handler.get_record(1).title == '直接編集'
+    assert handler.get_record(4).status == TodoStatus.DONE
+
+
+def test_own_write_does_not_reload(spreadsheet):
+    """前回の読み込み以降に自分しか書き込んでいなければ、キャッシュの期限切れ後も読み直さない"""
+    handler = make_handler(spreadsheet, cache_ttl=30)
+    handler.get_all_records()
+
+    assert handler.complete_todo(4)
+    handler._loaded_at -= 30
+    spreadsheet.recorder.reset()
+
+    assert handler.get_record(4).status == TodoStatus.DONE
+    assert 'get_all_values' not in spreadsheet.recorder.reset()
+
+
+def test_first_page_reads_only_its_rows(spreadsheet):
+    """スナップショットがない状態では、最初のページはその行範囲だけを読み込み、以降はメモリ上から返す"""
+    handler = make_handler(spreadsheet)
+
+    version = handler.data_version()
+    todos, has_next, _ = handler.get_page(per_page=2)
+    handler.wait_for_background_load(5)
+
+    assert version is not None
+    assert [todo.id for todo in todos] == [1, 2]
+    assert has_next
+    # スナップショットはバックグラウンドで読み込む（更新日時の確認とシート全体の読み込み）
+    assert spreadsheet.recorder.reset() == {'drive.get_lastUpdateTime': 2, 'get': 1, 'get_all_values': 1}
+
+    for _ in range(3):
+        assert handler.data_version() is not None
+        todos, has_next, total = handler.get_page(per_page=2)
+        assert [todo.id for todo in todos] == [1, 2] and total == 5
+    assert spreadsheet.recorder.reset() == {}
+
+
+def test_bulk_delete_after_other_worker_deleted_row():
+    """他のワーカーが上の行を削除した後でも、一括削除はID列から特定した行を削除する"""
+    spreadsheet = FakeSpreadsheet(make_rows(60))
+    a, b = make_handler(spreadsheet), make_handler(spreadsheet)
+    a.get_all_records()
+    b.get_all_records()
+
+    assert a.delete_todo(1)
+    spreadsheet.recorder.reset()
+    result = b.bulk_update(list(range(2, 52)), 'delete')
+
+    assert result == {"updated": list(range(2, 52)), "not_found": []}
+    assert sheet_ids(spreadsheet) == [str(i) for i in range(52, 61)]
+    calls = spreadsheet.recorder.reset()
+    assert calls['col_values'] == 1 and calls['spreadsheet.batch_update'] == 1
+    assert [todo.id for todo in b.get_all_records()] == list(range(52, 61))
+
+
+def test_bulk_update_skips_rows_deleted_by_other_worker(spreadsheet):
+    """他のワーカーが削除したTodoは見つからなかったものとし、ずれた行には書き込まない"""
+    a, b = make_handler(spreadsheet), make_handler(spreadsheet)
+    a.get_all_records()
+    b.get_all_records()
+
+    assert a.delete_todo(2)
+    result = b.bulk_update([2, 3, 5], 'complete')
+
+    assert result == {"updated": [3, 5], "not_found": [2]}
+    statuses = {row[0]: row[5] for row in spreadsheet.sheet1.rows[1:]}
+    assert statuses == {'1': '未完了', '3': '完了', '4': '未完了', '5': '完了'}
+    assert b.get_record(2) is None
+
+
+def test_slow_write_does_not_block_reads(spreadsheet):
+    """書き込みでSheets APIの応答を待っている間も、他のスレッドはスナップショットから読める"""
+    handler = make_handler(spreadsheet, cache_ttl=30)
+    handler.get_all_records()
+    started, release = threading.Event(), threading.Event()
+    update = spreadsheet.sheet1.update
+
+    def slow_update(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return update(*args, **kwargs)
+
+    spreadsheet.sheet1.update = slow_update
+    writer = threading.Thread(target=handler.complete_todo, args=(2,))
+    writer.start()
+    try:
+        assert started.wait(5)
+        reader = threading.Thread(target=lambda: (handler.get_record(1), handler.get_page(sort_by='priority')))
+        reader.start()
+        reader.join(1)
+        assert not reader.is_alive()
+    finally:
+        release.set()
+        writer.join(5)
+    assert handler.get_record(2).status == TodoStatus.DONE
+
+
+def test_flush_waits_for_snapshot_load(spreadsheet, tmp_path):
+    """ライトビハインドの反映は、読み込み中のスナップショットの差し替えが済むまで待つ"""
+    handler = make_handler(spreadsheet, write_behind_dir=str(tmp_path), flush_interval=3600)
+    handler.get_all_records()
+    assert handler.complete_todo(2)
+    handler.invalidate_cache()
+    started, release = threading.Event(), threading.Event()
+    get_all_values = spreadsheet.sheet1.get_all_values
+
+    def slow_get_all_values(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return get_all_values(*args, **kwargs)
+
+    spreadsheet.sheet1.get_all_values = slow_get_all_values
+    loader = threading.Thread(target=handler.get_all_records)
+    loader.start()
+    try:
+        assert started.wait(5)
+        flusher = threading.Thread(target=handler.flush)
+        flusher.start()
+        flusher.join(0.5)
+        assert flusher.is_alive()
+        assert [row[5] for row in spreadsheet.sheet1.rows[1:]][1] == '未完了'
+    finally:
+        release.set()
+        loader.join(5)
+        flusher.join(5)
+    assert [row[5] for row in spreadsheet.sheet1.rows[1:]][1] == '完了'
+    assert handler.get_record(2).status == TodoStatus.DONE
@@ -0,0 +1,29 @@
+"""SheetIdAllocatorのテスト"""
+
+from id_allocator import SheetIdAllocator
+
+
+def test_two_allocators_never_hand_out_same_id(spreadsheet):
+    """同じスプレッドシートを使う2つのワーカーは、next_idとreserveを混ぜても同じIDを払い出さない"""
+    a = SheetIdAllocator(spreadsheet, lambda: 5, block_size=4)
+    b = SheetIdAllocator(spreadsheet, lambda: 5, block_size=4)
+
+    ids = [a.next_id(), b.next_id()]
+    ids += a.reserve(6)
+    ids.append(b.next_id())
+    ids += b.reserve(9)
+    ids += [a.next_id(), a.next_id()]
+    ids += a.reserve(1)
+    ids.append(b.next_id())
+
+    assert len(ids) == len(set(ids))
+    assert min(ids) > 5
+
+
+def test_reserve_returns_consecutive_ids(spreadsheet):
+    """reserveは予約済みブロックの残りから続けて払い出し、足りない分を新しいブロックで確保する"""
+    allocator = SheetIdAllocator(spreadsheet, lambda: 5, block_size=4)
+
+    assert allocator.next_id() == 6
+    assert allocator.reserve(5) == [7, 8, 9, 10, 11]
+    assert allocator.next_id() == 12
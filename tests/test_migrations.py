@@ -0,0 +1,54 @@
+"""スキーマ移行のテスト"""
+
+import pytest
+
+import migrations
+from benchmarks.fakes import FakeSpreadsheet
+from migrations import HEADERS_V1, SCHEMA_VERSION, detect_schema_version, migrate_sheet
+from storage import HEADERS
+
+
+def v1_rows(count):
+    """バージョン1（6カラム）のシート"""
+    return [list(HEADERS_V1)] + [
+        [str(i), f"Todo {i}", f"内容 {i}", "2026-01-01", "2025-12-01 09:00:00", "2025-12-02 09:00:00"]
+        for i in range(1, count + 1)
+    ]
+
+
+def test_detect_padded_v1_header():
+    """途中まで移行したシートのget_all_values()で末尾が空文字で埋められた旧ヘッダーも判定する"""
+    assert detect_schema_version(HEADERS_V1 + ["", "", ""]) == 1
+    assert detect_schema_version(list(HEADERS)) == SCHEMA_VERSION
+    assert detect_schema_version(["名前", "", ""]) is None
+
+
+def test_resume_interrupted_migration(monkeypatch):
+    """書き込みの途中で中断しても、もう一度実行すれば残りの行を移行し、移行済みの行は変えない"""
+    monkeypatch.setattr(migrations, "MIGRATION_CHUNK_ROWS", 2)
+    worksheet = FakeSpreadsheet(v1_rows(5)).sheet1
+
+    original = worksheet.batch_update
+    calls = []
+
+    def interrupted(data, *args, **kwargs):
+        calls.append(data)
+        if len(calls) == 2:
+            raise RuntimeError("中断")
+        return original(data, *args, **kwargs)
+
+    worksheet.batch_update = interrupted
+    with pytest.raises(RuntimeError):
+        migrate_sheet(worksheet, worksheet.get_all_values())
+    migrated_before = [list(row) for row in worksheet.rows[1:3]]
+    assert worksheet.rows[0] == HEADERS_V1
+
+    worksheet.batch_update = original
+    assert migrate_sheet(worksheet, worksheet.get_all_values())
+    assert not migrate_sheet(worksheet, worksheet.get_all_values())
+
+    assert worksheet.rows[0] == HEADERS
+    assert worksheet.rows[1:3] == migrated_before
+    for i, row in enumerate(worksheet.rows[1:], start=1):
+        assert row == [str(i), f"Todo {i}", f"内容 {i}", "2026-01-01", "中", "未完了",
+                       "2025-12-01 09:00:00", "2025-12-02 09:00:00", ""]
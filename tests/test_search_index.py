@@ -0,0 +1,92 @@
+"""全文検索インデックスのテスト"""
+
+import random
+
+from benchmarks.fakes import FakeSpreadsheet, make_rows
+from conftest import make_handler
+from search_index import BigramSearchIndex, normalize_text
+from todo import Todo
+
+
+# 一致・部分一致が起きやすいよう、少ない文字から作る（全角英数字は正規化で半角と同じになる）
+CHARS = 'あいうかきＡａb1１ '
+
+
+def queries_for(todos):
+    """インデックス上のすべての1文字・2文字の検索語と、空白区切りのAND検索"""
+    queries = set()
+    for todo in todos:
+        for word in normalize_text(f'{todo.title} {todo.content}').split():
+            queries.update(word)
+            queries.update(word[i:i + 2] for i in range(len(word) - 1))
+    return sorted(queries) + ['あ い', 'かき 1', 'ab', '存在しない']
+
+
+def assert_matches_rebuild(index, todos):
+    """差分を反映したインデックスが、同じTodoから作り直したインデックスと同じ検索結果を返す"""
+    todos = list(todos)
+    rebuilt = BigramSearchIndex(todos)
+    assert len(index) == len(rebuilt)
+    for query in queries_for(todos):
+        assert index.search(query) == rebuilt.search(query), query
+
+
+def random_todo(rng, todo_id):
+    """タイトル・内容が重複しやすいTodo"""
+    def text():
+        return ''.join(rng.choice(CHARS) for _ in range(rng.randint(0, 6)))
+    return Todo.from_row([str(todo_id), text(), text(), '', '中', '未完了', '', '', ''])
+
+
+def test_replace_matches_rebuild():
+    """追加・更新・削除をreplaceで反映し続けても、作り直したインデックスと一致する"""
+    rng = random.Random(0)
+    todos = {todo_id: random_todo(rng, todo_id) for todo_id in range(1, 21)}
+    index = BigramSearchIndex(todos.values())
+
+    next_id = 21
+    for _ in range(300):
+        action = rng.choice(['add', 'update', 'delete'])
+        if action == 'add' or not todos:
+            todos[next_id] = random_todo(rng, next_id)
+            index.replace(None, todos[next_id])
+            next_id += 1
+        elif action == 'update':
+            todo_id = rng.choice(list(todos))
+            new = random_todo(rng, todo_id)
+            index.replace(todos[todo_id], new)
+            todos[todo_id] = new
+        else:
+            todo_id = rng.choice(list(todos))
+            index.replace(todos.pop(todo_id), None)
+        assert_matches_rebuild(index, todos.values())
+
+
+def test_handler_updates_index_in_place():
+    """ハンドラーの書き込みと他からの変更の再読み込みで、インデックスを作り直さずに差分だけを反映する"""
+    spreadsheet = FakeSpreadsheet(make_rows(30))
+    handler = make_handler(spreadsheet, cache_ttl=0)
+    handler.get_all_records()
+    handler.search('Todo')
+    index = handler._search_index
+
+    handler.create_todo('買い物リスト', '牛乳とパン', '', '高')
+    handler.create_todos([{'title': '会議の準備', 'content': '資料を印刷', 'due_date': '', 'priority': '低'}])
+    handler.update_todo(4, '買い物', 'パンだけ', '')
+    handler.complete_todo(5)
+    handler.delete_todo(7)
+    handler.bulk_update([11, 12], 'delete')
+
+    # 他のワーカーや直接編集による変更（再読み込み時に前回のスナップショットとの差分を反映する）
+    # 自分の書き込みの直後の変更と区別できるよう、更新日時に関係なく読み直させる
+    handler.resync_interval = 0
+    rows = spreadsheet.sheet1.rows
+    rows[13][1] = '直接編集した会議'
+    rows[14][2] = 'ＰＡＮ'
+    del rows[15]
+    rows.append(['99', '直接追加', '牛乳', '', '中', '未完了', '', '', ''])
+    spreadsheet.touch()
+
+    assert [todo.id for todo in handler.search('牛乳')][-1] == 99
+    assert handler._search_index is index
+    assert_matches_rebuild(index, handler.get_all_records())
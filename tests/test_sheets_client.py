@@ -0,0 +1,80 @@
+"""QuotaAwareClientのテスト"""
+
+import types
+
+import gspread
+import pytest
+
+from sheets_client import QuotaAwareClient
+
+
+class ErrorResponse:
+    """APIErrorに渡すレスポンス"""
+
+    def __init__(self, code: int):
+        self.code = code
+        self.text = ''
+
+    def json(self):
+        return {"error": {"code": self.code, "message": "error", "status": ""}}
+
+
+def failing(name: str, codes, owner=None):
+    """codesのエラーを順に発生させた後に成功する、nameという名前のメソッド（ownerを指定するとそのオブジェクトのメソッド）"""
+    errors = list(codes)
+    calls = []
+
+    def method(*args, **kwargs):
+        calls.append(args)
+        if errors:
+            raise gspread.exceptions.APIError(ErrorResponse(errors.pop(0)))
+        return 'ok'
+
+    method.__name__ = name
+    if owner is not None:
+        return types.MethodType(method, owner), calls
+    return method, calls
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """待ちなしで再試行するクライアント"""
+    monkeypatch.setattr('sheets_client.time.sleep', lambda seconds: None)
+    return QuotaAwareClient(requests_per_minute=1e9, burst=1e9, background_reserve=0, max_retries=3)
+
+
+@pytest.mark.parametrize('name', ['get', 'batch_get', 'col_values', 'update', 'batch_update'])
+def test_server_error_retried_for_idempotent_calls(client, name):
+    """読み込みと値の上書きはサーバーエラーでも再試行する"""
+    method, calls = failing(name, [503, 500])
+
+    assert client.call(method) == 'ok'
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize('name', ['append_row', 'append_rows', 'delete_rows', 'add_worksheet'])
+def test_server_error_not_retried_for_non_idempotent_calls(client, name):
+    """行の追加・削除などはサーバーエラーで再試行しない（反映済みの場合に重複・削除しすぎになる）"""
+    method, calls = failing(name, [503])
+
+    with pytest.raises(gspread.exceptions.APIError):
+        client.call(method)
+    assert len(calls) == 1
+
+
+def test_server_error_not_retried_for_spreadsheet_batch_update(client):
+    """Spreadsheet.batch_update（行の削除など）はWorksheet.batch_updateと違い再試行しない"""
+    spreadsheet = gspread.Spreadsheet.__new__(gspread.Spreadsheet)
+    method, calls = failing('batch_update', [502], owner=spreadsheet)
+
+    with pytest.raises(gspread.exceptions.APIError):
+        client.call(method)
+    assert len(calls) == 1
+
+
+def test_quota_error_retried_for_all_calls(client):
+    """クォータ超過（429）はリクエストが処理されていないため、行の追加でも再試行する"""
+    method, calls = failing('append_rows', [429, 429])
+
+    assert client.call(method) == 'ok'
+    assert len(calls) == 3
@@ -0,0 +1,80 @@
+"""SQLiteストレージとスプレッドシートへの複製のテスト"""
+
+import fcntl
+
+import pytest
+
+from conftest import make_handler
+from sqlite_storage import SheetsReplicator, SQLiteTodoStorage
+
+
+@pytest.fixture
+def storage(tmp_path, spreadsheet):
+    """スプレッドシートの既存Todoを取り込んだSQLiteストレージ（起動時と同じ手順）"""
+    storage = SQLiteTodoStorage(str(tmp_path / "todos.db"))
+    storage.import_records(make_handler(spreadsheet).get_all_records())
+    return storage
+
+
+def sheet_rows_by_id(spreadsheet):
+    """シートの行をIDごとに取得（ヘッダーを除く）"""
+    return {row[0]: row for row in spreadsheet.sheet1.rows[1:]}
+
+
+def storage_rows_by_id(storage):
+    """SQLiteの行をIDごとに取得"""
+    return {str(todo.id): todo.to_row() for todo in storage.get_all_records()}
+
+
+def test_outbox_is_replicated_to_sheet(storage, spreadsheet):
+    """SQLiteへの変更がoutbox経由でapply_opsにより反映され、シートがSQLiteと一致する"""
+    handler = make_handler(spreadsheet)
+    replicator = SheetsReplicator(storage, handler, batch_size=3)
+
+    new_id = storage.create_todo('追加', '内容', '2026-12-31', '高')
+    storage.create_todos([{'title': f'一括{i}', 'content': '', 'due_date': '2026-12-31'} for i in range(2)])
+    storage.update_todo(2, '更新後', '内容', '2026-11-30')
+    storage.complete_todo(new_id)
+    storage.delete_todo(4)
+    assert new_id == 6
+
+    # batch_sizeずつ送り、送り切ったら0を返す
+    assert [replicator.sync_once() for _ in range(3)] == [3, 3, 0]
+
+    assert storage.pending_ops() == []
+    assert sheet_rows_by_id(spreadsheet) == storage_rows_by_id(storage)
+    assert handler.get_record(2).title == '更新後'
+    assert handler.get_record(4) is None
+
+
+def test_failed_replication_keeps_outbox(storage, spreadsheet, monkeypatch):
+    """反映に失敗した変更はoutboxに残り、次の複製で送り直される"""
+    handler = make_handler(spreadsheet)
+    replicator = SheetsReplicator(storage, handler)
+    storage.complete_todo(1)
+    storage.delete_todo(5)
+
+    def fail(ops):
+        raise RuntimeError("quota exceeded")
+
+    monkeypatch.setattr(handler, 'apply_ops', fail)
+    with pytest.raises(RuntimeError):
+        replicator.sync_once()
+    assert len(storage.pending_ops()) == 2
+
+    monkeypatch.undo()
+    assert replicator.sync_once() == 2
+    assert sheet_rows_by_id(spreadsheet) == storage_rows_by_id(storage)
+
+
+def test_only_one_process_replicates(storage, spreadsheet):
+    """他のプロセスが複製用のロックを持っている間は複製しない"""
+    replicator = SheetsReplicator(storage, make_handler(spreadsheet))
+    storage.delete_todo(1)
+
+    with open(f"{storage.db_path}.replicator.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        assert replicator.sync_once() == 0
+
+    assert len(storage.pending_ops()) == 1
+    assert '1' in sheet_rows_by_id(spreadsheet)
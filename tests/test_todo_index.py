@@ -0,0 +1,88 @@
+"""並び替えインデックスのテスト"""
+
+import random
+from datetime import date, timedelta
+
+from benchmarks.fakes import FakeSpreadsheet, make_rows
+from conftest import make_handler
+from todo import Todo
+from todo_index import FILTERS, SORT_MODES, TodoSortIndex
+
+
+def assert_matches_rebuild(index, todos):
+    """差分を反映したインデックスが、同じTodoから作り直したインデックスと一致する"""
+    rebuilt = TodoSortIndex(todos)
+    for sort_by in SORT_MODES:
+        for status in FILTERS:
+            assert index.ids(sort_by, status) == rebuilt.ids(sort_by, status), (sort_by, status)
+            assert index.count(sort_by, status) == rebuilt.count(sort_by, status)
+    today = date.today().toordinal()
+    for status in FILTERS:
+        assert index.due_range(today, today + 7, status) == rebuilt.due_range(today, today + 7, status)
+        assert index.due_before(today, status) == rebuilt.due_before(today, status)
+
+
+def random_todo(rng, todo_id):
+    """重要度・期日・ステータスが重複しやすいTodo（期日なし・不正な期日を含む）"""
+    due = rng.choice(['', 'いつか', (date.today() + timedelta(days=rng.randint(-3, 10))).isoformat()])
+    return Todo.from_row([
+        str(todo_id), f'Todo {todo_id}', '', due, rng.choice('高中低'),
+        rng.choice(['未完了', '完了']), '', '', ''
+    ])
+
+
+def test_replace_matches_rebuild():
+    """追加・更新・削除をreplaceで反映し続けても、作り直したインデックスと一致する"""
+    rng = random.Random(0)
+    todos = {todo_id: random_todo(rng, todo_id) for todo_id in range(1, 21)}
+    index = TodoSortIndex(todos.values())
+
+    next_id = 21
+    for _ in range(300):
+        action = rng.choice(['add', 'update', 'delete'])
+        if action == 'add' or not todos:
+            todos[next_id] = random_todo(rng, next_id)
+            index.replace(None, todos[next_id])
+            next_id += 1
+        elif action == 'update':
+            todo_id = rng.choice(list(todos))
+            new = random_todo(rng, todo_id)
+            index.replace(todos[todo_id], new)
+            todos[todo_id] = new
+        else:
+            todo_id = rng.choice(list(todos))
+            index.replace(todos.pop(todo_id), None)
+        assert_matches_rebuild(index, todos.values())
+
+
+def test_handler_updates_index_in_place():
+    """ハンドラーの書き込みと他からの変更の再読み込みで、インデックスを作り直さずに差分だけを反映する"""
+    spreadsheet = FakeSpreadsheet(make_rows(30))
+    handler = make_handler(spreadsheet, cache_ttl=0)
+    handler.get_all_records()
+    handler.get_page('priority_due')
+    index = handler._sort_index
+
+    handler.create_todo('追加', '', (date.today() + timedelta(days=1)).isoformat(), '高')
+    handler.create_todos([{'title': '一括', 'content': '', 'due_date': '', 'priority': '低'}])
+    handler.update_todo(4, 'Todo 4', '', (date.today() - timedelta(days=2)).isoformat(), '高')
+    handler.complete_todo(5)
+    handler.complete_todo(6, completed=False)
+    handler.delete_todo(7)
+    handler.bulk_update([8, 9, 10], 'priority', '低')
+    handler.bulk_update([11, 12], 'delete')
+
+    # 他のワーカーや直接編集による変更（再読み込み時に前回のスナップショットとの差分を反映する）
+    # 自分の書き込みの直後の変更と区別できるよう、更新日時に関係なく読み直させる
+    handler.resync_interval = 0
+    rows = spreadsheet.sheet1.rows
+    rows[13][4] = '高'
+    rows[14][5] = '完了'
+    del rows[15]
+    rows.append(['99', '直接追加', '', date.today().isoformat(), '中', '未完了', '', '', ''])
+    spreadsheet.touch()
+
+    handler.get_page('priority_due')
+    assert handler._sort_index is index
+    assert 99 in index.ids('priority_due', 'all')
+    assert_matches_rebuild(index, handler.get_all_records())
@@ -0,0 +1,79 @@
+"""ライトビハインド（遅延書き込み）のテスト"""
+
+import json
+import os
+
+from conftest import make_handler
+from todo import TodoStatus
+from write_behind import WriteBehindQueue, coalesce_ops
+
+
+def completed_row(spreadsheet, todo_id):
+    """シート上の行をステータスだけ完了にした行"""
+    row = list(spreadsheet.sheet1.rows[todo_id])
+    row[5] = '完了'
+    return row
+
+
+def sample_ops(spreadsheet):
+    """更新・削除・追加を含む操作（同じIDへの変更を含む）"""
+    new_row = ['6', 'Todo 6', '追加', '2026-12-31', '中', '未完了', '2026-01-03 09:00:00', '2026-01-03 09:00:00', '']
+    return [
+        {"op": "put", "id": 2, "row": completed_row(spreadsheet, 2)},
+        {"op": "delete", "id": 4},
+        {"op": "put", "id": 6, "row": new_row},
+        {"op": "put", "id": 6, "row": new_row[:1] + ['Todo 6（更新）'] + new_row[2:]},
+    ]
+
+
+def write_orphaned_journal(journal_dir, ops, pid=999999):
+    """終了したプロセスが残したジャーナルを作成"""
+    path = os.path.join(journal_dir, f"write_behind-{pid}.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for op in ops:
+            f.write(json.dumps(op, ensure_ascii=False) + "\n")
+    return path
+
+
+def test_orphaned_journal_is_adopted(tmp_path, spreadsheet):
+    """起動時に、どのプロセスもロックしていないジャーナルを引き取り、元のファイルを削除する"""
+    ops = sample_ops(spreadsheet)
+    orphan = write_orphaned_journal(str(tmp_path), ops)
+    # 書き込み途中で落ちた最終行は無視する
+    with open(orphan, "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "id"')
+
+    flushed = []
+    queue = WriteBehindQueue(str(tmp_path), flush_fn=flushed.append, flush_interval=3600)
+
+    assert queue.pending_ops() == ops
+    assert not os.path.exists(orphan)
+    with open(queue.journal_path, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == ops
+
+    assert queue.flush() == len(ops)
+    assert flushed == [ops]
+    assert queue.pending_ops() == []
+
+
+def test_coalesce_ops_is_idempotent(spreadsheet):
+    """同じ操作を再送しても、まとめた結果は変わらない"""
+    ops = sample_ops(spreadsheet)
+    assert coalesce_ops(ops + ops) == coalesce_ops(ops)
+
+
+def test_replaying_applied_ops_does_not_change_sheet(tmp_path, spreadsheet):
+    """反映後・ジャーナルの書き直し前に落ちた操作を再送しても、行の重複や消し過ぎが起きない"""
+    ops = sample_ops(spreadsheet)
+    make_handler(spreadsheet).apply_ops(ops)
+    applied = [list(row) for row in spreadsheet.sheet1.rows]
+    assert [row[0] for row in applied[1:]] == ['1', '2', '3', '5', '6']
+
+    write_orphaned_journal(str(tmp_path), ops)
+    handler = make_handler(spreadsheet, write_behind_dir=str(tmp_path), flush_interval=3600)
+    assert handler.flush() == len(ops)
+
+    assert spreadsheet.sheet1.rows == applied
+    assert handler.get_record(2).status == TodoStatus.DONE
+    assert handler.get_record(6).title == 'Todo 6（更新）'
+    assert handler.get_record(4) is None
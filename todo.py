@@ -0,0 +1,138 @@
+"""
+Todoレコードモジュール
+
+スプレッドシートの1行を表す軽量なTodoレコードを定義します。
+期日・重要度・ステータスは行を読み込んだときに一度だけ解釈して保持します。
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List
+
+
+# ヘッダー定義（拡張版）
+HEADERS = ["ID", "タイトル", "内容", "期日", "重要度", "ステータス", "作成日時", "更新日時", "完了日時"]
+
+# 並び替え用の重要度の順位（高→中→低）
+PRIORITY_ORDER = {'高': 1, '中': 2, '低': 3}
+
+
+class TodoStatus(Enum):
+    """Todoのステータス"""
+    OPEN = "未完了"
+    DONE = "完了"
+
+
+def parse_due_ordinal(due_date: str) -> int:
+    """
+    期日（YYYY-MM-DD形式）を日付の序数に変換
+
+    Args:
+        due_date: 期日
+
+    Returns:
+        date.toordinal()の値。空や不正な形式の場合は0（並び替えでは先頭になる）
+    """
+    if not due_date:
+        return 0
+    try:
+        return datetime.strptime(due_date, '%Y-%m-%d').toordinal()
+    except ValueError:
+        return 0
+
+
+class Todo:
+    """スプレッドシートの1行に対応するTodoレコード"""
+
+    __slots__ = (
+        'id',
+        'title',
+        'content',
+        'due_date',
+        'priority',
+        'status',
+        'created_at',
+        'updated_at',
+        'completed_at',
+        'due_ordinal',
+        'priority_rank',
+    )
+
+    def __init__(
+        self,
+        id: int,
+        title: str,
+        content: str,
+        due_date: str,
+        priority: str,
+        status: TodoStatus,
+        created_at: str,
+        updated_at: str,
+        completed_at: str
+    ):
+        self.id = id
+        self.title = title
+        self.content = content
+        self.due_date = due_date
+        self.priority = priority
+        self.status = status
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.completed_at = completed_at
+        self.due_ordinal = parse_due_ordinal(due_date)
+        self.priority_rank = PRIORITY_ORDER.get(priority, 2)
+
+    @classmethod
+    def from_row(cls, row: List[str]) -> "Todo":
+        """
+        9カラムの行からTodoを作成（既存データの互換性のためデフォルト値を補完）
+
+        Args:
+            row: 9カラムの行（1列目は数字のID）
+
+        Returns:
+            Todoレコード
+        """
+        status = TodoStatus.DONE if row[5] == TodoStatus.DONE.value else TodoStatus.OPEN
+        return cls(
+            int(row[0]),
+            row[1],
+            row[2],
+            row[3],
+            row[4] or '中',
+            status,
+            row[6],
+            row[7],
+            row[8]
+        )
+
+    def to_row(self) -> List[str]:
+        """9カラムの行に変換"""
+        return [
+            str(self.id),
+            self.title,
+            self.content,
+            self.due_date,
+            self.priority,
+            self.status.value,
+            self.created_at,
+            self.updated_at,
+            self.completed_at
+        ]
+
+    def to_dict(self) -> Dict:
+        """ヘッダー名をキーとする辞書に変換"""
+        record = dict(zip(HEADERS, self.to_row()))
+        record['ID'] = self.id
+        return record
+
+    @property
+    def is_completed(self) -> bool:
+        """完了済みか"""
+        return self.status is TodoStatus.DONE
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Todo) and self.to_row() == other.to_row()
+
+    def __repr__(self) -> str:
+        return f"Todo(id={self.id}, title={self.title!r}, due_date={self.due_date!r}, status={self.status.value})"
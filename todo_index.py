@@ -0,0 +1,142 @@
+"""
+Todo並び替えインデックスモジュール
+
+並び替え方法・ステータスごとにソート済みのキーを保持し、
+Todoの追加・更新・削除のたびに二分探索で差分だけを反映します。
+"""
+
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from todo import Todo, TodoStatus
+
+
+# インデックスを持つ並び替え方法（defaultはシート上の並び順なので対象外）
+SORT_MODES = ('priority', 'due_date', 'priority_due')
+
+# インデックスを持つステータスフィルター
+FILTERS = ('all',) + tuple(status.value for status in TodoStatus)
+
+
+def sort_entry(sort_by: str, todo: Todo) -> Tuple:
+    """
+    並び替え用のキーを取得（同順位はIDの小さい順＝登録順）
+
+    Args:
+        sort_by: 並び替え方法（priority/due_date/priority_due）
+        todo: Todo
+
+    Returns:
+        末尾がIDのタプル
+    """
+    if sort_by == 'priority':
+        return (todo.priority_rank, todo.id)
+    elif sort_by == 'due_date':
+        return (todo.due_ordinal, todo.id)
+    return (todo.priority_rank, todo.due_ordinal, todo.id)
+
+
+class TodoSortIndex:
+    """並び替え方法×ステータスごとのソート済みインデックス"""
+
+    def __init__(self, todos: Iterable[Todo] = ()):
+        """
+        初期化
+
+        Args:
+            todos: 最初に登録するTodo
+        """
+        self._entries: Dict[Tuple[str, str], List[Tuple]] = {
+            (sort_by, status): [] for sort_by in SORT_MODES for status in FILTERS
+        }
+        todos = list(todos)
+        for sort_by in SORT_MODES:
+            entries = sorted(sort_entry(sort_by, todo) + (todo.status.value,) for todo in todos)
+            self._entries[(sort_by, 'all')] = [entry[:-1] for entry in entries]
+            for status in FILTERS[1:]:
+                self._entries[(sort_by, status)] = [entry[:-1] for entry in entries if entry[-1] == status]
+
+    @staticmethod
+    def supports(sort_by: str, filter_status: str) -> bool:
+        """インデックスで扱える並び替え・絞り込みか"""
+        return sort_by in SORT_MODES and filter_status in FILTERS
+
+    def add(self, todo: Todo):
+        """Todoを登録"""
+        for sort_by in SORT_MODES:
+            entry = sort_entry(sort_by, todo)
+            insort(self._entries[(sort_by, 'all')], entry)
+            insort(self._entries[(sort_by, todo.status.value)], entry)
+
+    def remove(self, todo: Todo):
+        """Todoを取り除く（登録時と同じ値のTodoを渡す）"""
+        for sort_by in SORT_MODES:
+            entry = sort_entry(sort_by, todo)
+            for status in ('all', todo.status.value):
+                entries = self._entries[(sort_by, status)]
+                i = bisect_left(entries, entry)
+                if i < len(entries) and entries[i] == entry:
+                    del entries[i]
+
+    def replace(self, old: Optional[Todo], new: Optional[Todo]):
+        """
+        Todoの変更を反映
+
+        Args:
+            old: 変更前のTodo（新規追加の場合はNone）
+            new: 変更後のTodo（削除の場合はNone）
+        """
+        if old is not None:
+            self.remove(old)
+        if new is not None:
+            self.add(new)
+
+    def count(self, sort_by: str, filter_status: str) -> int:
+        """該当するTodoの件数"""
+        return len(self._entries[(sort_by, filter_status)])
+
+    def ids(self, sort_by: str, filter_status: str, start: int = 0, stop: Optional[int] = None) -> List[int]:
+        """
+        並び替え済みのIDを範囲指定で取得
+
+        Args:
+            sort_by: 並び替え方法（priority/due_date/priority_due）
+            filter_status: ステータスフィルター（all/未完了/完了）
+            start: 開始位置
+            stop: 終了位置（Noneの場合は最後まで）
+
+        Returns:
+            TodoのIDのリスト
+        """
+        return [entry[-1] for entry in self._entries[(sort_by, filter_status)][start:stop]]
+
+    def due_before(self, due_ordinal: int, filter_status: str = 'all') -> List[int]:
+        """
+        期日が指定日より前のTodoのIDを期日順に取得（期日なしは含まない）
+
+        Args:
+            due_ordinal: 基準日（date.toordinal()の値、この日は含まない）
+            filter_status: ステータスフィルター（all/未完了/完了）
+
+        Returns:
+            TodoのIDのリスト
+        """
+        return self.due_range(1, due_ordinal, filter_status)
+
+    def due_range(self, start_ordinal: int, stop_ordinal: Optional[int], filter_status: str = 'all') -> List[int]:
+        """
+        期日が範囲内のTodoのIDを期日順に取得（期日なしは含まない）
+
+        Args:
+            start_ordinal: 範囲の開始日（date.toordinal()の値、この日を含む）
+            stop_ordinal: 範囲の終了日（この日は含まない、Noneの場合は上限なし）
+            filter_status: ステータスフィルター（all/未完了/完了）
+
+        Returns:
+            TodoのIDのリスト
+        """
+        entries = self._entries[('due_date', filter_status)]
+        # 期日なし・不正な期日は0なので先頭に集まっている
+        start = bisect_left(entries, (max(start_ordinal, 1),))
+        stop = len(entries) if stop_ordinal is None else bisect_left(entries, (stop_ordinal,))
+        return [entry[-1] for entry in entries[start:stop]]
@@ -0,0 +1,177 @@
+"""
+ライトビハインド（遅延書き込み）モジュール
+
+Todoの変更をローカルのジャーナルファイルに追記して即座に応答し、
+バックグラウンドでまとめてGoogleスプレッドシートへ反映します。
+"""
+
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+
+def coalesce_ops(ops: List[Dict]) -> Tuple[Dict[int, List[str]], List[int]]:
+    """
+    同じIDへの変更をまとめ、最終状態だけを残す
+
+    Args:
+        ops: ジャーナルの操作リスト（{"op": "put", "id", "row"} または {"op": "delete", "id"}）
+
+    Returns:
+        (IDごとの最終的な行, 削除するIDのリスト) のタプル。行は最初に変更された順に並ぶ
+    """
+    puts: Dict[int, List[str]] = {}
+    deletes: Dict[int, None] = {}
+    for op in ops:
+        todo_id = int(op["id"])
+        if op["op"] == "put":
+            puts[todo_id] = op["row"]
+            deletes.pop(todo_id, None)
+        elif op["op"] == "delete":
+            puts.pop(todo_id, None)
+            deletes[todo_id] = None
+    return puts, list(deletes)
+
+
+class WriteBehindQueue:
+    """
+    ジャーナル付きの書き込みキュー
+
+    変更はプロセスごとのジャーナルファイル（write_behind-<pid>.jsonl）に追記・fsyncしてから
+    受け付けるため、反映前にプロセスが落ちても失われません。起動時には、どのプロセスも
+    ロックしていない（＝持ち主が終了した）ジャーナルを引き取って再送します。
+    """
+
+    def __init__(
+        self,
+        journal_dir: str,
+        flush_fn: Callable[[List[Dict]], None],
+        flush_interval: float = 2.0
+    ):
+        """
+        初期化
+
+        Args:
+            journal_dir: ジャーナルファイルを置くディレクトリ
+            flush_fn: 溜まった操作リストをスプレッドシートへ反映する関数（失敗時は例外を送出）
+            flush_interval: バックグラウンドで反映する間隔（秒）
+        """
+        self.journal_dir = journal_dir
+        self.flush_fn = flush_fn
+        self.flush_interval = flush_interval
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        os.makedirs(journal_dir, exist_ok=True)
+        self.journal_path = os.path.join(journal_dir, f"write_behind-{os.getpid()}.jsonl")
+        self._journal = open(self.journal_path, "a+", encoding="utf-8")
+        fcntl.flock(self._journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        self._adopt_orphaned_journals()
+
+        self._thread = threading.Thread(target=self._run, name="write-behind-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def _read_journal(f) -> List[Dict]:
+        """ジャーナルを読み込む（書き込み途中で途切れた最終行は無視）"""
+        f.seek(0)
+        ops = []
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                ops.append(json.loads(line))
+            except ValueError:
+                break
+        return ops
+
+    def _write_journal(self, ops: List[Dict]):
+        """ジャーナルを指定した操作だけの内容に書き直す"""
+        self._journal.seek(0)
+        self._journal.truncate()
+        for op in ops:
+            self._journal.write(json.dumps(op, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _adopt_orphaned_journals(self):
+        """終了したプロセスのジャーナルを自分のジャーナルに取り込む"""
+        adopted = self._read_journal(self._journal)
+        for path in sorted(glob.glob(os.path.join(self.journal_dir, "write_behind-*.jsonl"))):
+            if path == self.journal_path:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue  # 稼働中のプロセスが使用中
+                ops = self._read_journal(f)
+                adopted.extend(ops)
+                # 取り込んだ内容を永続化してから元のファイルを削除
+                self._write_journal(adopted)
+                os.remove(path)
+                if ops:
+                    print(f"✓ 未反映の変更を{len(ops)}件引き継ぎました: {os.path.basename(path)}")
+        self._pending = adopted
+        if adopted:
+            self._wakeup.set()
+
+    def record(self, op: Dict):
+        """
+        操作をジャーナルに追記して受け付ける
+
+        Args:
+            op: {"op": "put", "id": ID, "row": 行} または {"op": "delete", "id": ID}
+        """
+        with self._lock:
+            self._journal.seek(0, os.SEEK_END)
+            self._journal.write(json.dumps(op, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._pending.append(op)
+        self._wakeup.set()
+
+    def pending_ops(self) -> List[Dict]:
+        """未反映の操作のコピーを取得"""
+        with self._lock:
+            return list(self._pending)
+
+    def flush(self) -> int:
+        """
+        未反映の操作をスプレッドシートへ反映
+
+        Returns:
+            反映した操作の件数
+        """
+        with self._flush_lock:
+            batch = self.pending_ops()
+            if not batch:
+                return 0
+            self.flush_fn(batch)
+            with self._lock:
+                # 反映中に追加された操作だけを残してジャーナルを書き直す
+                self._pending = self._pending[len(batch):]
+                self._write_journal(self._pending)
+            return len(batch)
+
+    def _run(self):
+        """バックグラウンドで定期的に反映"""
+        while True:
+            self._wakeup.wait()
+            # 連続した変更をまとめるため少し待ってから反映
+            time.sleep(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"✗ スプレッドシートへの遅延書き込みに失敗しました（再試行します）: {str(e)}")
+                self._wakeup.set()